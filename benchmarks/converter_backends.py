@@ -0,0 +1,102 @@
+"""Compare the per-job cost of the ffmpeg subprocess converter and the warm PyAV worker pool.
+
+Usage:
+    python -m benchmarks.converter_backends --jobs 200 --concurrency 4
+
+Inputs are rendered with ffmpeg (see ``benchmarks.ffmpeg_profiles``); both backends write the
+same 8 kHz mono PCM WAV clip, so the difference is process startup and codec initialisation.
+"""
+
+import os
+
+# Converting needs no real services, placeholders are enough to load settings
+os.environ.setdefault("DB_USER", "bench")
+os.environ.setdefault("DB_PASS", "bench")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_NAME", "bench")
+os.environ.setdefault("TELEGRAM_TOKEN", "42:BENCH")
+os.environ.setdefault("ACRCLOUD_ACCESS_KEY", "bench")
+os.environ.setdefault("ACRCLOUD_SECRET_KEY", "bench")
+
+import argparse
+import asyncio
+import itertools
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.ffmpeg_profiles import render_synthetic_inputs
+from bot.services.audioConverter import ConvertMusic
+from bot.services.decoderPool import DecoderPool
+from bot.services.encodingProfiles import PROFILES
+
+
+async def run_jobs(convert, inputs: list, workdir: Path, jobs: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    durations: list = []
+    counter = itertools.count()
+
+    async def job(content_type: str, path: Path):
+        async with semaphore:
+            output = workdir / f"clip-{next(counter)}.wav"
+            started = time.perf_counter()
+            await convert(str(path), str(output), content_type)
+            durations.append(time.perf_counter() - started)
+            output.unlink()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(job(*inputs[i % len(inputs)]) for i in range(jobs)))
+    elapsed = time.perf_counter() - started
+    ordered = sorted(durations)
+    return {
+        "jobs_per_s": jobs / elapsed,
+        "mean_ms": statistics.fmean(durations) * 1000,
+        "p95_ms": ordered[int(len(ordered) * 0.95) - 1] * 1000,
+    }
+
+
+async def run(jobs: int, concurrency: int, workers: int) -> dict:
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        inputs = render_synthetic_inputs(workdir)
+
+        async def subprocess_convert(input_path, output_path, content_type):
+            await ConvertMusic.convert(input_path, output_path, content_type, PROFILES["wav"])
+
+        report["ffmpeg subprocess"] = await run_jobs(subprocess_convert, inputs, workdir, jobs, concurrency)
+
+        if DecoderPool.available():
+            pool = DecoderPool(workers=workers, max_jobs_per_worker=max(jobs, 1))
+            await pool.start()
+            try:
+
+                async def pool_convert(input_path, output_path, content_type):
+                    await pool.decode(input_path, output_path)
+
+                report[f"pool ({workers} workers)"] = await run_jobs(pool_convert, inputs, workdir, jobs, concurrency)
+            finally:
+                await pool.stop()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run(args.jobs, args.concurrency, args.workers))
+    print(f"{'backend':<24}{'jobs/s':>10}{'mean ms':>10}{'p95 ms':>10}")
+    for name, stats in report.items():
+        print(f"{name:<24}{stats['jobs_per_s']:>10.1f}{stats['mean_ms']:>10.1f}{stats['p95_ms']:>10.1f}")
+    if len(report) == 1:
+        print("Install the av package to benchmark the worker pool")
+
+
+if __name__ == "__main__":
+    main()
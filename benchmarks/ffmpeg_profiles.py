@@ -0,0 +1,152 @@
+"""Compare ffmpeg encoding profiles by CPU time, output size and recognition agreement.
+
+Usage:
+    python -m benchmarks.ffmpeg_profiles --runs 20
+    python -m benchmarks.ffmpeg_profiles --samples ~/music-samples --recognize
+
+Without ``--samples`` a tone is rendered into voice, video note, video and audio inputs
+with ffmpeg itself. ``--samples`` takes a directory of real media files, with the content
+type taken from the extension (``.ogg`` voice, ``.mp4`` video, anything else audio).
+``--recognize`` sends every clip to ACRCloud using the credentials from ``.env`` and
+reports how often each profile finds the same song as the ``mp3`` profile, which is what
+the bot used before profiles existed.
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bot.services.encodingProfiles import PROFILES, ffmpeg_args
+
+BASELINE_PROFILE = "mp3"
+
+SYNTHETIC_INPUTS = {
+    "voice": ("voice.ogg", ["-c:a", "libopus", "-ac", "1"]),
+    "video_note": ("video_note.mp4", ["-c:a", "aac", "-c:v", "libx264", "-shortest"]),
+    "video": ("video.mp4", ["-c:a", "aac", "-c:v", "libx264", "-shortest"]),
+    "audio": ("audio.mp3", ["-c:a", "libmp3lame"]),
+}
+
+
+def render_synthetic_inputs(directory: Path, seconds: int = 30) -> list[tuple[str, Path]]:
+    """Render a tone (with a video track where Telegram would have one) for every content type."""
+    inputs = []
+    for content_type, (name, codec_args) in SYNTHETIC_INPUTS.items():
+        path = directory / name
+        sources = ["-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}"]
+        if name.endswith(".mp4"):
+            sources += ["-f", "lavfi", "-i", f"color=c=blue:s=320x240:d={seconds}"]
+        subprocess.run(["ffmpeg", "-loglevel", "error", "-y", *sources, *codec_args, str(path)], check=True)
+        inputs.append((content_type, path))
+    return inputs
+
+
+def sample_inputs(directory: Path) -> list[tuple[str, Path]]:
+    inputs = []
+    for path in sorted(directory.iterdir()):
+        if path.suffix == ".ogg":
+            inputs.append(("voice", path))
+        elif path.suffix in (".mp4", ".mov", ".webm"):
+            inputs.append(("video", path))
+        elif path.is_file():
+            inputs.append(("audio", path))
+    return inputs
+
+
+def children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def convert(args: list[str]) -> tuple[float, float]:
+    """Run one ffmpeg conversion and return its (wall, cpu) seconds."""
+    cpu_before = children_cpu_seconds()
+    started = time.perf_counter()
+    subprocess.run(args, check=True, capture_output=True)
+    return time.perf_counter() - started, children_cpu_seconds() - cpu_before
+
+
+def run_profiles(inputs: list[tuple[str, Path]], workdir: Path, runs: int, threads: int) -> dict:
+    report: dict = {}
+    for name, profile in PROFILES.items():
+        walls, cpus, sizes = [], [], []
+        for content_type, path in inputs:
+            output = workdir / f"{path.stem}.{content_type}.{name}.{profile.extension}"
+            args = ffmpeg_args(str(path), str(output), profile, content_type, threads)
+            for _ in range(runs):
+                wall, cpu = convert(args)
+                walls.append(wall)
+                cpus.append(cpu)
+            sizes.append(output.stat().st_size)
+        report[name] = {
+            "wall_ms": statistics.fmean(walls) * 1000,
+            "cpu_ms": statistics.fmean(cpus) * 1000,
+            "output_kb": statistics.fmean(sizes) / 1024,
+        }
+    return report
+
+
+def recognition_agreement(inputs: list[tuple[str, Path]], workdir: Path) -> dict:
+    """Recognize every clip and count how often each profile agrees with the baseline profile."""
+    from bot.services.audioRecognition import AudioRecognition
+
+    recognizer = AudioRecognition()
+
+    def acrid(path: Path) -> str | None:
+        data = json.loads(recognizer.recognize_audio(str(path)))
+        songs = data.get("metadata", {}).get("music", [])
+        return songs[0]["acrid"] if songs else None
+
+    results = {name: [] for name in PROFILES}
+    for content_type, path in inputs:
+        for name, profile in PROFILES.items():
+            results[name].append(acrid(workdir / f"{path.stem}.{content_type}.{name}.{profile.extension}"))
+    baseline = results[BASELINE_PROFILE]
+    return {
+        name: {
+            "recognized": sum(found is not None for found in found_ids),
+            "agrees_with_baseline": sum(found == expected for found, expected in zip(found_ids, baseline)),
+            "total": len(found_ids),
+        }
+        for name, found_ids in results.items()
+    }
+
+
+def format_report(report: dict, agreement: dict | None) -> str:
+    lines = [f"{'profile':<10}{'wall ms':>10}{'cpu ms':>10}{'size KiB':>10}{'recognized':>12}{'agrees':>8}"]
+    for name, stats in report.items():
+        line = f"{name:<10}{stats['wall_ms']:>10.1f}{stats['cpu_ms']:>10.1f}{stats['output_kb']:>10.1f}"
+        if agreement is not None:
+            found = agreement[name]
+            line += f"{found['recognized']:>9}/{found['total']:<2}{found['agrees_with_baseline']:>6}/{found['total']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="conversions per input and profile")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--samples", type=Path, help="directory of real media files to convert")
+    parser.add_argument("--recognize", action="store_true", help="also recognize every clip with ACRCloud")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        inputs = sample_inputs(args.samples) if args.samples else render_synthetic_inputs(workdir)
+        if not inputs:
+            sys.exit(f"No media files found in {args.samples}")
+        report = run_profiles(inputs, workdir, args.runs, args.threads)
+        agreement = recognition_agreement(inputs, workdir) if args.recognize else None
+    print(f"{len(inputs)} inputs x {args.runs} runs, ffmpeg threads={args.threads}")
+    print(format_report(report, agreement))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Measure lookups against a large memory-mapped fingerprint index.
+
+Usage:
+    python -m benchmarks.fingerprint_index --postings 10000000 --segments 8 --readers 4
+
+The index is written straight in the on-disk layout of ``FingerprintIndex`` (a manifest and sorted
+``.npy`` segments) with random postings, then queried with clip-sized hash sets, first spread over
+``--segments`` segments and again after compaction. ``--readers`` processes map the same index to
+show that the postings are shared page cache rather than private memory of every process.
+"""
+
+import os
+
+# The index needs no real services, placeholders are enough to load settings
+os.environ.setdefault("DB_USER", "bench")
+os.environ.setdefault("DB_PASS", "bench")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_NAME", "bench")
+os.environ.setdefault("TELEGRAM_TOKEN", "42:BENCH")
+os.environ.setdefault("ACRCLOUD_ACCESS_KEY", "bench")
+os.environ.setdefault("ACRCLOUD_SECRET_KEY", "bench")
+
+import argparse
+import json
+import multiprocessing
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bot.services.localRecognizer import MANIFEST, POSTING_DTYPE, FingerprintIndex, LocalRecognizer
+
+POSTINGS_PER_SONG = 2500
+HASH_SPACE = 1 << 25
+
+
+def build_index(directory: Path, postings: int, segments: int, seed: int = 0) -> int:
+    """Write ``postings`` random postings as ``segments`` sorted segments, return the number of songs."""
+    rng = np.random.default_rng(seed)
+    songs = max(1, postings // POSTINGS_PER_SONG)
+    names = []
+    for number, size in enumerate(np.diff(np.linspace(0, postings, segments + 1).astype(np.int64))):
+        segment = np.empty(size, dtype=POSTING_DTYPE)
+        segment["hash"] = rng.integers(0, HASH_SPACE, size, dtype=np.uint32)
+        segment["song"] = rng.integers(0, songs, size, dtype=np.uint32)
+        segment["offset"] = rng.integers(0, 2000, size, dtype=np.uint32)
+        segment.sort(order="hash", kind="stable")
+        names.append(f"segment-{number:06d}.npy")
+        np.save(directory / names[-1], segment)
+    manifest = {"songs": [f"song-{song}" for song in range(songs)], "segments": names, "next_segment": segments}
+    (directory / MANIFEST).write_text(json.dumps(manifest))
+    return songs
+
+
+def make_queries(index: FingerprintIndex, count: int, seed: int = 1) -> list:
+    """Clip-sized queries, half of their hashes known to the index and half not."""
+    rng = np.random.default_rng(seed)
+    segment = next(iter(index._segments.values()))
+    queries = []
+    for _ in range(count):
+        known = np.asarray(segment["hash"][rng.integers(0, len(segment), POSTINGS_PER_SONG // 2)])
+        unknown = rng.integers(0, HASH_SPACE, POSTINGS_PER_SONG // 2, dtype=np.uint32)
+        hashes = np.concatenate([known, unknown])
+        queries.append((hashes, rng.integers(0, 600, len(hashes), dtype=np.uint32)))
+    return queries
+
+
+def measure(index: FingerprintIndex, queries: list) -> dict:
+    recognizer = LocalRecognizer(index)
+    lookups, matches = [], []
+    for hashes, offsets in queries:
+        started = time.perf_counter()
+        index.lookup(hashes, offsets)
+        lookups.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        recognizer.match(hashes, offsets)
+        matches.append(time.perf_counter() - started)
+    lookups.sort()
+    return {
+        "lookup_p50_ms": statistics.median(lookups) * 1000,
+        "lookup_p95_ms": lookups[int(len(lookups) * 0.95) - 1] * 1000,
+        "match_p50_ms": statistics.median(matches) * 1000,
+        "lookups_per_s": len(lookups) / sum(lookups),
+    }
+
+
+def memory_kb() -> dict:
+    """Anonymous (private) and file-backed resident memory of this process."""
+    status = Path("/proc/self/status").read_text().splitlines()
+    return {line.split(":")[0]: int(line.split()[1]) for line in status if line.startswith(("RssAnon", "RssFile"))}
+
+
+def reader(directory: str, queries: int, results) -> None:
+    before = memory_kb()
+    index = FingerprintIndex(Path(directory))
+    index.load()
+    # Touch every page of the postings, as a long-running process eventually does
+    for segment in index._segments.values():
+        int(segment["hash"].sum())
+    stats = measure(index, make_queries(index, queries))
+    after = memory_kb()
+    results.put({key: after[key] - before[key] for key in after} | stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--postings", type=int, default=10_000_000)
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--readers", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        started = time.perf_counter()
+        songs = build_index(directory, args.postings, args.segments)
+        print(f"Built {args.postings:,} postings of {songs:,} songs in {time.perf_counter() - started:.1f} s")
+        size = sum(path.stat().st_size for path in directory.glob("segment-*.npy"))
+        print(f"{size / 2**20:.0f} MiB on disk, {size / args.postings:.0f} bytes per posting")
+
+        index = FingerprintIndex(directory, max_segments=args.segments + 1)
+        started = time.perf_counter()
+        index.load()
+        print(f"Loaded in {(time.perf_counter() - started) * 1000:.1f} ms")
+        queries = make_queries(index, args.queries)
+
+        print(f"{'layout':<16}{'lookup p50':>12}{'lookup p95':>12}{'match p50':>12}{'lookups/s':>12}")
+        report = {f"{args.segments} segments": measure(index, queries)}
+        started = time.perf_counter()
+        index.compact()
+        compaction = time.perf_counter() - started
+        report["1 segment"] = measure(index, queries)
+        for layout, stats in report.items():
+            print(
+                f"{layout:<16}{stats['lookup_p50_ms']:>10.2f}ms{stats['lookup_p95_ms']:>10.2f}ms"
+                f"{stats['match_p50_ms']:>10.2f}ms{stats['lookups_per_s']:>12.0f}"
+            )
+        print(f"Compaction took {compaction:.1f} s")
+
+        if args.readers:
+            results = multiprocessing.get_context("spawn").Queue()
+            processes = [
+                multiprocessing.get_context("spawn").Process(target=reader, args=(tmp, args.queries // 4, results))
+                for _ in range(args.readers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            print(f"{'reader':<8}{'private MiB':>14}{'shared MiB':>12}{'lookup p50':>12}")
+            for number in range(args.readers):
+                stats = results.get()
+                print(
+                    f"{number:<8}{stats['RssAnon'] / 1024:>14.1f}{stats['RssFile'] / 1024:>12.1f}"
+                    f"{stats['lookup_p50_ms']:>10.2f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
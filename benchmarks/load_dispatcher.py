@@ -0,0 +1,378 @@
+"""Replay synthetic Telegram updates through the real dispatcher and report throughput.
+
+Usage:
+    python -m benchmarks.load_dispatcher --updates 5000 --concurrency 64
+
+The Bot API is replaced by an in-process fake session, ACRCloud by a stub with a
+configurable latency, the database by a temporary SQLite file (or ``--db-url``) and ffmpeg by a
+shell script that copies its input (pass ``--real-ffmpeg`` to transcode a
+generated tone with the real binary instead).
+"""
+
+import os
+
+# The harness never talks to the real services, placeholders are enough to load settings
+os.environ.setdefault("DB_USER", "load")
+os.environ.setdefault("DB_PASS", "load")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_NAME", "load")
+os.environ.setdefault("TELEGRAM_TOKEN", "42:LOAD_TEST")
+os.environ.setdefault("ACRCLOUD_ACCESS_KEY", "load")
+os.environ.setdefault("ACRCLOUD_SECRET_KEY", "load")
+os.environ.setdefault("DEBUG", "False")
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import logging
+import math
+import random
+import stat
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import wave
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, Optional
+from unittest.mock import patch
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.types import Audio, CallbackQuery, Chat, File, Message, Update, User, Video, VideoNote, Voice
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from bot.core.configure import Settings
+from bot.core.database import get_sessionmaker
+from bot.services.audioRecognition import AudioRecognition
+from bot.services.tempFiles import temp_files
+from models import Base
+
+logger = logging.getLogger(__name__)
+
+FAKE_FFMPEG = """#!/bin/sh
+in=""; prev=""; out=""
+for a in "$@"; do
+  [ "$prev" = "-i" ] && in="$a"
+  prev="$a"; out="$a"
+done
+[ -n "$in" ] && [ -f "$in" ] && cp "$in" "$out"
+exit 0
+"""
+
+UPDATE_MIX = {
+    "audio": 30,
+    "voice": 20,
+    "video": 10,
+    "video_note": 5,
+    "start": 10,
+    "help": 10,
+    "history": 10,
+    "history_page": 5,
+}
+
+_query_counter: ContextVar[Optional[list]] = ContextVar("query_counter", default=None)
+
+
+def generate_tone(seconds: float = 15.0, rate: int = 8000, frequency: float = 440.0) -> bytes:
+    """Return a mono 16-bit WAV file containing a sine tone."""
+    frames = b"".join(
+        struct.pack("<h", int(12000 * math.sin(2 * math.pi * frequency * i / rate))) for i in range(int(seconds * rate))
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+class FakeSession(BaseSession):
+    """Bot API session that answers every method locally."""
+
+    def __init__(self, payload: bytes, latency: float = 0.0):
+        super().__init__()
+        self.payload = payload
+        self.latency = latency
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._message_ids = itertools.count(1_000_000)
+
+    async def close(self) -> None:
+        pass
+
+    async def make_request(self, bot: Bot, method, timeout: Optional[int] = None) -> Any:
+        self.calls[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        returning = method.__returning__
+        if returning is Message:
+            chat_id = getattr(method, "chat_id", None) or 1
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.datetime.now(),
+                chat=Chat(id=chat_id, type="private"),
+                text=getattr(method, "text", None),
+            ).as_(bot)
+        if returning is File:
+            return File(file_id=method.file_id, file_unique_id=method.file_id, file_path=f"media/{method.file_id}")
+        return True
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        for start in range(0, len(self.payload), chunk_size):
+            yield self.payload[start : start + chunk_size]
+
+
+class HandlerTimingMiddleware(BaseMiddleware):
+    """Record how long each handler takes."""
+
+    def __init__(self, timings: Dict[str, list]):
+        self.timings = timings
+
+    async def __call__(self, handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            name = data["handler"].callback.__name__ if "handler" in data else "unhandled"
+            self.timings[name].append(time.perf_counter() - started)
+
+
+def make_catalogue(size: int) -> list[dict]:
+    return [
+        {
+            "title": f"Song {i}",
+            "artists": [{"name": f"Artist {i % 97}"}],
+            "album": {"name": f"Album {i % 31}"},
+            "release_date": "2020-01-01",
+            "duration_ms": 180000,
+            "genres": [{"name": "Pop"}],
+            "acrid": f"acrid-{i}",
+            "external_metadata": {"spotify": {"track": {"id": f"sp{i}"}}},
+        }
+        for i in range(size)
+    ]
+
+
+def make_update(update_id: int, kind: str, user_id: int) -> Update:
+    user = User(id=user_id, is_bot=False, first_name="Load", username=f"load{user_id}")
+    chat = Chat(id=user_id, type="private")
+    now = datetime.datetime.now()
+    file_id = f"file-{random.randrange(10_000)}"
+    fields: Dict[str, Any] = {"message_id": update_id, "date": now, "chat": chat, "from_user": user}
+    if kind == "audio":
+        fields["audio"] = Audio(file_id=file_id, file_unique_id=file_id, duration=30, mime_type="audio/mpeg")
+    elif kind == "voice":
+        fields["voice"] = Voice(file_id=file_id, file_unique_id=file_id, duration=15, mime_type="audio/ogg")
+    elif kind == "video":
+        fields["video"] = Video(file_id=file_id, file_unique_id=file_id, width=640, height=360, duration=20)
+    elif kind == "video_note":
+        fields["video_note"] = VideoNote(file_id=file_id, file_unique_id=file_id, length=240, duration=12)
+    elif kind == "start":
+        fields["text"] = "/start"
+    elif kind == "help":
+        fields["text"] = "/help"
+    elif kind == "history":
+        fields["text"] = "📜 History"
+    elif kind == "history_page":
+        callback = CallbackQuery(
+            id=str(update_id),
+            from_user=user,
+            chat_instance=str(user_id),
+            data="history:1",
+            message=Message(message_id=update_id, date=now, chat=chat, text="history"),
+        )
+        return Update(update_id=update_id, callback_query=callback)
+    return Update(update_id=update_id, message=Message(**fields))
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values: list) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+    }
+
+
+async def run_load_test(
+    updates: int = 1000,
+    concurrency: int = 32,
+    users: int = 200,
+    acr_latency: float = 0.05,
+    api_latency: float = 0.0,
+    catalogue_size: int = 500,
+    real_ffmpeg: bool = False,
+    db_url: Optional[str] = None,
+    throttling: bool = False,
+    seed: int = 0,
+) -> dict:
+    """Feed synthetic updates through the dispatcher and return a report."""
+    from main import create_dispatcher
+
+    random.seed(seed)
+    catalogue = make_catalogue(catalogue_size)
+
+    def fake_recognize(self, file_path: str) -> str:
+        time.sleep(acr_latency)
+        return json.dumps({"status": {"code": 0, "msg": "Success"}, "metadata": {"music": [random.choice(catalogue)]}})
+
+    with tempfile.TemporaryDirectory() as workdir, contextlib.ExitStack() as stack:
+        engine = create_async_engine(db_url or f"sqlite+aiosqlite:///{workdir}/load.db")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        sessionmaker = get_sessionmaker(engine)
+
+        def count_query(*args):
+            counter = _query_counter.get()
+            if counter is not None:
+                counter[0] += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+        for module_name, module in list(sys.modules.items()):
+            if module_name.startswith("bot.repositories.") and hasattr(module, "sessionmaker"):
+                stack.enter_context(patch.object(module, "sessionmaker", sessionmaker))
+        stack.enter_context(patch.object(AudioRecognition, "recognize_audio", fake_recognize))
+        downloads = Path(workdir) / "downloads"
+        downloads.mkdir()
+        stack.enter_context(patch.object(Settings, "DOWNLOADS_DIR", downloads))
+        stack.enter_context(patch.object(temp_files, "root", downloads))
+
+        if not real_ffmpeg:
+            ffmpeg = Path(workdir) / "ffmpeg"
+            ffmpeg.write_text(FAKE_FFMPEG)
+            ffmpeg.chmod(ffmpeg.stat().st_mode | stat.S_IEXEC)
+            stack.enter_context(patch.dict(os.environ, {"PATH": f"{workdir}{os.pathsep}{os.environ['PATH']}"}))
+
+        session = FakeSession(generate_tone(), latency=api_latency)
+        bot = Bot(token="42:LOAD_TEST", session=session)
+        dp = create_dispatcher(throttling=throttling)
+        handler_timings: Dict[str, list] = defaultdict(list)
+        timing_middleware = HandlerTimingMiddleware(handler_timings)
+        for router in dp.sub_routers:
+            router.message.middleware(timing_middleware)
+            router.callback_query.middleware(timing_middleware)
+
+        kinds = random.choices(list(UPDATE_MIX), weights=list(UPDATE_MIX.values()), k=updates)
+        latencies: list = []
+        query_counts: list = []
+        errors: Dict[str, int] = defaultdict(int)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def feed(update_id: int, kind: str):
+            async with semaphore:
+                counter = [0]
+                _query_counter.set(counter)
+                update = make_update(update_id, kind, user_id=random.randrange(1, users + 1))
+                started = time.perf_counter()
+                try:
+                    await dp.feed_update(bot, update)
+                except Exception as e:
+                    errors[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - started)
+                # Keep the counter itself so queries from background tasks spawned by this update are included
+                query_counts.append(counter)
+
+        await dp.emit_startup(bot=bot)
+        started = time.perf_counter()
+        await asyncio.gather(*(feed(i, kind) for i, kind in enumerate(kinds, start=1)))
+        elapsed = time.perf_counter() - started
+        await dp.emit_shutdown(bot=bot)
+        await engine.dispose()
+        query_counts = [counter[0] for counter in query_counts]
+
+    return {
+        "updates": updates,
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "updates_per_s": updates / elapsed if elapsed else 0.0,
+        "latency": summarize(latencies),
+        "handlers": {name: summarize(values) for name, values in sorted(handler_timings.items())},
+        "db_queries_per_update": {
+            "mean": statistics.fmean(query_counts) if query_counts else 0.0,
+            "p95": percentile(query_counts, 95),
+            "max": max(query_counts, default=0),
+        },
+        "bot_api_calls": dict(session.calls),
+        "errors": dict(errors),
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['updates']} updates in {report['elapsed_s']:.2f}s "
+        f"({report['updates_per_s']:.1f} updates/s, concurrency {report['concurrency']})",
+        "",
+        f"{'handler':<28}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+    for name, stats in [("(update)", report["latency"]), *report["handlers"].items()]:
+        lines.append(
+            f"{name:<28}{stats['count']:>8}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+        )
+    queries = report["db_queries_per_update"]
+    lines += ["", f"DB queries per update: mean {queries['mean']:.2f}, p95 {queries['p95']}, max {queries['max']}"]
+    if report["errors"]:
+        lines.append("Unhandled errors: " + ", ".join(f"{name} x{count}" for name, count in report["errors"].items()))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--acr-latency", type=float, default=0.05, help="seconds per stubbed ACRCloud call")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds per fake Bot API call")
+    parser.add_argument("--catalogue-size", type=int, default=500)
+    parser.add_argument("--real-ffmpeg", action="store_true")
+    parser.add_argument("--db-url", help="database to load instead of a temporary SQLite file")
+    parser.add_argument("--throttle", action="store_true", help="keep the per-user rate limits enabled")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(
+        run_load_test(
+            updates=args.updates,
+            concurrency=args.concurrency,
+            users=args.users,
+            acr_latency=args.acr_latency,
+            api_latency=args.api_latency,
+            catalogue_size=args.catalogue_size,
+            real_ffmpeg=args.real_ffmpeg,
+            db_url=args.db_url,
+            throttling=args.throttle,
+            seed=args.seed,
+        )
+    )
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
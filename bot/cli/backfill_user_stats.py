@@ -0,0 +1,58 @@
+"""Recompute the per user statistics rollups from the history.
+
+Usage:
+    python -m bot.cli.backfill_user_stats [--user TELEGRAM_ID ...] [--batch-size 500]
+
+The rollups are kept up to date by every history insert; run this once after the migration that
+creates them, or to repair the counters of some users. Every batch of users is rebuilt in its own
+transaction. Recognitions of those users written while their batch runs may be counted twice or
+not at all, so run it for everyone before starting the bot.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from bot.core.database import engine
+from bot.repositories.stats_repo import rebuild_user_stats
+from bot.repositories.user_repo import get_user_ids
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_user_stats(user_ids: list[int] | None = None, batch_size: int = 500) -> tuple[int, int]:
+    """Rebuild the rollups of ``user_ids``, or of every user; returns the users and records counted."""
+    if user_ids is None:
+        user_ids = await get_user_ids()
+    started = time.perf_counter()
+    records = 0
+    for start in range(0, len(user_ids), batch_size):
+        records += await rebuild_user_stats(user_ids[start : start + batch_size])
+        done = min(start + batch_size, len(user_ids))
+        logger.info(f"{done}/{len(user_ids)} users, {records} records in {time.perf_counter() - started:.1f} s")
+    return len(user_ids), records
+
+
+async def run(user_ids: list[int] | None, batch_size: int) -> tuple[int, int]:
+    try:
+        return await backfill_user_stats(user_ids, batch_size)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user", type=int, action="append", dest="users", help="only rebuild this Telegram user")
+    parser.add_argument("--batch-size", type=int, default=500, help="users rebuilt per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    # Statement echo would print every batch
+    engine.echo = False
+    users, records = asyncio.run(run(args.users, args.batch_size))
+    print(f"Rebuilt the statistics of {users} users from {records} history records")
+
+
+if __name__ == "__main__":
+    main()
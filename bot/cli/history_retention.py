@@ -0,0 +1,53 @@
+"""Create upcoming monthly history partitions and archive the ones past the retention period.
+
+Usage:
+    python -m bot.cli.history_retention [--retention-months 12] [--archive-dir DIR] [--dry-run]
+
+Partitions of months that ended more than HISTORY_RETENTION_MONTHS months before the current one are
+detached from ``history``, written to ``<archive dir>/<partition>.csv.gz`` and dropped. Meant to run
+daily from cron; nothing is archived while the retention is 0. PostgreSQL only.
+
+The /top play counts and /stats counters are kept, so archived recognitions still count there,
+but a later ``bot.cli.backfill_user_stats`` only sees the history that is left.
+"""
+
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+
+from bot.core.database import engine
+from bot.services.historyPartitions import history_partitions
+
+logger = logging.getLogger(__name__)
+
+
+async def run(dry_run: bool) -> tuple[list[str], list[str]]:
+    try:
+        created = [] if dry_run else await history_partitions.ensure_ahead()
+        return created, await history_partitions.archive_expired(dry_run=dry_run)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--retention-months", type=int, help="overrides HISTORY_RETENTION_MONTHS")
+    parser.add_argument("--archive-dir", type=Path, help="overrides HISTORY_ARCHIVE_DIR")
+    parser.add_argument("--dry-run", action="store_true", help="only list the partitions that would be archived")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    engine.echo = False
+    if args.retention_months is not None:
+        history_partitions.retention_months = args.retention_months
+    if args.archive_dir is not None:
+        history_partitions.archive_dir = args.archive_dir
+    created, expired = asyncio.run(run(args.dry_run))
+    print(f"Created {len(created)} partitions, {'would archive' if args.dry_run else 'archived'} {len(expired)}")
+    for name in expired:
+        print(f"  {name}")
+
+
+if __name__ == "__main__":
+    main()
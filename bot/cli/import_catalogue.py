@@ -0,0 +1,129 @@
+"""Import songs from ACRCloud JSON lines dumps into the songs table.
+
+Usage:
+    python -m bot.cli.import_catalogue dumps/*.jsonl.gz --batch-size 5000 [--update]
+
+Every line is either one ACRCloud music item or a whole recognition response, whose
+``metadata.music`` and ``metadata.humming`` items are all imported. Songs whose acrid is
+already stored are skipped, or overwritten with ``--update``. Cached cards of overwritten songs
+are dropped in this process only: a running bot keeps serving its stale cards until restarted.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from bot.core.database import engine
+from bot.repositories.song_repo import bulk_create_songs, song_row
+from utils.song_parser import parse_song
+
+logger = logging.getLogger(__name__)
+
+
+class ImportReport:
+    """Counters of one import run."""
+
+    def __init__(self):
+        self.lines = 0
+        self.songs = 0
+        self.skipped = 0
+        self.inserted = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.songs / self.seconds if self.seconds else 0.0
+
+
+def open_dump(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_songs(lines: Iterable[str], report: ImportReport) -> Iterator[dict]:
+    """Parse dump lines into songs rows, counting lines that hold no usable song."""
+    for line in lines:
+        report.lines += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            report.skipped += 1
+            continue
+        if not isinstance(record, dict):
+            report.skipped += 1
+            continue
+        if "metadata" in record:
+            metadata = record["metadata"] or {}
+            items = (metadata.get("music") or []) + (metadata.get("humming") or [])
+        else:
+            items = [record]
+        for item in items:
+            song = parse_song(item) if isinstance(item, dict) else {}
+            if not song.get("acrid"):
+                report.skipped += 1
+                continue
+            yield song_row(song)
+
+
+async def import_catalogue(paths: list[Path], batch_size: int = 5000, update: bool = False) -> ImportReport:
+    report = ImportReport()
+    started = time.perf_counter()
+    batch: list[dict] = []
+
+    async def flush():
+        report.inserted += await bulk_create_songs(batch, update)
+        report.songs += len(batch)
+        batch.clear()
+        report.seconds = time.perf_counter() - started
+        logger.info(f"{report.songs} songs read, {report.inserted} written, {report.rows_per_second:.0f} rows/s")
+
+    for path in paths:
+        with open_dump(path) as dump:
+            for row in iter_songs(dump, report):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    await flush()
+    if batch:
+        await flush()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+async def run(paths: list[Path], batch_size: int, update: bool) -> ImportReport:
+    try:
+        return await import_catalogue(paths, batch_size, update)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", type=Path, help="JSON lines files, optionally gzipped")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="overwrite songs that are already stored; a running bot keeps its cached cards of them until restarted",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    # Statement echo would print every batch
+    engine.echo = False
+    report = asyncio.run(run(args.paths, args.batch_size, args.update))
+    print(
+        f"{report.lines} lines, {report.songs} songs, {report.skipped} skipped, "
+        f"{report.inserted} written in {report.seconds:.1f} s ({report.rows_per_second:.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
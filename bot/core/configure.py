@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import ClassVar
+from typing import ClassVar, Literal
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from sqlalchemy.orm import declarative_base
@@ -34,7 +34,89 @@ class DB_Settings(EnvBaseSettings):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS.get_secret_value()}@{self.DB_HOST}:{self.db_port}/{self.DB_NAME}"
 
 
-class Settings(AcrCloudSettings, TelegramSettings, DB_Settings):
+class TracingSettings(EnvBaseSettings):
+    tracing_enabled: bool = False
+    otlp_endpoint: str | None = None
+    tracing_service_name: str = "music-finder"
+
+
+class HistorySettings(EnvBaseSettings):
+    history_batch_size: int = 500
+    history_flush_interval: float = 1.0
+    # Monthly partitions created ahead of the current month (PostgreSQL)
+    history_partitions_ahead: int = 3
+    # Full months kept before the current one by the retention job, 0 keeps everything
+    history_retention_months: int = 0
+    history_archive_dir: str | None = None
+    # Recognitions persisted at once after the reply, the rest wait for a slot
+    persist_concurrency: int = 1
+
+
+class LeaderboardSettings(EnvBaseSettings):
+    leaderboard_size: int = 10
+    leaderboard_refresh_interval: float = 60.0
+
+
+class ExportSettings(EnvBaseSettings):
+    export_batch_size: int = 1000
+    # Exports larger than this are spooled to a temporary file instead of memory
+    export_spool_kb: int = 1024
+
+
+class RateLimitSettings(EnvBaseSettings):
+    rate_limit_recognition_burst: int = 3
+    rate_limit_recognition_per_minute: float = 5
+    rate_limit_command_burst: int = 10
+    rate_limit_command_per_minute: float = 60
+    rate_limit_chat_factor: float = 3
+    redis_url: str | None = None
+
+
+class LifecycleSettings(EnvBaseSettings):
+    shutdown_timeout: float = 25.0
+
+
+class TempFileSettings(EnvBaseSettings):
+    # Point this at a tmpfs such as /dev/shm to keep media off the disk; the bot only uses and sweeps
+    # its own music-finder-<bot id> subdirectory in it
+    temp_dir: str | None = None
+    temp_quota_mb: int = 512
+    temp_max_age: float = 600.0
+    temp_sweep_interval: float = 60.0
+
+
+class ConverterSettings(EnvBaseSettings):
+    ffmpeg_profile: Literal["wav", "mp3", "opus"] = "wav"
+    ffmpeg_threads: int = 1
+    ffmpeg_passthrough: bool = True
+    # "pool" decodes with PyAV in warm worker processes instead of starting ffmpeg for every file
+    converter_backend: Literal["ffmpeg", "pool"] = "ffmpeg"
+    converter_workers: int = 2
+    converter_jobs_per_worker: int = 200
+
+
+class LocalRecognitionSettings(EnvBaseSettings):
+    local_recognition_enabled: bool = False
+    local_index_dir: str | None = None
+    local_min_matches: int = 25
+    local_flush_interval: float = 60.0
+    local_max_segments: int = 8
+
+
+class Settings(
+    AcrCloudSettings,
+    TelegramSettings,
+    DB_Settings,
+    TracingSettings,
+    HistorySettings,
+    LeaderboardSettings,
+    ExportSettings,
+    RateLimitSettings,
+    LifecycleSettings,
+    TempFileSettings,
+    ConverterSettings,
+    LocalRecognitionSettings,
+):
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -44,6 +126,8 @@ class Settings(AcrCloudSettings, TelegramSettings, DB_Settings):
     DEBUG: bool = True
     PROJECT_ROOT: ClassVar[Path] = Path(__file__).resolve().parent.parent.parent
     DOWNLOADS_DIR: ClassVar[Path] = PROJECT_ROOT / "bot" / "downloads"
+    FINGERPRINTS_DIR: ClassVar[Path] = PROJECT_ROOT / "data" / "fingerprints"
+    HISTORY_ARCHIVE_DIR: ClassVar[Path] = PROJECT_ROOT / "data" / "history-archive"
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
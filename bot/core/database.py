@@ -4,9 +4,12 @@ from typing import TYPE_CHECKING
 from uuid import uuid4
 
 from asyncpg import Connection
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from bot.core.configure import settings
+from bot.core.tracing import instrument_engine
 
 if TYPE_CHECKING:
     from sqlalchemy.engine.url import URL
@@ -32,6 +35,14 @@ def get_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
     return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 
+def dialect_insert(session: AsyncSession, model):
+    """Build an INSERT for the session's dialect so ON CONFLICT clauses are available."""
+    if session.bind.dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return pg_insert(model)
+
+
 db_url = settings.db_url
 engine = get_engine(url=db_url)
+instrument_engine(engine)
 sessionmaker = get_sessionmaker(engine)
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+
+from bot.core.configure import settings
+from bot.core.database import engine
+from bot.middlewares.inflight import InFlightMiddleware
+from bot.repositories.history_repo import supports_partitions
+from bot.services.audioConverter import ConvertMusic
+from bot.services.backgroundTasks import background_tasks
+from bot.services.decoderPool import decoder_pool
+from bot.services.historyBuffer import history_buffer
+from bot.services.historyPartitions import history_partitions
+from bot.services.leaderboard import leaderboard
+from bot.services.localRecognizer import local_recognizer
+from bot.services.tempFiles import temp_files
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Startup and shutdown hooks of the polling runtime."""
+
+    def __init__(self, in_flight: InFlightMiddleware, shutdown_timeout: float = 25.0):
+        self.in_flight = in_flight
+        self.shutdown_timeout = shutdown_timeout
+
+    async def startup(self) -> None:
+        await temp_files.start()
+        if settings.converter_backend == "pool":
+            await decoder_pool.start()
+        if settings.local_recognition_enabled:
+            await local_recognizer.start()
+        if supports_partitions():
+            # Keeps the history partitions of the coming months ready
+            await history_partitions.start()
+        await history_buffer.start()
+        await leaderboard.start()
+
+    async def shutdown(self) -> None:
+        """Drain handlers, stop ffmpeg, finish background work and flush buffered writes within the timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.shutdown_timeout
+
+        await self.in_flight.drain(self.shutdown_timeout)
+        await leaderboard.stop()
+        await history_partitions.stop()
+        killed = await ConvertMusic.kill_running()
+        if killed:
+            logger.warning(f"Killed {killed} ffmpeg processes still running at shutdown")
+        await decoder_pool.stop()
+        await background_tasks.drain(max(deadline - loop.time(), 1.0))
+        await temp_files.stop()
+        if settings.local_recognition_enabled:
+            await local_recognizer.stop()
+        await history_buffer.stop()
+        await engine.dispose()
+        logger.info(
+            f"Shutdown complete: {self.in_flight.interrupted} updates interrupted, "
+            f"{self.in_flight.dropped} dropped, {background_tasks.failed} background tasks failed"
+        )
@@ -0,0 +1,303 @@
+import abc
+import functools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Sequence
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """A single timed operation within a trace.
+
+    ``start_ns`` is a wall clock timestamp for the exporter; durations are measured
+    with the monotonic ``perf_counter_ns`` so clock adjustments cannot skew them.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error", "_started")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None = None, attributes: dict | None = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+        self.end_ns: int | None = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._started
+
+    @property
+    def duration_ms(self) -> float:
+        if self.end_ns is None:
+            return (time.perf_counter_ns() - self._started) / 1_000_000
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+
+class _NoopSpan:
+    """Span stand-in handed out while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(abc.ABC):
+    """Receives finished spans."""
+
+    @abc.abstractmethod
+    def export(self, spans: Sequence[Span]) -> None: ...
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps finished spans in a list, used by tests."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, spans: Sequence[Span]) -> None:
+        self.spans.extend(spans)
+
+    def get_finished_spans(self) -> list[Span]:
+        return list(self.spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class LoggingSpanExporter(SpanExporter):
+    """Logs root spans with their duration."""
+
+    def export(self, spans: Sequence[Span]) -> None:
+        for span in spans:
+            if span.parent_id is None:
+                logger.info(f"Trace {span.trace_id} {span.name} took {span.duration_ms:.1f} ms")
+
+
+class OTLPSpanExporter(SpanExporter):
+    """Sends spans to an OTLP/HTTP collector as JSON from a background thread."""
+
+    def __init__(self, endpoint: str, service_name: str, batch_size: int = 256, timeout: float = 5.0):
+        self.endpoint = endpoint.rstrip("/")
+        if not self.endpoint.endswith("/v1/traces"):
+            self.endpoint += "/v1/traces"
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=10_000)
+        self._thread = threading.Thread(target=self._worker, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                logger.warning("OTLP exporter queue is full, dropping span")
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=self.timeout)
+
+    def _worker(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=1)
+                except queue.Empty:
+                    break
+            stopping = item is None
+            if batch:
+                self._send(batch)
+
+    def _send(self, spans: list[Span]) -> None:
+        import requests
+
+        try:
+            requests.post(
+                self.endpoint,
+                data=json.dumps(self.encode(spans)),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to export spans: {e}")
+
+    def encode(self, spans: Sequence[Span]) -> dict:
+        """Build an OTLP/JSON ExportTraceServiceRequest body."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "music-finder"},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    "parentSpanId": span.parent_id or "",
+                                    "name": span.name,
+                                    "kind": 1,
+                                    "startTimeUnixNano": str(span.start_ns),
+                                    "endTimeUnixNano": str(span.end_ns),
+                                    "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+                                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                                }
+                                for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the configured exporter."""
+
+    def __init__(self, exporter: SpanExporter | None = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def set_exporter(self, exporter: SpanExporter | None) -> None:
+        if self.exporter is not None and self.exporter is not exporter:
+            self.exporter.shutdown()
+        self.exporter = exporter
+
+    @staticmethod
+    def current_span() -> Span | None:
+        return _current_span.get()
+
+    def start_span(self, name: str, **attributes) -> Span:
+        """Start a span under the current one without making it current."""
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        return Span(name, trace_id, parent.span_id if parent else None, attributes)
+
+    def end_span(self, span: Span) -> None:
+        span.end()
+        if self.exporter is not None:
+            self.exporter.export((span,))
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span | _NoopSpan]:
+        """Run the enclosed block inside a new current span."""
+        if self.exporter is None:
+            yield NOOP_SPAN
+            return
+        span = self.start_span(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def traced(self, name: str | None = None) -> Callable:
+        """Decorate a coroutine function so every call runs in its own span."""
+
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+tracer = Tracer()
+
+
+def instrument_engine(engine) -> None:
+    """Record a span for every SQL statement executed through the engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if tracer.enabled:
+            context._tracing_span = tracer.start_span(
+                "sql", **{"db.statement": statement, "db.executemany": executemany}
+            )
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_tracing_span", None)
+        if span is not None:
+            context._tracing_span = None
+            tracer.end_span(span)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_tracing_span", None) if context is not None else None
+        if span is not None:
+            context._tracing_span = None
+            span.record_exception(exception_context.original_exception)
+            tracer.end_span(span)
+
+
+def configure_tracing(settings) -> None:
+    """Install the exporter selected by the tracing settings."""
+    if not settings.tracing_enabled:
+        tracer.set_exporter(None)
+    elif settings.otlp_endpoint:
+        tracer.set_exporter(OTLPSpanExporter(settings.otlp_endpoint, settings.tracing_service_name))
+    else:
+        tracer.set_exporter(LoggingSpanExporter())
@@ -33,10 +33,13 @@ async def help_handler(message: Message):
 *Commands:*
 /start - Start the bot and show menu
 /help - Show this help message
+/search <text> - Find a song in your history by title or artist
+/top [hour|day|week] - Most recognised songs
+/stats - Your top artists, genres and recognitions per month
 
 *Buttons:*
 🎵 Recognize Song - Start song recognition
-📜 History - View your recognition history
+📜 History - View your recognition history or export it as CSV/JSON
 ℹ️ Help - Show this help message
 
 *Tips:*
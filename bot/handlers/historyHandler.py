@@ -1,13 +1,53 @@
 from aiogram import Router, F, types
-from aiogram.types import Message
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
 from bot.repositories.history_repo import get_history_by_user_id
 from bot.repositories.song_repo import find_song_by_acrid
 from bot.repositories.user_repo import create_user
+from bot.services.historyExport import EXPORT_FORMATS, MAX_DOCUMENT_BYTES, history_exporter
+from bot.services.progressReporter import in_flight_jobs
+from utils.card_cache import card_cache
 from utils.slice_response import paginate_response
 from utils.telegram_formatter import format_song_for_telegram
 
 router = Router(name="history")
 
+PAGE_SIZE = 5
+
+
+def history_item(card: str, record) -> str:
+    """A song card followed by when the history record was made."""
+    return card + f"\n🕒 Recognized at: {record.recognized_at.strftime('%Y-%m-%d %H:%M:%S')}"
+
+
+async def render_history(history) -> list[str]:
+    """Render history records, loading songs only for cards that are not cached."""
+    items = []
+    for record in history:
+        text = card_cache.get(record.song_id)
+        if text is None:
+            song = await find_song_by_acrid(record.song_id)
+            text = format_song_for_telegram(song)
+        items.append(history_item(text, record))
+    return items
+
+
+async def render_history_page(history, page: int) -> tuple[str, InlineKeyboardMarkup]:
+    """Render one page of history; only the records on that page are rendered."""
+    start = page * PAGE_SIZE
+    items = await render_history(history[start : start + PAGE_SIZE])
+    response, kb = paginate_response(items, page=page, page_size=PAGE_SIZE, total=len(history))
+    return response, with_export_buttons(kb)
+
+
+def with_export_buttons(kb: InlineKeyboardMarkup) -> InlineKeyboardMarkup:
+    kb.inline_keyboard.append(
+        [
+            InlineKeyboardButton(text=f"📤 Export {export_format.upper()}", callback_data=f"export:{export_format}")
+            for export_format in EXPORT_FORMATS
+        ]
+    )
+    return kb
+
 
 @router.message(F.text == "📜 History")
 async def history_handler(message: Message):
@@ -17,13 +57,7 @@ async def history_handler(message: Message):
     if not history:
         await message.answer("You have no history yet.")
         return
-    items = []
-    for record in history:
-        song = await find_song_by_acrid(record.song_id)
-        text = format_song_for_telegram(song)
-        text += f"\n🕒 Recognized at: {record.recognized_at.strftime('%Y-%m-%d %H:%M:%S')}"
-        items.append(text)
-    response, kb = paginate_response(items, page=0)
+    response, kb = await render_history_page(history, page=0)
     await message.answer(response, reply_markup=kb, parse_mode="Markdown")
 
 
@@ -31,11 +65,30 @@ async def history_handler(message: Message):
 async def history_page(call: types.CallbackQuery):
     page = int(call.data.split(":")[1])
     history = await get_history_by_user_id(call.from_user.id)
-    items = []
-    for record in history:
-        song = await find_song_by_acrid(record.song_id)
-        text = format_song_for_telegram(song)
-        text += f"\n🕒 Recognized at: {record.recognized_at.strftime('%Y-%m-%d %H:%M:%S')}"
-        items.append(text)
-    response, kb = paginate_response(items, page=page)
+    response, kb = await render_history_page(history, page)
     await call.message.edit_text(response, reply_markup=kb, parse_mode="Markdown")
+
+
+@router.callback_query(F.data.startswith("export:"))
+async def export_history(call: types.CallbackQuery):
+    """Send the user's whole history as a CSV or JSON lines document."""
+    export_format = call.data.split(":")[1]
+    if export_format not in EXPORT_FORMATS:
+        await call.answer()
+        return
+    # One export per user at a time, repeated taps are ignored
+    job_key = (call.from_user.id, "export")
+    if not in_flight_jobs.claim(job_key):
+        await call.answer("⏳ Your export is already being prepared.")
+        return
+    try:
+        await call.answer("📤 Preparing your export...")
+        async with history_exporter.export(call.from_user.id, export_format) as document:
+            if not document.rows:
+                await call.message.answer("You have no history yet.")
+            elif document.size > MAX_DOCUMENT_BYTES:
+                await call.message.answer("❌ Your history is too large to send as a Telegram document.")
+            else:
+                await call.message.answer_document(document, caption=f"📜 {document.rows} recognized songs")
+    finally:
+        in_flight_jobs.release(job_key)
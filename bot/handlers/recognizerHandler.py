@@ -1,18 +1,23 @@
-import os
+import asyncio
 from aiogram import Router, F
-from aiogram.enums import ContentType
+from aiogram.enums import ChatAction, ContentType
 from aiogram.types import Message
 from bot.keyboard.menu import menu_keyboard
-from bot.repositories.history_repo import create_history
-from bot.repositories.user_repo import create_user
 from bot.services.audioConverter import ConvertMusic
 from bot.services.audioRecognition import AudioRecognition
-from bot.services.randomNameGenerator import generate_random_filename
-from utils.song_handler import handle_recognized_song
+from bot.services.backgroundTasks import background_tasks
+from bot.services.progressReporter import RecognitionProgress, in_flight_jobs
+from bot.services.singleFlight import SingleFlight
+from bot.services.tempFiles import temp_files
+from bot.services.tempNames import temp_names
+from utils.helpers import file_digest
+from utils.song_handler import handle_recognized_song, persist_recognition
 
 router = Router(name="recognizer")
 recognizer = AudioRecognition()
 convert = ConvertMusic()
+media_flight = SingleFlight("media")
+audio_flight = SingleFlight("audio")
 
 
 @router.message(F.text == "🎵 Recognize Song")
@@ -46,21 +51,54 @@ async def recognize_song(message: Message):
         user_id = message.from_user.id
         username = message.from_user.username
 
-        # Ensure user exists in database before creating history
-        await create_user(user_id, username)
+        # Ignore the same file sent again by the same user while it is still being processed
+        job_key = (user_id, file.file_unique_id)
+        if not in_flight_jobs.claim(job_key):
+            await message.answer("⏳ This file is already being recognized, please wait.", reply_markup=menu_keyboard)
+            return
+
+        try:
+            action = (
+                ChatAction.RECORD_VOICE if content_type in (ContentType.AUDIO, ContentType.VOICE) else ChatAction.TYPING
+            )
+            async with RecognitionProgress(message, action) as progress:
+                await progress.stage("downloading")
 
-        generated_name = await generate_random_filename()
-        file_name = f"{generated_name}{user_id}{file.file_id}.{content_type}"
-        file_id = file.file_id
+                async def recognize_media():
+                    file_name = temp_names.new(content_type.value)
+                    file_id = file.file_id
 
-        # Convert the media file to MP3
-        mp3_file_path = await convert.save_and_convert_to_mp3(file_id, file_name, message.bot)
+                    # The workspace and everything in it is removed when the job ends, whatever the outcome
+                    async with temp_files.workspace(file.file_size or 0) as workspace:
+                        # Convert the media file into a short clip in the configured encoding profile
+                        clip_path = await convert.save_and_convert(
+                            file_id,
+                            file_name,
+                            message.bot,
+                            progress,
+                            workspace,
+                            content_type=content_type.value,
+                            mime_type=getattr(file, "mime_type", None),
+                        )
+                        # Recognize the song from the clip, sharing the ACRCloud call with byte-identical clips;
+                        # the digest is not an audio fingerprint, other encodings of the same audio differ
+                        await progress.stage("recognizing")
+                        digest = await asyncio.to_thread(file_digest, clip_path)
+                        return await audio_flight.do(digest, lambda: handle_recognized_song(clip_path, duration))
+
+                # The same clip forwarded to many users is downloaded and recognized once
+                result = await media_flight.do(file.file_unique_id, recognize_media)
+        finally:
+            in_flight_jobs.release(job_key)
+
+        if isinstance(result, str):
+            # Recognition failed, the result is the message for the user
+            await message.answer(result, reply_markup=menu_keyboard)
+            return
 
-        # Recognize the song from the MP3 file
-        response, song_id = await handle_recognized_song(mp3_file_path)
-        await create_history(user_id, song_id)
-        os.remove(mp3_file_path)
-        # Send the response to the user
+        # Reply first, persist the user, song and history afterwards
+        response, song_info = result
         await message.answer(response, reply_markup=menu_keyboard)
+        background_tasks.spawn(persist_recognition(user_id, username, song_info), name=f"persist:{user_id}")
     except Exception as e:
         await message.answer(f"❌ An error occurred: {e}", reply_markup=menu_keyboard)
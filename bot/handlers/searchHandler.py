@@ -0,0 +1,58 @@
+from aiogram import Router, F, types
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message
+
+from bot.handlers.historyHandler import history_item
+from bot.repositories.history_repo import search_history
+from utils.slice_response import paginate_response
+from utils.telegram_formatter import escape_markdown, format_song_for_telegram
+
+router = Router(name="search")
+PAGE_SIZE = 5
+MAX_QUERY_LENGTH = 100
+
+
+async def search_page(user_id: int, query: str, page: int) -> tuple[str, types.InlineKeyboardMarkup] | None:
+    """Render one page of the user's history matching ``query``, or None if nothing matches."""
+    rows, total = await search_history(user_id, query, limit=PAGE_SIZE, offset=page * PAGE_SIZE)
+    if not rows:
+        return None
+    items = [history_item(format_song_for_telegram(song), record) for record, song in rows]
+    return paginate_response(
+        items,
+        page=page,
+        page_size=PAGE_SIZE,
+        prefix="search",
+        title=f"🔎 *{total} results for* {escape_markdown(query)}:",
+        total=total,
+    )
+
+
+@router.message(Command(commands=["search"]))
+async def search_handler(message: Message, command: CommandObject, state: FSMContext):
+    """Search the user's history by song title or artist."""
+    query = (command.args or "").strip()[:MAX_QUERY_LENGTH]
+    if not query:
+        await message.answer("🔎 Send /search followed by a song title or artist, e.g. /search queen")
+        return
+    # The query is kept in the FSM storage, callback data only carries the page number
+    await state.update_data(search_query=query)
+    result = await search_page(message.from_user.id, query, 0)
+    if result is None:
+        await message.answer(f"Nothing in your history matches {escape_markdown(query)}.")
+        return
+    response, kb = result
+    await message.answer(response, reply_markup=kb, parse_mode="Markdown")
+
+
+@router.callback_query(F.data.startswith("search:"))
+async def search_page_handler(call: types.CallbackQuery, state: FSMContext):
+    page = int(call.data.split(":")[1])
+    query = (await state.get_data()).get("search_query")
+    result = await search_page(call.from_user.id, query, page) if query else None
+    if result is None:
+        await call.answer("This search has expired, please send /search again.")
+        return
+    response, kb = result
+    await call.message.edit_text(response, reply_markup=kb, parse_mode="Markdown")
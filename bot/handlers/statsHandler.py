@@ -0,0 +1,37 @@
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from bot.keyboard.menu import menu_keyboard
+from bot.repositories.stats_repo import ARTIST, GENRE, MONTH, TOTAL, get_user_stats
+from utils.telegram_formatter import escape_markdown
+
+router = Router(name="stats")
+TOP_SIZE = 5
+MONTHS = 12
+
+
+def ranked(counts: dict[str, int], size: int = TOP_SIZE) -> list[str]:
+    top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:size]
+    return [f"{position}. {escape_markdown(name)} ({count})" for position, (name, count) in enumerate(top, start=1)]
+
+
+def render_stats(stats: dict[str, dict[str, int]]) -> str:
+    total = stats.get(TOTAL, {}).get("", 0)
+    if not total:
+        return "📊 You have not recognised any songs yet."
+    lines = [f"📊 *Your statistics*\n\nSongs recognised: {total}"]
+    if stats.get(ARTIST):
+        lines += ["\n*Top artists:*", *ranked(stats[ARTIST])]
+    if stats.get(GENRE):
+        lines += ["\n*Top genres:*", *ranked(stats[GENRE])]
+    months = sorted(stats.get(MONTH, {}).items())[-MONTHS:]
+    lines += ["\n*Per month:*", *(f"{month}: {count}" for month, count in months)]
+    return "\n".join(lines)
+
+
+@router.message(Command(commands=["stats"]))
+async def stats_handler(message: Message):
+    """Show the user's recognitions, top artists and genres and recognitions per month."""
+    stats = await get_user_stats(message.from_user.id)
+    await message.answer(render_stats(stats), reply_markup=menu_keyboard, parse_mode="Markdown")
@@ -0,0 +1,44 @@
+from aiogram import Router, F, types
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
+
+from bot.services.leaderboard import PERIODS, leaderboard
+
+router = Router(name="top")
+DEFAULT_PERIOD = "day"
+
+
+def period_keyboard(current: str) -> InlineKeyboardMarkup:
+    buttons = [
+        InlineKeyboardButton(text=f"• {period} •" if period == current else period, callback_data=f"top:{period}")
+        for period in PERIODS
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=[buttons])
+
+
+@router.message(Command(commands=["top"]))
+async def top_handler(message: Message, command: CommandObject):
+    """Show the most recognised songs of the last hour, day or week."""
+    period = (command.args or DEFAULT_PERIOD).strip().lower()
+    if period not in PERIODS:
+        await message.answer(f"Usage: /top [{'|'.join(PERIODS)}]")
+        return
+    await message.answer(await leaderboard.text(period), reply_markup=period_keyboard(period), parse_mode="Markdown")
+
+
+@router.callback_query(F.data.startswith("top:"))
+async def top_period_handler(call: types.CallbackQuery):
+    period = call.data.split(":")[1]
+    if period not in PERIODS:
+        await call.answer()
+        return
+    try:
+        await call.message.edit_text(
+            await leaderboard.text(period), reply_markup=period_keyboard(period), parse_mode="Markdown"
+        )
+    except TelegramBadRequest as e:
+        # Tapping the period already shown, before the leaderboard was refreshed
+        if "message is not modified" not in str(e):
+            raise
+    await call.answer()
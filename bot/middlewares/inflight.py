@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+RESTART_TEXT = "🔄 The bot is restarting, please send your request again in a minute."
+
+
+class InFlightMiddleware(BaseMiddleware):
+    """Track updates that are being handled so shutdown can wait for them, and refuse new ones while stopping."""
+
+    def __init__(self):
+        self.accepting = True
+        self.dropped = 0
+        self.interrupted = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not self.accepting:
+            self.dropped += 1
+            return None
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            return await handler(event, data)
+        except asyncio.CancelledError:
+            if not self.accepting:
+                self.interrupted += 1
+                await self._notify(data)
+            raise
+        finally:
+            self._tasks.discard(task)
+
+    @staticmethod
+    async def _notify(data: Dict[str, Any]) -> None:
+        # The handler was cut off by shutdown, so at least tell the user to try again
+        chat = data.get("event_chat")
+        bot = data.get("bot")
+        if chat is None or bot is None:
+            return
+        with suppress(Exception):
+            await bot.send_message(chat.id, RESTART_TEXT)
+
+    async def drain(self, timeout: float | None = 25.0) -> bool:
+        """Stop accepting updates and wait for running ones, cancelling whatever is left after the timeout."""
+        self.accepting = False
+        if not self._tasks:
+            return True
+        logger.info(f"Waiting for {len(self._tasks)} updates still being handled")
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} updates still running after {timeout}s")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return not pending
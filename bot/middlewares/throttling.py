@@ -0,0 +1,151 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, NamedTuple
+
+from aiogram import BaseMiddleware
+from aiogram.enums import ContentType
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+RECOGNITION_CONTENT_TYPES = {ContentType.AUDIO, ContentType.VOICE, ContentType.VIDEO, ContentType.VIDEO_NOTE}
+
+
+class RateLimit(NamedTuple):
+    burst: int
+    per_minute: float
+
+    @property
+    def per_second(self) -> float:
+        return self.per_minute / 60
+
+    def scaled(self, factor: float) -> "RateLimit":
+        return RateLimit(max(1, int(self.burst * factor)), self.per_minute * factor)
+
+
+class MemoryRateLimitBackend:
+    """Token buckets kept in process memory."""
+
+    def __init__(self, max_buckets: int = 100_000):
+        self.max_buckets = max_buckets
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    async def acquire(self, key: str, limit: RateLimit) -> bool:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated) * limit.per_second)
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        if len(self._buckets) > self.max_buckets:
+            self._prune(now)
+        return allowed
+
+    def _prune(self, now: float) -> None:
+        # Buckets untouched for ten minutes are full again under any sane limit
+        for key in [key for key, (_, updated) in self._buckets.items() if now - updated > 600]:
+            del self._buckets[key]
+
+
+class RedisRateLimitBackend:
+    """Token buckets shared between bot processes through Redis."""
+
+    SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+local updated = tonumber(redis.call('HGET', KEYS[1], 'updated'))
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+if tokens == nil then
+  tokens = burst
+  updated = now
+end
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return allowed
+"""
+
+    def __init__(self, url: str, prefix: str = "throttle:"):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for the shared rate limit backend") from e
+        self.prefix = prefix
+        self.redis = Redis.from_url(url)
+        self._script = self.redis.register_script(self.SCRIPT)
+
+    async def acquire(self, key: str, limit: RateLimit) -> bool:
+        allowed = await self._script(keys=[self.prefix + key], args=[limit.burst, limit.per_second, time.time()])
+        return bool(allowed)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Reject updates from users and chats that exceed their token bucket.
+
+    Register it as an inner middleware so only updates that matched a handler are
+    charged. Media messages are charged against the recognition limits, everything
+    else against the cheaper command limits. Rejected updates never reach the
+    handlers, so they cost no database or disk work; the user is told to slow down
+    at most once per ``notice_interval`` seconds, and rejected callback queries are
+    always answered.
+    """
+
+    def __init__(
+        self,
+        recognition_limit: RateLimit,
+        command_limit: RateLimit,
+        chat_factor: float = 3.0,
+        backend=None,
+        notice_interval: float = 30.0,
+    ):
+        self.limits = {
+            "recognition": (recognition_limit, recognition_limit.scaled(chat_factor)),
+            "command": (command_limit, command_limit.scaled(chat_factor)),
+        }
+        self.backend = backend or MemoryRateLimitBackend()
+        self.notice_interval = notice_interval
+        self.rejected = 0
+        self._noticed: dict[int, float] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        kind = (
+            "recognition"
+            if isinstance(event, Message) and event.content_type in RECOGNITION_CONTENT_TYPES
+            else "command"
+        )
+        user_limit, chat_limit = self.limits[kind]
+        allowed = await self.backend.acquire(f"{kind}:user:{user.id}", user_limit)
+        chat = data.get("event_chat")
+        if allowed and chat is not None and chat.id != user.id:
+            allowed = await self.backend.acquire(f"{kind}:chat:{chat.id}", chat_limit)
+        if allowed:
+            return await handler(event, data)
+
+        self.rejected += 1
+        await self._notify(event, user.id)
+        return None
+
+    async def _notify(self, event: TelegramObject, user_id: int) -> None:
+        now = time.monotonic()
+        notice = now - self._noticed.get(user_id, float("-inf")) >= self.notice_interval
+        if notice:
+            self._noticed[user_id] = now
+            if len(self._noticed) > 10_000:
+                self._noticed = {uid: t for uid, t in self._noticed.items() if now - t < self.notice_interval}
+        text = "🐢 Too many requests, please slow down and try again in a minute."
+        if isinstance(event, CallbackQuery):
+            # Every query needs an answer, otherwise the button keeps spinning
+            await event.answer(text if notice else None)
+        elif notice and isinstance(event, Message):
+            await event.answer(text)
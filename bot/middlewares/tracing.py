@@ -0,0 +1,28 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from bot.core.tracing import tracer
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Open a root span for every incoming Telegram update."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not tracer.enabled:
+            return await handler(event, data)
+        attributes = {}
+        if isinstance(event, Update):
+            attributes["telegram.update_id"] = event.update_id
+            attributes["telegram.update_type"] = event.event_type
+        user = data.get("event_from_user")
+        if user is not None:
+            attributes["telegram.user_id"] = user.id
+        with tracer.span("telegram.update", **attributes):
+            return await handler(event, data)
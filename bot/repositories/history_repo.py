@@ -1,20 +1,108 @@
-from models import HistoryModel
+import gzip
+import re
+from collections import Counter
+from pathlib import Path
+from typing import AsyncIterator
+
+from models import HistoryModel, SongModel, SongPlayCountModel
+from models.song import song_search_text
 import datetime
-from bot.core.database import sessionmaker
-from sqlalchemy import select
+from bot.core.database import dialect_insert, sessionmaker
+from bot.core.tracing import tracer
+from bot.repositories.stats_repo import add_user_stats, count_stats
+from sqlalchemy import func, insert, select, text, tuple_
+
+# Serialises history writers on PostgreSQL, where no unique key covers (user_id, song_id)
+HISTORY_WRITE_LOCK = 0x68697374
+PARTITION_NAME = re.compile(r"^history_y\d{4}m\d{2}$")
+
+
+@tracer.traced("repository.create_history")
+async def create_history(user_id, song_id) -> bool:
+    """Create one history record unless the user already has the song; returns whether it was created.
+
+    Goes through ``bulk_create_history``, which holds the write lock and counts the play and the user stats.
+    """
+    row = {"user_id": user_id, "song_id": song_id, "recognized_at": datetime.datetime.utcnow()}
+    return await bulk_create_history([row]) == 1
+
+
+def hour_bucket(moment: datetime.datetime) -> datetime.datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
 
 
-async def create_history(user_id, song_id):
-    """Create a new history record in the database."""
+@tracer.traced("repository.bulk_create_history")
+async def bulk_create_history(rows: list[dict]) -> int:
+    """Insert many history records at once, skipping pairs that already exist.
 
-    if await get_history_by_user_song(user_id, song_id):
-        return None
-    new_history = HistoryModel(user_id=user_id, song_id=song_id, recognized_at=datetime.datetime.utcnow())
+    The history is partitioned by month, so no unique constraint can reject a known (user, song)
+    pair: the pairs of the batch are looked up first and only the new ones are inserted, in one
+    transaction that holds an advisory lock on PostgreSQL so concurrent writers cannot both insert.
+
+    Every row, new or not, is also counted as a play in the hourly ``song_play_counts`` buckets
+    within the same transaction, and the rows actually inserted are added to the ``user_stats``
+    counters of their users.
+    """
+    if not rows:
+        return 0
     async with sessionmaker() as session:
         async with session.begin():
-            session.add(new_history)
+            if session.bind.dialect.name == "postgresql":
+                await session.execute(select(func.pg_advisory_xact_lock(HISTORY_WRITE_LOCK)))
+            pairs = {(row["user_id"], row["song_id"]) for row in rows}
+            result = await session.execute(
+                select(HistoryModel.user_id, HistoryModel.song_id).where(
+                    tuple_(HistoryModel.user_id, HistoryModel.song_id).in_(pairs)
+                )
+            )
+            known = {tuple(pair) for pair in result.all()}
+            new_rows = []
+            for row in rows:
+                pair = (row["user_id"], row["song_id"])
+                if pair not in known:
+                    known.add(pair)
+                    new_rows.append(row)
+            inserted = []
+            if new_rows:
+                stmt = (
+                    insert(HistoryModel)
+                    .values(new_rows)
+                    .returning(HistoryModel.user_id, HistoryModel.song_id, HistoryModel.recognized_at)
+                )
+                inserted = (await session.execute(stmt)).all()
+            await _count_plays(session, rows)
+            await _count_user_stats(session, inserted)
+    return len(inserted)
+
+
+async def _count_plays(session, rows: list[dict]) -> None:
+    plays = Counter((hour_bucket(row["recognized_at"]), row["song_id"]) for row in rows)
+    stmt = dialect_insert(session, SongPlayCountModel).values(
+        [{"bucket_start": bucket, "song_id": song_id, "count": count} for (bucket, song_id), count in plays.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SongPlayCountModel.bucket_start, SongPlayCountModel.song_id],
+        set_={"count": SongPlayCountModel.count + stmt.excluded.count},
+    )
+    await session.execute(stmt)
 
-    return new_history.id
+
+async def _count_user_stats(session, inserted: list[tuple]) -> None:
+    """Add (user_id, song_id, recognized_at) records to the users' rollups, reading each song once."""
+    if not inserted:
+        return
+    result = await session.execute(
+        select(SongModel.acrid, SongModel.artists, SongModel.genres).where(
+            SongModel.acrid.in_({song_id for _, song_id, _ in inserted})
+        )
+    )
+    songs = {acrid: (artists, genres) for acrid, artists, genres in result.all()}
+    await add_user_stats(
+        session,
+        count_stats(
+            (user_id, recognized_at, *songs.get(song_id, (None, None))) for user_id, song_id, recognized_at in inserted
+        ),
+    )
 
 
 async def get_history_by_user_id(user_id):
@@ -33,3 +121,140 @@ async def get_history_by_user_song(user_id, song_id):
         )
         history = result.scalars().first()
         return history
+
+
+async def stream_history(user_id: int, batch_size: int = 1000) -> AsyncIterator[list]:
+    """Yield a user's history joined with the songs, oldest first, in batches of ``batch_size`` rows.
+
+    The rows come from a server-side cursor as plain column tuples, so memory use depends on the batch
+    size and not on the length of the history.
+    """
+    async with sessionmaker() as session:
+        result = await session.stream(
+            select(
+                HistoryModel.recognized_at,
+                SongModel.acrid,
+                SongModel.title,
+                SongModel.artists,
+                SongModel.album,
+                SongModel.release_date,
+                SongModel.genres,
+                SongModel.duration,
+                SongModel.links,
+            )
+            .join(SongModel, SongModel.acrid == HistoryModel.song_id)
+            .where(HistoryModel.user_id == user_id)
+            .order_by(HistoryModel.recognized_at, HistoryModel.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for batch in result.partitions():
+            yield batch
+
+
+def _like_pattern(text: str) -> str:
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+@tracer.traced("repository.search_history")
+async def search_history(user_id: int, text: str, limit: int = 5, offset: int = 0) -> tuple[list[tuple], int]:
+    """Return one page of (history, song) pairs whose title or artists contain ``text``, and the total.
+
+    The total comes from a window count over the same query, so a page costs one round trip.
+    On PostgreSQL the ILIKE is answered by the pg_trgm index on ``song_search_text``.
+    """
+    async with sessionmaker() as session:
+        result = await session.execute(
+            select(HistoryModel, SongModel, func.count().over().label("total"))
+            .join(SongModel, SongModel.acrid == HistoryModel.song_id)
+            .where(HistoryModel.user_id == user_id, song_search_text.ilike(_like_pattern(text), escape="\\"))
+            .order_by(HistoryModel.recognized_at.desc(), HistoryModel.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        rows = result.all()
+    total = rows[0].total if rows else 0
+    return [(row.HistoryModel, row.SongModel) for row in rows], total
+
+
+def supports_partitions() -> bool:
+    """Whether the database this repository writes to holds monthly history partitions (PostgreSQL)."""
+    return sessionmaker.kw["bind"].dialect.name == "postgresql"
+
+
+def _partition_table(name: str) -> str:
+    # Partition names end up in DDL, where they cannot be bound as parameters
+    if not PARTITION_NAME.match(name):
+        raise ValueError(f"Not a history partition name: {name!r}")
+    return name
+
+
+async def history_partition_tables() -> dict[str, bool]:
+    """Monthly history tables by name, with whether each is still attached as a partition (PostgreSQL)."""
+    async with sessionmaker() as session:
+        result = await session.execute(
+            text(
+                "SELECT relname, relispartition FROM pg_class "
+                "WHERE relkind = 'r' AND relname ~ '^history_y[0-9]{4}m[0-9]{2}$' "
+                "AND relnamespace = current_schema()::regnamespace"
+            )
+        )
+        return {name: attached for name, attached in result.all()}
+
+
+@tracer.traced("repository.create_history_partition")
+async def create_history_partition(name: str, start: datetime.date, end: datetime.date) -> None:
+    """Create the partition of history holding the records from ``start`` up to ``end``."""
+    table = _partition_table(name)
+    async with sessionmaker() as session:
+        async with session.begin():
+            await session.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {table} PARTITION OF history "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                )
+            )
+
+
+@tracer.traced("repository.detach_history_partition")
+async def detach_history_partition(name: str, lock_timeout: str = "5s") -> None:
+    """Detach a partition, after which its records are no longer part of history."""
+    table = _partition_table(name)
+    async with sessionmaker() as session:
+        async with session.begin():
+            # Give up rather than queue every history query behind the exclusive lock
+            await session.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}'"))
+            await session.execute(text(f"ALTER TABLE history DETACH PARTITION {table}"))
+
+
+@tracer.traced("repository.archive_history_table")
+async def archive_history_table(name: str, path: Path) -> int:
+    """Write a (detached) monthly history table to ``path`` as gzipped CSV with COPY, returning the rows."""
+    table = _partition_table(name)
+    partial = path.with_name(path.name + ".part")
+    async with sessionmaker() as session:
+        connection = await session.connection()
+        driver = (await connection.get_raw_connection()).driver_connection
+        with gzip.open(partial, "wb") as archive:
+
+            async def write(chunk: bytes) -> None:
+                archive.write(chunk)
+
+            status = await driver.copy_from_table(
+                table,
+                columns=["id", "user_id", "song_id", "recognized_at"],
+                output=write,
+                format="csv",
+                header=True,
+            )
+    # Only complete archives carry the final name
+    partial.replace(path)
+    return int(status.rsplit(" ", 1)[-1])
+
+
+@tracer.traced("repository.drop_history_table")
+async def drop_history_table(name: str) -> None:
+    table = _partition_table(name)
+    async with sessionmaker() as session:
+        async with session.begin():
+            await session.execute(text(f"DROP TABLE {table}"))
@@ -1,37 +1,55 @@
-from sqlalchemy import select
+import datetime
+import json
 
-from bot.core.database import sessionmaker
+from sqlalchemy import exists, func, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+from bot.core.database import dialect_insert, sessionmaker
+from bot.core.tracing import tracer
 from models import SongModel
+from utils.card_cache import card_cache
+
+SONG_COLUMNS = ("title", "artists", "album", "release_date", "genres", "duration", "links", "acrid")
+JSON_COLUMNS = frozenset(("artists", "genres", "links"))
+# SQLite allows 32766 bound parameters per statement
+INSERT_CHUNK = 1000
 
 
+@tracer.traced("repository.create_song")
 async def create_song(
-    release_date: str,
+    release_date: datetime.date | None,
     title: str | None = None,
-    artists: dict | None = None,
+    artists: list[str] | None = None,
     album: str | None = None,
     duration_ms: int | None = None,
     links: dict | None = None,
-    genres: dict | None = None,
+    genres: list[str] | None = None,
     acrid: str | None = None,
 ) -> SongModel:
-    """Create a new song entry in the database."""
-
-    if await find_song_by_acrid(acrid):
-        return await find_song_by_acrid(acrid)
-    new_song = SongModel(
-        album=album,
-        title=title,
-        artists=artists,
-        links=links,
-        release_date=release_date,
-        genres=genres,
-        duration=duration_ms,
-        acrid=acrid,
-    )
+    """Create a new song entry in the database, or return the stored one with the same acrid.
+
+    Users coalesced on one recognition store the same song at the same moment, so the insert
+    skips an existing acrid rather than checking for it first.
+    """
     async with sessionmaker() as session:
         async with session.begin():
-            session.add(new_song)
-        return new_song
+            stmt = (
+                dialect_insert(session, SongModel)
+                .values(
+                    album=album,
+                    title=title,
+                    artists=artists,
+                    links=links,
+                    release_date=release_date,
+                    genres=genres,
+                    duration=duration_ms,
+                    acrid=acrid,
+                )
+                .on_conflict_do_nothing(index_elements=[SongModel.acrid])
+            )
+            await session.execute(stmt)
+            result = await session.execute(select(SongModel).where(SongModel.acrid == acrid))
+            return result.scalars().one()
 
 
 async def find_song_by_acrid(acrid: str) -> SongModel | None:
@@ -41,3 +59,107 @@ async def find_song_by_acrid(acrid: str) -> SongModel | None:
         song = result.scalars().first()
         print(song)
         return song
+
+
+def _has_name(session, column, name: str):
+    """Whether a JSON list of names contains ``name``; a GIN index lookup on PostgreSQL."""
+    if session.bind.dialect.name == "postgresql":
+        return type_coerce(column, JSONB).contains([name])
+    names = func.json_each(column).table_valued("value")
+    return exists(select(1).select_from(names).where(names.c.value == name))
+
+
+async def find_songs_by_artist(artist: str, limit: int = 50) -> list[SongModel]:
+    """Find songs with ``artist`` among their artists, newest releases first."""
+    async with sessionmaker() as session:
+        result = await session.execute(
+            select(SongModel)
+            .where(_has_name(session, SongModel.artists, artist))
+            .order_by(SongModel.release_date.desc(), SongModel.id)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+
+async def find_songs_by_genre(genre: str, limit: int = 50) -> list[SongModel]:
+    """Find songs of ``genre``, newest releases first."""
+    async with sessionmaker() as session:
+        result = await session.execute(
+            select(SongModel)
+            .where(_has_name(session, SongModel.genres, genre))
+            .order_by(SongModel.release_date.desc(), SongModel.id)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+
+def song_row(song_info: dict) -> dict:
+    """Turn a ``parse_song`` dict into a row of the songs table."""
+    row = {column: song_info.get(column) for column in SONG_COLUMNS}
+    row["duration"] = song_info.get("duration_ms")
+    return row
+
+
+@tracer.traced("repository.bulk_create_songs")
+async def bulk_create_songs(rows: list[dict], update: bool = False) -> int:
+    """Insert many songs rows, skipping (or with ``update`` overwriting) songs whose acrid exists.
+
+    On PostgreSQL the rows are streamed with COPY into a temporary staging table and moved into
+    ``songs`` with one INSERT ... SELECT; other databases get chunked multi-row INSERTs.
+    """
+    if not rows:
+        return 0
+    async with sessionmaker() as session:
+        async with session.begin():
+            if session.bind.dialect.name == "postgresql":
+                written = await _copy_songs(session, rows, update)
+            else:
+                written = 0
+                for start in range(0, len(rows), INSERT_CHUNK):
+                    stmt = dialect_insert(session, SongModel).values(rows[start : start + INSERT_CHUNK])
+                    if update:
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=[SongModel.acrid],
+                            set_={column: stmt.excluded[column] for column in SONG_COLUMNS if column != "acrid"},
+                        )
+                    else:
+                        stmt = stmt.on_conflict_do_nothing(index_elements=[SongModel.acrid])
+                    result = await session.execute(stmt)
+                    written += result.rowcount
+    if update:
+        # Core upserts bypass the ORM after_update listener that drops cached cards of changed songs
+        for row in rows:
+            card_cache.invalidate(row["acrid"])
+    return written
+
+
+async def _copy_songs(session, rows: list[dict], update: bool) -> int:
+    connection = await session.connection()
+    driver = (await connection.get_raw_connection()).driver_connection
+    columns = ", ".join(SONG_COLUMNS)
+    await driver.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS songs_import ON COMMIT DELETE ROWS AS SELECT {columns} FROM songs WITH NO DATA"
+    )
+    await driver.copy_records_to_table(
+        "songs_import",
+        records=[tuple(_copy_value(column, row[column]) for column in SONG_COLUMNS) for row in rows],
+        columns=SONG_COLUMNS,
+    )
+    if update:
+        assignments = ", ".join(f"{column} = EXCLUDED.{column}" for column in SONG_COLUMNS if column != "acrid")
+        conflict = f"DO UPDATE SET {assignments}"
+    else:
+        conflict = "DO NOTHING"
+    # A batch may carry the same acrid twice, ON CONFLICT DO UPDATE must not touch a row twice
+    status = await driver.execute(
+        f"INSERT INTO songs ({columns}) SELECT DISTINCT ON (acrid) {columns} FROM songs_import "
+        f"WHERE acrid IS NOT NULL ORDER BY acrid ON CONFLICT (acrid) {conflict}"
+    )
+    return int(status.rsplit(" ", 1)[-1])
+
+
+def _copy_value(column: str, value):
+    # asyncpg expects json as text, None stays SQL NULL
+    if column in JSON_COLUMNS and value is not None:
+        return json.dumps(value)
+    return value
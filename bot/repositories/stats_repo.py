@@ -0,0 +1,98 @@
+import datetime
+from collections import Counter
+
+from sqlalchemy import delete, func, select
+
+from bot.core.database import dialect_insert, sessionmaker
+from bot.core.tracing import tracer
+from models import HistoryModel, SongModel, SongPlayCountModel, UserStatModel
+from utils.helpers import name_list
+
+TOTAL, ARTIST, GENRE, MONTH = "total", "artist", "genre", "month"
+UPSERT_CHUNK = 1000
+
+
+@tracer.traced("repository.top_songs")
+async def top_songs(since: datetime.datetime, limit: int = 10) -> list[tuple[SongModel, int]]:
+    """Most recognised songs in the hourly buckets starting at or after ``since``, with their play counts."""
+    plays = func.sum(SongPlayCountModel.count).label("plays")
+    async with sessionmaker() as session:
+        result = await session.execute(
+            select(SongModel, plays)
+            .select_from(SongPlayCountModel)
+            .join(SongModel, SongModel.acrid == SongPlayCountModel.song_id)
+            .where(SongPlayCountModel.bucket_start >= since)
+            .group_by(SongModel.id)
+            .order_by(plays.desc(), SongModel.id)
+            .limit(limit)
+        )
+        return [(song, int(count)) for song, count in result.all()]
+
+
+async def prune_play_counts(before: datetime.datetime) -> int:
+    """Delete play count buckets older than ``before``."""
+    async with sessionmaker() as session:
+        async with session.begin():
+            result = await session.execute(delete(SongPlayCountModel).where(SongPlayCountModel.bucket_start < before))
+    return result.rowcount
+
+
+def stat_keys(recognized_at: datetime.datetime, artists, genres) -> set[tuple[str, str]]:
+    """The (kind, name) counters one history record adds to; an artist listed twice counts once."""
+    keys = {(TOTAL, ""), (MONTH, recognized_at.strftime("%Y-%m"))}
+    keys.update((ARTIST, name) for name in name_list(artists))
+    keys.update((GENRE, name) for name in name_list(genres))
+    return keys
+
+
+def count_stats(records) -> Counter:
+    """Count (user_id, kind, name) over (user_id, recognized_at, artists, genres) records."""
+    counts = Counter()
+    for user_id, recognized_at, artists, genres in records:
+        counts.update((user_id, kind, name) for kind, name in stat_keys(recognized_at, artists, genres))
+    return counts
+
+
+async def add_user_stats(session, counts: Counter) -> None:
+    """Add ``counts`` to the user_stats counters within the caller's transaction."""
+    # Sorted, so concurrent writers lock the rows in the same order
+    rows = [
+        {"user_id": user_id, "kind": kind, "name": name, "count": count}
+        for (user_id, kind, name), count in sorted(counts.items())
+    ]
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        stmt = dialect_insert(session, UserStatModel).values(rows[start : start + UPSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserStatModel.user_id, UserStatModel.kind, UserStatModel.name],
+            set_={"count": UserStatModel.count + stmt.excluded.count},
+        )
+        await session.execute(stmt)
+
+
+@tracer.traced("repository.get_user_stats")
+async def get_user_stats(user_id: int) -> dict[str, dict[str, int]]:
+    """All counters of a user as ``{kind: {name: count}}``."""
+    async with sessionmaker() as session:
+        result = await session.execute(
+            select(UserStatModel.kind, UserStatModel.name, UserStatModel.count).where(UserStatModel.user_id == user_id)
+        )
+        stats: dict[str, dict[str, int]] = {}
+        for kind, name, count in result.all():
+            stats.setdefault(kind, {})[name] = count
+    return stats
+
+
+@tracer.traced("repository.rebuild_user_stats")
+async def rebuild_user_stats(user_ids: list[int]) -> int:
+    """Recompute the counters of ``user_ids`` from their whole history, returning the records counted."""
+    async with sessionmaker() as session:
+        async with session.begin():
+            await session.execute(delete(UserStatModel).where(UserStatModel.user_id.in_(user_ids)))
+            result = await session.execute(
+                select(HistoryModel.user_id, HistoryModel.recognized_at, SongModel.artists, SongModel.genres)
+                .outerjoin(SongModel, SongModel.acrid == HistoryModel.song_id)
+                .where(HistoryModel.user_id.in_(user_ids))
+            )
+            records = result.all()
+            await add_user_stats(session, count_stats(records))
+    return len(records)
@@ -3,21 +3,23 @@ import datetime
 from sqlalchemy import select
 
 from models import UserModel
-from bot.core.database import sessionmaker
+from bot.core.database import dialect_insert, sessionmaker
 
 
 async def create_user(user_id: int, username: str | None) -> None:
-    """Create a new user in the database."""
-    if not await get_user_by_telegram_id(user_id):
+    """Create a new user in the database, or mark the stored one active again.
 
-        new_user = UserModel(
-            telegram_id=user_id, username=username, is_active=True, created_at=datetime.datetime.utcnow()
-        )
-        async with sessionmaker() as session:
-            async with session.begin():
-                session.add(new_user)
-    else:
-        await update_user_status(user_id, True)
+    Recognitions are persisted in the background, so two of them can create the same
+    user at once; the upsert lets the database settle that instead of checking first.
+    """
+    async with sessionmaker() as session:
+        async with session.begin():
+            stmt = (
+                dialect_insert(session, UserModel)
+                .values(telegram_id=user_id, username=username, is_active=True, created_at=datetime.datetime.utcnow())
+                .on_conflict_do_update(index_elements=[UserModel.telegram_id], set_={"is_active": True})
+            )
+            await session.execute(stmt)
 
 
 async def get_user_by_telegram_id(telegram_id: int) -> UserModel | None:
@@ -38,3 +40,10 @@ async def update_user_status(telegram_id: int, is_active: bool) -> None:
             if user:
                 user.is_active = is_active
                 session.add(user)
+
+
+async def get_user_ids() -> list[int]:
+    """Telegram IDs of every user, in ascending order."""
+    async with sessionmaker() as session:
+        result = await session.execute(select(UserModel.telegram_id).order_by(UserModel.telegram_id))
+        return list(result.scalars())
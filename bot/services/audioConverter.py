@@ -1,56 +1,134 @@
 import asyncio
 import logging
 import os
+from pathlib import Path
+from typing import ClassVar
 from bot.core.configure import settings
+from bot.core.tracing import tracer
+from bot.services.decoderPool import decoder_pool
+from bot.services.encodingProfiles import (
+    EncodingProfile,
+    copy_args,
+    ffmpeg_args,
+    get_profile,
+    passthrough_mode,
+    sniff_container,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class ConvertMusic:
+    # ffmpeg processes that are still running, killed on shutdown so they do not outlive the bot
+    _processes: ClassVar[set[asyncio.subprocess.Process]] = set()
+
     @staticmethod
-    async def convert(temp_file_path: str, mp3_file_path: str) -> str:
-        """Convert an audio file to MP3 format using FFmpeg."""
+    @tracer.traced("converter.convert")
+    async def convert(
+        temp_file_path: str,
+        output_path: str,
+        content_type: str | None = None,
+        profile: EncodingProfile | None = None,
+    ) -> str:
+        """Convert the start of a media file into a recognition clip using FFmpeg."""
+        profile = profile or get_profile(settings.ffmpeg_profile)
         try:
-            process = await asyncio.create_subprocess_exec(
-                "ffmpeg",
-                "-i",
-                temp_file_path,  # Input file
-                "-t",
-                "15",  # Limit duration to 15 seconds
-                "-ar",
-                "8000",  # Set sample rate to 8000 Hz
-                "-ac",
-                "1",  # Set mono channel
-                "-b:a",
-                "64k",  # Set bitrate to 64 kbps
-                mp3_file_path,  # Output file
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+            await ConvertMusic._run(
+                ffmpeg_args(temp_file_path, output_path, profile, content_type, settings.ffmpeg_threads)
             )
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
-                logger.error(f"FFmpeg conversion failed: {stderr.decode()}")
-                raise RuntimeError(f"FFmpeg conversion failed: {stderr.decode()}")
-            logger.info(f"File converted successfully: {mp3_file_path}")
-            return mp3_file_path
+            logger.info(f"File converted successfully: {output_path}")
+            return output_path
         except Exception as e:
             logger.error(f"Error during audio conversion: {e}")
             raise
 
     @staticmethod
-    async def save_and_convert_to_mp3(file_id: str, file_name: str, bot) -> str:
-        """Download a file and convert it to MP3 format."""
-        temp_file_path = str(settings.DOWNLOADS_DIR / file_name)
+    @tracer.traced("converter.copy_audio")
+    async def copy_audio(temp_file_path: str, output_path: str) -> str:
+        """Cut the start of the audio track out of a media file without re-encoding it."""
+        await ConvertMusic._run(copy_args(temp_file_path, output_path, settings.ffmpeg_threads))
+        logger.info(f"Audio track copied: {output_path}")
+        return output_path
+
+    @staticmethod
+    async def _run(args: list[str]) -> None:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        ConvertMusic._processes.add(process)
+        try:
+            stdout, stderr = await process.communicate()
+        finally:
+            ConvertMusic._processes.discard(process)
+            if process.returncode is None:
+                # Cancelled while ffmpeg was still working
+                process.kill()
+        if process.returncode != 0:
+            logger.error(f"FFmpeg conversion failed: {stderr.decode()}")
+            raise RuntimeError(f"FFmpeg conversion failed: {stderr.decode()}")
+
+    @staticmethod
+    async def kill_running(timeout: float = 5.0) -> int:
+        """Kill every ffmpeg process still running and return how many there were."""
+        processes = [process for process in ConvertMusic._processes if process.returncode is None]
+        for process in processes:
+            process.kill()
+        if processes:
+            await asyncio.wait([asyncio.ensure_future(process.wait()) for process in processes], timeout=timeout)
+        return len(processes)
+
+    @staticmethod
+    @tracer.traced("converter.save_and_convert")
+    async def save_and_convert(
+        file_id: str,
+        file_name: str,
+        bot,
+        progress=None,
+        directory: Path | None = None,
+        content_type: str | None = None,
+        mime_type: str | None = None,
+    ) -> str:
+        """Download a file into ``directory`` (the downloads directory by default) and convert it for recognition.
+
+        Files ACRCloud can read as they are are returned without running ffmpeg, and the
+        audio of videos is stream-copied when possible; everything else is transcoded
+        with the configured encoding profile.
+        """
+        directory = directory or settings.DOWNLOADS_DIR
+        temp_file_path = str(directory / file_name)
+        keep_download = False
         try:
             file_path = await bot.get_file(file_id)
             await bot.download_file(file_path.file_path, destination=temp_file_path)
-            mp3_file_path = str(settings.DOWNLOADS_DIR / f"{file_name}.mp3")
-            await ConvertMusic.convert(temp_file_path, mp3_file_path)
-            return mp3_file_path
+            mode = None
+            if settings.ffmpeg_passthrough:
+                # A dozen bytes from a file that was just written, not worth a thread
+                with open(temp_file_path, "rb") as file:
+                    mode = passthrough_mode(content_type, mime_type, sniff_container(file.read(12)))
+            if mode == "direct":
+                logger.info(f"Passing {temp_file_path} ({mime_type or content_type}) to recognition as it is")
+                keep_download = True
+                return temp_file_path
+            if progress is not None:
+                await progress.stage("converting")
+            if mode == "copy":
+                try:
+                    return await ConvertMusic.copy_audio(temp_file_path, str(directory / f"{file_name}.m4a"))
+                except RuntimeError:
+                    logger.warning(f"Stream copy of {temp_file_path} failed, transcoding instead")
+            if settings.converter_backend == "pool":
+                # The worker pool always writes PCM WAV
+                return await decoder_pool.decode(temp_file_path, str(directory / f"{file_name}.wav"))
+            profile = get_profile(settings.ffmpeg_profile)
+            output_path = str(directory / f"{file_name}.{profile.extension}")
+            await ConvertMusic.convert(temp_file_path, output_path, content_type, profile)
+            return output_path
         except Exception as e:
             logger.error(f"Error during file processing: {e}")
             raise
         finally:
-            if os.path.exists(temp_file_path):
+            if not keep_download and os.path.exists(temp_file_path):
                 os.remove(temp_file_path)
                 logger.info(f"Temporary file removed: {temp_file_path}")
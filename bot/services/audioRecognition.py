@@ -5,6 +5,7 @@ import os
 import audioread
 from acrcloud.recognizer import ACRCloudRecognizer
 from bot.core.configure import settings
+from bot.core.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,7 @@ class AudioRecognition:
         logger.info(f"ACRCloud API response: {result}")
         return result
 
+    @tracer.traced("acrcloud.recognize_audio")
     async def recognize_audio_async(self, file_path: str) -> dict:
         response = await asyncio.to_thread(self.recognize_audio, file_path)
         return json.loads(response)
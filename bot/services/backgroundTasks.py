@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from typing import Coroutine
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTasks:
+    """Keep references to fire-and-forget tasks, report their failures and drain them on shutdown."""
+
+    def __init__(self):
+        self._tasks: set[asyncio.Task] = set()
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def spawn(self, coro: Coroutine, name: str | None = None) -> asyncio.Task:
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            logger.warning(f"Background task {task.get_name()} was cancelled")
+            return
+        exc = task.exception()
+        if exc is not None:
+            self.failed += 1
+            logger.error(f"Background task {task.get_name()} failed: {exc!r}", exc_info=exc)
+
+    async def drain(self, timeout: float | None = 30.0) -> None:
+        """Wait for running tasks, cancelling whatever is left after the timeout."""
+        while self._tasks:
+            done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            if pending:
+                logger.warning(f"Cancelling {len(pending)} background tasks still running after {timeout}s")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                return
+
+
+background_tasks = BackgroundTasks()
@@ -0,0 +1,172 @@
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from bot.core.configure import settings
+from bot.core.tracing import tracer
+from bot.services.encodingProfiles import CLIP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 8000
+
+
+def decode_pcm(input_path: str, seconds: int = CLIP_SECONDS, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Decode the start of the first audio stream into mono 16-bit PCM."""
+    import av
+
+    chunks = []
+    remaining = seconds * sample_rate
+    with av.open(input_path) as container:
+        if not container.streams.audio:
+            raise RuntimeError(f"No audio stream in {input_path}")
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+
+        def take(frames) -> int:
+            nonlocal remaining
+            for frame in frames:
+                samples = min(frame.samples, remaining)
+                # Planes can be padded past the last sample
+                chunks.append(bytes(frame.planes[0])[: samples * 2])
+                remaining -= samples
+            return remaining
+
+        for frame in container.decode(stream):
+            if take(resampler.resample(frame)) <= 0:
+                break
+        else:
+            take(resampler.resample(None))
+    return b"".join(chunks)
+
+
+def decode_clip(input_path: str, output_path: str, seconds: int = CLIP_SECONDS, sample_rate: int = SAMPLE_RATE) -> str:
+    """Decode the start of the first audio stream into a mono 16-bit PCM WAV file; runs inside a pool worker."""
+    data = decode_pcm(input_path, seconds, sample_rate)
+    with wave.open(output_path, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(sample_rate)
+        output.writeframes(data)
+    return output_path
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class DecoderPool:
+    """Warm worker processes decoding media with PyAV, so a job does not pay for starting ffmpeg."""
+
+    def __init__(
+        self, workers: int = 2, max_jobs_per_worker: int = 200, timeout: float = 30.0, health_interval: float = 60.0
+    ):
+        self.workers = workers
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.jobs = 0
+        self.failures = 0
+        self.restarts = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._restart_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec("av") is not None
+
+    async def start(self) -> None:
+        """Start the workers and wait until every one of them answers."""
+        if not self.available():
+            raise RuntimeError("The av package is required for the pool converter backend")
+        if self._executor is None:
+            self._executor = self._create_executor()
+        await self.health_check()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="decoder-pool-health")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    async def health_check(self) -> bool:
+        """Liveness ping of the pool, restarting it if the pings are not answered in time.
+
+        As many pings as workers are sent, but the executor may hand several of them to the same
+        process, so a stuck worker is only noticed once the jobs queued behind it time out.
+        """
+        executor = self._executor
+        try:
+            await asyncio.wait_for(asyncio.gather(*(self._submit(_ping) for _ in range(self.workers))), self.timeout)
+            return True
+        except (BrokenProcessPool, asyncio.TimeoutError) as e:
+            logger.error(f"Decoder pool failed its health check ({e!r}), restarting it")
+            await self._restart(executor)
+            return False
+
+    @tracer.traced("converter.decode")
+    async def decode(self, input_path: str, output_path: str) -> str:
+        """Decode the start of ``input_path`` into a PCM WAV clip at ``output_path``."""
+        self.jobs += 1
+        executor = self._executor
+        try:
+            return await asyncio.wait_for(self._submit(decode_clip, input_path, output_path), self.timeout)
+        except (BrokenProcessPool, asyncio.TimeoutError) as e:
+            # A crashed or stuck worker takes the pool, and every decode running on it, down with it
+            self.failures += 1
+            await self._restart(executor)
+            raise RuntimeError(f"Decoding {input_path} failed: {e!r}") from e
+        except Exception:
+            self.failures += 1
+            raise
+
+    def _submit(self, fn, *args) -> asyncio.Future:
+        if self._executor is None:
+            raise RuntimeError("The decoder pool is not running")
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _restart(self, broken: ProcessPoolExecutor | None) -> None:
+        """Replace the executor ``broken`` failed on, unless a concurrent failure or stop already did."""
+        async with self._restart_lock:
+            if broken is None or self._executor is not broken:
+                return
+            # New jobs go to the fresh pool while the old one is torn down
+            self._executor = self._create_executor()
+            self.restarts += 1
+        # ProcessPoolExecutor cannot kill a single stuck worker, so all of them go
+        for process in list(getattr(broken, "_processes", {}).values()):
+            process.kill()
+        await asyncio.to_thread(broken.shutdown, True, cancel_futures=True)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # Workers are recycled after max_jobs_per_worker jobs, which needs a start method other than fork
+        return ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=self.max_jobs_per_worker,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.health_check()
+
+    def stats(self) -> dict:
+        return {"jobs": self.jobs, "failures": self.failures, "restarts": self.restarts}
+
+
+decoder_pool = DecoderPool(settings.converter_workers, settings.converter_jobs_per_worker)
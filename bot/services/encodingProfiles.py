@@ -0,0 +1,150 @@
+from typing import NamedTuple
+
+# ACRCloud fingerprints a few seconds of audio, so only this much of the input is converted
+CLIP_SECONDS = 15
+
+
+class EncodingProfile(NamedTuple):
+    """How ffmpeg encodes the clip that is sent for recognition."""
+
+    name: str
+    extension: str
+    codec_args: tuple[str, ...]
+    # Inputs already encoded the way this profile wants are stream-copied instead of re-encoded
+    copy_content_types: frozenset[str] = frozenset()
+
+
+PROFILES = {
+    # Raw PCM costs no encoding CPU at all and is what the fingerprinting decodes to anyway
+    "wav": EncodingProfile("wav", "wav", ("-c:a", "pcm_s16le", "-ar", "8000", "-ac", "1")),
+    "mp3": EncodingProfile("mp3", "mp3", ("-c:a", "libmp3lame", "-ar", "8000", "-ac", "1", "-b:a", "64k")),
+    # Voice notes are Opus in OGG already, only other inputs are encoded
+    "opus": EncodingProfile(
+        "opus",
+        "ogg",
+        ("-c:a", "libopus", "-ar", "16000", "-ac", "1", "-b:a", "24k", "-application", "audio"),
+        frozenset({"voice"}),
+    ),
+}
+
+# Demuxer hints per Telegram content type, so ffmpeg does not spend time probing inputs of known shape
+INPUT_ARGS = {
+    "voice": ("-f", "ogg", "-probesize", "32768", "-analyzeduration", "0"),
+    "video_note": ("-f", "mov"),
+    "video": ("-probesize", "1000000", "-analyzeduration", "1000000"),
+    "audio": (),
+}
+
+
+# Containers ACRCloud reads as they are, keyed by the mime type Telegram reports
+DIRECT_MIME_TYPES = {
+    "audio/ogg": "ogg",
+    "audio/opus": "ogg",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/flac": "flac",
+    "audio/x-flac": "flac",
+    "audio/mp4": "mp4",
+    "audio/x-m4a": "mp4",
+    "audio/m4a": "mp4",
+}
+# Telegram leaves out the mime type for these, their container is fixed
+DEFAULT_MIME_TYPES = {"voice": "audio/ogg", "video_note": "video/mp4"}
+# Videos whose audio track can be cut out without decoding it
+COPY_CONTENT_TYPES = frozenset({"video", "video_note"})
+
+
+def sniff_container(header: bytes) -> str | None:
+    """Recognise the container from the first bytes of a file."""
+    if header.startswith(b"OggS"):
+        return "ogg"
+    if header.startswith(b"fLaC"):
+        return "flac"
+    if header.startswith(b"RIFF") and header[8:12] == b"WAVE":
+        return "wav"
+    if header[4:8] == b"ftyp":
+        return "mp4"
+    if header.startswith(b"ID3") or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def passthrough_mode(content_type: str | None, mime_type: str | None, container: str | None) -> str | None:
+    """Decide how a download can skip transcoding.
+
+    Returns ``"direct"`` when the file can be recognised as it is, ``"copy"`` when its audio
+    track can be stream-copied out of a video, or None when it has to be transcoded. The
+    sniffed container must agree with the mime type, so a mislabelled file is transcoded.
+    """
+    if container is None:
+        return None
+    mime_type = mime_type or DEFAULT_MIME_TYPES.get(content_type or "")
+    if DIRECT_MIME_TYPES.get(mime_type or "") == container:
+        return "direct"
+    if content_type in COPY_CONTENT_TYPES and container == "mp4":
+        return "copy"
+    return None
+
+
+def get_profile(name: str) -> EncodingProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown encoding profile {name!r}, expected one of {', '.join(PROFILES)}") from None
+
+
+def ffmpeg_args(
+    input_path: str, output_path: str, profile: EncodingProfile, content_type: str | None = None, threads: int = 1
+) -> list[str]:
+    """Build the ffmpeg command line converting ``input_path`` into a recognition clip."""
+    if content_type is not None and content_type in profile.copy_content_types:
+        codec_args: tuple[str, ...] = ("-c:a", "copy")
+    else:
+        codec_args = profile.codec_args
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-nostdin",
+        "-threads",
+        str(threads),
+        *INPUT_ARGS.get(content_type or "", ()),
+        "-i",
+        input_path,
+        # Skip video, subtitle and data streams entirely instead of decoding them
+        "-vn",
+        "-sn",
+        "-dn",
+        "-t",
+        str(CLIP_SECONDS),
+        *codec_args,
+        "-y",
+        output_path,
+    ]
+
+
+def copy_args(input_path: str, output_path: str, threads: int = 1) -> list[str]:
+    """Build the ffmpeg command line cutting the audio track of ``input_path`` without re-encoding it."""
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-nostdin",
+        "-threads",
+        str(threads),
+        "-i",
+        input_path,
+        "-vn",
+        "-sn",
+        "-dn",
+        "-t",
+        str(CLIP_SECONDS),
+        "-c:a",
+        "copy",
+        "-y",
+        output_path,
+    ]
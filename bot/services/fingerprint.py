@@ -0,0 +1,95 @@
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 8000
+WINDOW = 1024
+HOP = 256
+# Peaks must be the loudest point in a (frames x bins) neighbourhood of this size
+NEIGHBOURHOOD = (15, 21)
+PEAKS_PER_SECOND = 30
+# Each anchor peak is paired with up to FAN_OUT later peaks at most MAX_DT frames ahead
+FAN_OUT = 10
+MAX_DT = 63
+FRAME_SECONDS = HOP / SAMPLE_RATE
+
+_hann = np.hanning(WINDOW).astype(np.float32)
+
+
+def read_wav(path: str) -> np.ndarray | None:
+    """Read a 16-bit PCM WAV file as mono float samples at SAMPLE_RATE, or None if it is not one."""
+    try:
+        with wave.open(path, "rb") as clip:
+            if clip.getsampwidth() != 2:
+                return None
+            channels = clip.getnchannels()
+            rate = clip.getframerate()
+            samples = np.frombuffer(clip.readframes(clip.getnframes()), dtype="<i2").astype(np.float32)
+    except (wave.Error, EOFError):
+        return None
+    if channels > 1:
+        samples = samples[: len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE and len(samples):
+        # Linear interpolation is crude, but the peaks we hash survive it
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples / 32768.0
+
+
+def read_pcm(data: bytes) -> np.ndarray:
+    """Turn mono 16-bit PCM at SAMPLE_RATE into float samples."""
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def spectrogram(samples: np.ndarray) -> np.ndarray:
+    """Log-magnitude spectrogram with one row per frame."""
+    if len(samples) < WINDOW:
+        return np.empty((0, WINDOW // 2 + 1), dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, WINDOW)[::HOP] * _hann
+    return np.log1p(np.abs(np.fft.rfft(frames, axis=1))).astype(np.float32)
+
+
+def _max_filter(values: np.ndarray, size: int, axis: int) -> np.ndarray:
+    result = values.copy()
+    for shift in range(1, size // 2 + 1):
+        for direction in (shift, -shift):
+            rolled = np.roll(values, direction, axis=axis)
+            # Values rolled in from the other edge must not count
+            edge = [slice(None)] * values.ndim
+            edge[axis] = slice(0, direction) if direction > 0 else slice(direction, None)
+            rolled[tuple(edge)] = -np.inf
+            np.maximum(result, rolled, out=result)
+    return result
+
+
+def find_peaks(spec: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return (frame, bin) of the strongest local maxima, ordered by frame."""
+    if not spec.size:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    local_max = _max_filter(_max_filter(spec, NEIGHBOURHOOD[0], 0), NEIGHBOURHOOD[1], 1)
+    frames, bins = np.nonzero((spec == local_max) & (spec > spec.mean()))
+    limit = max(1, int(spec.shape[0] * FRAME_SECONDS * PEAKS_PER_SECOND))
+    if len(frames) > limit:
+        strongest = np.argpartition(spec[frames, bins], -limit)[-limit:]
+        frames, bins = frames[strongest], bins[strongest]
+    order = np.lexsort((bins, frames))
+    return frames[order], bins[order]
+
+
+def fingerprint(samples: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Hash pairs of spectral peaks into (hashes, anchor frames), both uint32.
+
+    A hash packs the anchor bin, the target bin and their distance in frames, so it
+    does not depend on where in the recording the clip starts.
+    """
+    frames, bins = find_peaks(spectrogram(samples))
+    hashes, offsets = [], []
+    for step in range(1, FAN_OUT + 1):
+        anchor_frames, target_frames = frames[:-step], frames[step:]
+        dt = target_frames - anchor_frames
+        keep = (dt > 0) & (dt <= MAX_DT)
+        hashes.append((bins[:-step][keep] << 16) | (bins[step:][keep] << 6) | dt[keep])
+        offsets.append(anchor_frames[keep])
+    if not hashes:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint32)
+    return np.concatenate(hashes).astype(np.uint32), np.concatenate(offsets).astype(np.uint32)
@@ -0,0 +1,101 @@
+import asyncio
+import datetime
+import logging
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from bot.core.configure import settings
+from bot.repositories.history_repo import bulk_create_history
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the database could not be reached rather than that a record is bad
+UNAVAILABLE_ERRORS = (ConnectionError, OSError, asyncio.TimeoutError, InterfaceError, OperationalError)
+
+
+class HistoryWriteBuffer:
+    """Collect history inserts and write them in batches from a background task."""
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: list[dict] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, user_id: int, song_id: str) -> None:
+        """Queue a history record; it is written on the next flush."""
+        self._pending.append({"user_id": user_id, "song_id": song_id, "recognized_at": datetime.datetime.utcnow()})
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="history-write-buffer")
+
+    async def stop(self) -> None:
+        """Stop the background task and drain everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            if not await self.flush():
+                # Nothing is left to retry them once the process exits
+                logger.error(f"History database unavailable at shutdown, dropping {len(self._pending)} records")
+                self._pending.clear()
+                break
+
+    async def flush(self) -> bool:
+        """Write one batch of queued records; returns False if it had to be put back.
+
+        A failing batch is retried row by row so a single bad record does not block
+        the rest; records that fail on their own are logged and dropped. Records are
+        only put back when the database cannot be reached.
+        """
+        async with self._flush_lock:
+            rows, self._pending = self._pending[: self.batch_size], self._pending[self.batch_size :]
+            if not rows:
+                return True
+            unique_rows = list({(row["user_id"], row["song_id"]): row for row in rows}.values())
+            try:
+                inserted = await bulk_create_history(unique_rows)
+                logger.info(f"Flushed {len(unique_rows)} history records, {inserted} new")
+                return True
+            except UNAVAILABLE_ERRORS as e:
+                logger.error(f"History database unavailable, keeping {len(unique_rows)} records: {e}")
+                self._pending[:0] = unique_rows
+                return False
+            except Exception as e:
+                logger.error(f"Batched history write failed, retrying row by row: {e}")
+            for index, row in enumerate(unique_rows):
+                try:
+                    await bulk_create_history([row])
+                except UNAVAILABLE_ERRORS as e:
+                    logger.error(f"History database unavailable, keeping {len(unique_rows) - index} records: {e}")
+                    self._pending[:0] = unique_rows[index:]
+                    return False
+                except Exception as e:
+                    logger.error(f"Dropping history record {row}: {e}")
+            return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # Keep going while a full batch is queued, a burst must not wait an interval per batch
+            while await self.flush() and len(self._pending) >= self.batch_size:
+                pass
+
+
+history_buffer = HistoryWriteBuffer(settings.history_batch_size, settings.history_flush_interval)
@@ -0,0 +1,108 @@
+import csv
+import datetime
+import io
+import json
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
+
+from aiogram.types import InputFile
+
+from bot.core.configure import settings
+from bot.repositories.history_repo import stream_history
+from utils.helpers import name_list
+
+EXPORT_FORMATS = ("csv", "json")
+CSV_COLUMNS = [
+    "recognized_at",
+    "title",
+    "artists",
+    "album",
+    "release_date",
+    "genres",
+    "duration_ms",
+    "acrid",
+    "spotify",
+    "deezer",
+    "youtube",
+]
+# Largest document a bot may upload through the Bot API
+MAX_DOCUMENT_BYTES = 50 * 1024 * 1024
+
+
+def export_record(row) -> dict:
+    """One history row as a JSON-serialisable dict."""
+    return {
+        "recognized_at": row.recognized_at.isoformat(),
+        "title": row.title,
+        "artists": name_list(row.artists),
+        "album": row.album,
+        "release_date": row.release_date.isoformat() if row.release_date else None,
+        "genres": name_list(row.genres),
+        "duration_ms": row.duration,
+        "acrid": row.acrid,
+        "links": row.links or {},
+    }
+
+
+def csv_record(record: dict) -> list:
+    links = record.pop("links")
+    record["artists"] = "; ".join(record["artists"])
+    record["genres"] = "; ".join(record["genres"])
+    return [*record.values(), *(links.get(platform) for platform in CSV_COLUMNS[-3:])]
+
+
+class HistoryExport(InputFile):
+    """A finished export held in a spooled temporary file, uploaded in chunks straight from it."""
+
+    def __init__(self, file, filename: str, rows: int):
+        super().__init__(filename=filename)
+        self.file = file
+        self.rows = rows
+        self.size = file.tell()
+
+    async def read(self, bot) -> AsyncGenerator[bytes, None]:
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+
+class HistoryExporter:
+    """Write a user's history as CSV or JSON lines, batch by batch from a server-side cursor.
+
+    Batches are encoded into a ``SpooledTemporaryFile`` that stays in memory up to ``spool_bytes`` and
+    moves to disk beyond, so neither the rows nor the encoded export are ever held in memory whole.
+    """
+
+    def __init__(self, batch_size: int = 1000, spool_bytes: int = 1024 * 1024):
+        self.batch_size = batch_size
+        self.spool_bytes = spool_bytes
+
+    @asynccontextmanager
+    async def export(self, user_id: int, export_format: str) -> AsyncIterator[HistoryExport]:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {export_format!r}")
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_bytes) as file:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if export_format == "csv":
+                writer.writerow(CSV_COLUMNS)
+            rows = 0
+            async for batch in stream_history(user_id, self.batch_size):
+                for row in batch:
+                    record = export_record(row)
+                    if export_format == "csv":
+                        writer.writerow(csv_record(record))
+                    else:
+                        buffer.write(json.dumps(record, ensure_ascii=False) + "\n")
+                rows += len(batch)
+                file.write(buffer.getvalue().encode("utf-8"))
+                buffer.seek(0)
+                buffer.truncate()
+            file.write(buffer.getvalue().encode("utf-8"))
+            extension = "csv" if export_format == "csv" else "jsonl"
+            filename = f"history-{datetime.datetime.utcnow():%Y%m%d}.{extension}"
+            yield HistoryExport(file, filename, rows)
+
+
+history_exporter = HistoryExporter(settings.export_batch_size, settings.export_spool_kb * 1024)
@@ -0,0 +1,118 @@
+import asyncio
+import datetime
+import logging
+from pathlib import Path
+
+from bot.core.configure import settings
+from bot.repositories.history_repo import (
+    PARTITION_NAME,
+    archive_history_table,
+    create_history_partition,
+    detach_history_partition,
+    drop_history_table,
+    history_partition_tables,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(moment: datetime.date) -> datetime.date:
+    return datetime.date(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"history_y{month:%Y}m{month:%m}"
+
+
+def partition_month(name: str) -> datetime.date | None:
+    if not PARTITION_NAME.match(name):
+        return None
+    return datetime.date(int(name[9:13]), int(name[14:16]), 1)
+
+
+class HistoryPartitions:
+    """Create the monthly partitions of the history table ahead of time and archive those past retention.
+
+    Records of a month without a partition land in ``history_default``, which then blocks creating that
+    partition, so the bot keeps ``months_ahead`` months of partitions ready. Retention is applied by
+    ``bot.cli.history_retention``: expired partitions are detached, exported to gzipped CSV and dropped,
+    which costs no row-by-row DELETE and leaves no bloat for vacuum.
+    """
+
+    def __init__(self, archive_dir: Path, months_ahead: int = 3, retention_months: int = 0, interval: float = 3600.0):
+        self.archive_dir = archive_dir
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def ensure_ahead(self, today: datetime.date | None = None) -> list[str]:
+        """Create the partitions of the current and the next ``months_ahead`` months that are missing."""
+        month = month_start(today or datetime.datetime.utcnow().date())
+        tables = await history_partition_tables()
+        created = []
+        for offset in range(self.months_ahead + 1):
+            start = add_months(month, offset)
+            name = partition_name(start)
+            if name not in tables:
+                await create_history_partition(name, start, add_months(start, 1))
+                created.append(name)
+        if created:
+            logger.info(f"Created history partitions {', '.join(created)}")
+        return created
+
+    def expired(self, tables, today: datetime.date) -> list[str]:
+        """Monthly tables older than the retention period, oldest first."""
+        if self.retention_months <= 0:
+            return []
+        cutoff = add_months(month_start(today), -self.retention_months)
+        return sorted(name for name in tables if partition_month(name) < cutoff)
+
+    async def archive_expired(self, today: datetime.date | None = None, dry_run: bool = False) -> list[str]:
+        """Detach, archive and drop the partitions past retention, returning their names."""
+        tables = await history_partition_tables()
+        expired = self.expired(tables, today or datetime.datetime.utcnow().date())
+        if dry_run:
+            return expired
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        for name in expired:
+            # A table left detached by an interrupted run is archived without detaching it again
+            if tables[name]:
+                await detach_history_partition(name)
+            rows = await archive_history_table(name, self.archive_dir / f"{name}.csv.gz")
+            await drop_history_table(name)
+            logger.info(f"Archived {rows} history records of {name}")
+        return expired
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="history-partitions")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.ensure_ahead()
+            except Exception as e:
+                logger.error(f"Creating history partitions failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+history_partitions = HistoryPartitions(
+    Path(settings.history_archive_dir) if settings.history_archive_dir else settings.HISTORY_ARCHIVE_DIR,
+    settings.history_partitions_ahead,
+    settings.history_retention_months,
+)
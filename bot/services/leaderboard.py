@@ -0,0 +1,87 @@
+import asyncio
+import datetime
+import logging
+
+from bot.core.configure import settings
+from bot.repositories.stats_repo import prune_play_counts, top_songs
+from utils.helpers import safe_artists
+from utils.telegram_formatter import escape_markdown
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {
+    "hour": ("this hour", datetime.timedelta(hours=1)),
+    "day": ("today", datetime.timedelta(days=1)),
+    "week": ("this week", datetime.timedelta(weeks=1)),
+}
+
+
+class Leaderboard:
+    """Most recognised songs per period, rendered from the hourly play counts on an interval.
+
+    ``/top`` is answered from the rendered text, so it costs the same however long the history is.
+    """
+
+    def __init__(self, size: int = 10, refresh_interval: float = 60.0):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.refreshed_at: datetime.datetime | None = None
+        self._texts: dict[str, str] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def text(self, period: str) -> str:
+        if period not in self._texts:
+            # Before the first refresh, or while the background task is not running
+            await self.refresh()
+        return self._texts[period]
+
+    async def refresh(self) -> None:
+        async with self._refresh_lock:
+            now = datetime.datetime.utcnow()
+            # Every period ends with the bucket of the current, partial hour
+            current_bucket = now.replace(minute=0, second=0, microsecond=0)
+            texts = {}
+            for period, (label, length) in PERIODS.items():
+                songs = await top_songs(current_bucket - length + datetime.timedelta(hours=1), self.size)
+                texts[period] = self.render(label, songs)
+            self._texts = texts
+            self.refreshed_at = now
+
+    @staticmethod
+    def render(label: str, songs: list) -> str:
+        if not songs:
+            return f"🔥 *Top songs {label}*\n\nNothing has been recognised yet."
+        lines = [f"🔥 *Top songs {label}*\n"]
+        for position, (song, plays) in enumerate(songs, start=1):
+            lines.append(
+                f"{position}. {escape_markdown(song.title)} — {escape_markdown(safe_artists(song.artists))} ({plays})"
+            )
+        return "\n".join(lines)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="leaderboard-refresh")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                # Buckets older than the longest period are never read again
+                oldest = self.refreshed_at - max(length for _, length in PERIODS.values()) - datetime.timedelta(hours=1)
+                await prune_play_counts(oldest)
+            except Exception as e:
+                logger.error(f"Leaderboard refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+leaderboard = Leaderboard(settings.leaderboard_size, settings.leaderboard_refresh_interval)
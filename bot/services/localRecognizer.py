@@ -0,0 +1,342 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from bot.core.configure import settings
+from bot.core.tracing import tracer
+from bot.services.decoderPool import DecoderPool, decode_pcm
+from bot.services.fingerprint import fingerprint, read_pcm, read_wav
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows, a single bot process per index directory
+    fcntl = None
+
+MANIFEST = "manifest.json"
+POSTING_DTYPE = np.dtype([("hash", "<u4"), ("song", "<u4"), ("offset", "<u4")])
+
+
+class FingerprintIndex:
+    """Inverted index from fingerprint hash to (song, offset) postings, stored as memory-mapped segments.
+
+    Every segment is a ``.npy`` array of postings sorted by hash, opened read-only with ``mmap_mode="r"``
+    so bot processes sharing the directory share one copy in the page cache. ``manifest.json`` lists the
+    songs and the live segments. ``save`` appends learned postings as a new segment, or merges them with
+    all segments into one once there are ``max_segments``. Segments are never modified in place and the
+    manifest is replaced atomically, so readers always see a consistent index.
+    """
+
+    def __init__(self, directory: Path | None = None, max_segments: int = 8):
+        self.directory = directory
+        self.max_segments = max_segments
+        self.acrids: list[str] = []
+        self._song_ids: dict[str, int] = {}
+        self._segments: dict[str, np.ndarray] = {}
+        self._manifest_mtime: int | None = None
+        # Postings learned since the last save, one array sorted by hash per clip
+        self._pending: list[np.ndarray] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self._segments.values()) + sum(
+            len(postings) for postings in self._pending
+        )
+
+    @property
+    def segments(self) -> list[str]:
+        return list(self._segments)
+
+    def load(self) -> None:
+        """Open the segments listed in the manifest, if it changed since the last call."""
+        if self.directory is None:
+            return
+        try:
+            mtime = (self.directory / MANIFEST).stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+        manifest = self._read_manifest()
+        self._adopt(manifest["songs"], self._open(manifest["segments"]))
+        self._manifest_mtime = mtime
+
+    def add(self, acrid: str, hashes: np.ndarray, offsets: np.ndarray) -> None:
+        postings = np.empty(len(hashes), dtype=POSTING_DTYPE)
+        postings["hash"] = hashes
+        postings["offset"] = offsets
+        # Only the clip itself is sorted, lookup searches every pending clip on its own
+        postings = _sort_postings(postings)
+        with self._lock:
+            song = self._song_ids.get(acrid)
+            if song is None:
+                song = self._song_ids[acrid] = len(self.acrids)
+                self.acrids.append(acrid)
+            postings["song"] = song
+            self._pending.append(postings)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def lookup(self, hashes: np.ndarray, offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[str]]:
+        """Return (song, indexed offset, query offset) for every posting of every query hash, and the acrids.
+
+        Song ids are only valid against the returned acrids, a concurrent ``save`` or ``load`` renumbers them.
+        """
+        songs, indexed, queried = [], [], []
+        # Searching in hash order walks every segment forwards, which keeps the page cache warm
+        order = np.argsort(hashes, kind="stable")
+        hashes, offsets = hashes[order], offsets[order]
+        with self._lock:
+            sources = (*self._segments.values(), *self._pending)
+            # Reloading replaces the list rather than changing it, add only appends
+            acrids = self.acrids
+        for postings in sources:
+            if not len(postings):
+                continue
+            keys = postings["hash"]
+            left = np.searchsorted(keys, hashes, "left")
+            right = np.searchsorted(keys, hashes, "right")
+            counts = right - left
+            total = int(counts.sum())
+            if not total:
+                continue
+            # Positions left[i], left[i]+1, ..., right[i]-1 for every query hash, without a Python loop
+            starts = np.repeat(left - np.cumsum(counts) + counts, counts)
+            positions = starts + np.arange(total)
+            songs.append(np.asarray(postings["song"][positions]))
+            indexed.append(np.asarray(postings["offset"][positions]))
+            queried.append(np.repeat(offsets, counts))
+        if not songs:
+            empty = np.empty(0, dtype=np.uint32)
+            return empty, empty, empty, acrids
+        return np.concatenate(songs), np.concatenate(indexed), np.concatenate(queried), acrids
+
+    def save(self) -> None:
+        """Append learned postings as a new segment, compacting when there are too many segments."""
+        if self.directory is None or not self._pending:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._write_lock():
+            manifest = self._read_manifest()
+            # Fingerprints learned while this runs in a thread stay pending for the next save
+            with self._lock:
+                count = len(self._pending)
+                batch = np.concatenate(self._pending[:count])
+                acrids = list(self.acrids)
+            songs = manifest["songs"]
+            remap = _song_remap(songs, acrids)
+            batch["song"] = remap[batch["song"]]
+            if len(manifest["segments"]) >= self.max_segments:
+                # Compact: one segment replaces all the others, plus the new postings
+                obsolete = manifest["segments"]
+                merged = np.concatenate([*self._open(obsolete).values(), batch])
+                manifest["segments"] = [self._write_segment(manifest, _sort_postings(merged))]
+            else:
+                obsolete = []
+                manifest["segments"].append(self._write_segment(manifest, _sort_postings(batch)))
+            self._write_manifest(manifest)
+            segments = self._open(manifest["segments"])
+            with self._lock:
+                self._pending = self._pending[count:]
+            self._adopt(songs, segments)
+            self._manifest_mtime = (self.directory / MANIFEST).stat().st_mtime_ns
+        # Processes still reading an unlinked segment keep their mapping until they reload the manifest
+        for name in obsolete:
+            (self.directory / name).unlink(missing_ok=True)
+
+    def compact(self) -> None:
+        """Merge every segment into one."""
+        if self.directory is None:
+            return
+        with self._write_lock():
+            manifest = self._read_manifest()
+            obsolete = manifest["segments"]
+            if len(obsolete) < 2:
+                return
+            merged = np.concatenate(list(self._open(obsolete).values()))
+            manifest["segments"] = [self._write_segment(manifest, _sort_postings(merged))]
+            self._write_manifest(manifest)
+        self.load()
+        for name in obsolete:
+            (self.directory / name).unlink(missing_ok=True)
+
+    def _adopt(self, songs: list[str], segments: dict[str, np.ndarray]) -> None:
+        """Switch to the songs and segments of a manifest, renumbering songs only known to this process."""
+        with self._lock:
+            # Song ids of segments follow the manifest, acrids learned since the last save are appended to it
+            songs = list(songs)
+            remap = _song_remap(songs, self.acrids)
+            # Renumbered copies, a lookup running outside the lock keeps reading the old arrays
+            pending = [postings.copy() for postings in self._pending]
+            for postings in pending:
+                postings["song"] = remap[postings["song"]]
+            self._pending = pending
+            self.acrids = songs
+            self._song_ids = {acrid: song for song, acrid in enumerate(songs)}
+            self._segments = segments
+
+    def _open(self, names: list[str]) -> dict[str, np.ndarray]:
+        # Segments never change, the ones already mapped are reused
+        return {
+            name: self._segments[name] if name in self._segments else np.load(self.directory / name, mmap_mode="r")
+            for name in names
+        }
+
+    def _write_segment(self, manifest: dict, postings: np.ndarray) -> str:
+        name = f"segment-{manifest['next_segment']:06d}.npy"
+        manifest["next_segment"] += 1
+        temp = self.directory / f".{name}.tmp"
+        with open(temp, "wb") as file:
+            np.save(file, postings)
+        os.replace(temp, self.directory / name)
+        return name
+
+    def _read_manifest(self) -> dict:
+        try:
+            return json.loads((self.directory / MANIFEST).read_text())
+        except FileNotFoundError:
+            return {"songs": [], "segments": [], "next_segment": 0}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        temp = self.directory / f".{MANIFEST}.tmp"
+        temp.write_text(json.dumps(manifest))
+        os.replace(temp, self.directory / MANIFEST)
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialise writers of the directory, also across processes."""
+        with open(self.directory / ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _sort_postings(postings: np.ndarray) -> np.ndarray:
+    return postings[np.argsort(postings["hash"], kind="stable")]
+
+
+def _song_remap(songs: list[str], acrids: list[str]) -> np.ndarray:
+    """Map local song ids to ids in ``songs``, appending acrids it does not know yet."""
+    ids = {acrid: song for song, acrid in enumerate(songs)}
+    remap = np.empty(len(acrids), dtype=np.uint32)
+    for local, acrid in enumerate(acrids):
+        if acrid not in ids:
+            ids[acrid] = len(songs)
+            songs.append(acrid)
+        remap[local] = ids[acrid]
+    return remap
+
+
+class LocalRecognizer:
+    """Match clips against fingerprints of songs ACRCloud already recognised, before asking ACRCloud."""
+
+    def __init__(self, index: FingerprintIndex, min_matches: int = 25, flush_interval: float = 60.0):
+        self.index = index
+        self.min_matches = min_matches
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def load_samples(file_path: str) -> np.ndarray | None:
+        samples = read_wav(file_path)
+        if samples is None and DecoderPool.available():
+            # Clips passed through without transcoding are decoded here
+            samples = read_pcm(decode_pcm(file_path))
+        return samples
+
+    def _identify(self, file_path: str) -> tuple[str | None, tuple | None]:
+        samples = self.load_samples(file_path)
+        if samples is None:
+            return None, None
+        hashes, offsets = fingerprint(samples)
+        return self.match(hashes, offsets), (hashes, offsets)
+
+    @tracer.traced("local_recognizer.identify")
+    async def identify(self, file_path: str) -> tuple[str | None, tuple | None]:
+        """Return the ACRID of the best local match (or None) and the clip's fingerprint for ``learn``."""
+        try:
+            acrid, prints = await asyncio.to_thread(self._identify, file_path)
+        except Exception as e:
+            logger.warning(f"Local recognition of {file_path} failed: {e}")
+            return None, None
+        if acrid is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return acrid, prints
+
+    def match(self, hashes: np.ndarray, offsets: np.ndarray) -> str | None:
+        songs, indexed, queried, acrids = self.index.lookup(hashes, offsets)
+        if not len(songs):
+            return None
+        # Hashes of the right song line up at one time offset, chance matches scatter
+        deltas = indexed.astype(np.int64) - queried.astype(np.int64) + (1 << 31)
+        candidates, counts = np.unique((songs.astype(np.int64) << 32) | deltas, return_counts=True)
+        best = counts.argmax()
+        if counts[best] < self.min_matches:
+            return None
+        return acrids[int(candidates[best] >> 32)]
+
+    def learn(self, acrid: str, prints: tuple) -> None:
+        hashes, offsets = prints
+        if len(hashes):
+            self.index.add(acrid, hashes, offsets)
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self.index.load)
+        logger.info(f"Local fingerprint index loaded: {len(self.index.acrids)} songs, {len(self.index)} postings")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="fingerprint-index-flush")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.index.save)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self.index.dirty:
+                await asyncio.to_thread(self.index.save)
+            else:
+                # Pick up segments saved by other bot processes sharing the directory
+                await asyncio.to_thread(self.index.load)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "songs": len(self.index.acrids),
+            "postings": len(self.index),
+            "segments": len(self.index.segments),
+        }
+
+
+local_recognizer = LocalRecognizer(
+    FingerprintIndex(
+        Path(settings.local_index_dir) if settings.local_index_dir else settings.FINGERPRINTS_DIR,
+        settings.local_max_segments,
+    ),
+    settings.local_min_matches,
+    settings.local_flush_interval,
+)
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+
+from aiogram.enums import ChatAction
+from aiogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+STAGE_TEXTS = {
+    "downloading": "⬇️ Downloading your file...",
+    "converting": "🎛 Converting audio...",
+    "recognizing": "🔎 Recognizing the song...",
+}
+
+
+class RecognitionProgress:
+    """Keep a chat action alive and edit one status message while a recognition runs.
+
+    Progress updates are best effort: a failed edit or chat action is logged and
+    never interrupts the recognition itself.
+    """
+
+    def __init__(self, message: Message, action: ChatAction = ChatAction.TYPING, interval: float = 4.0):
+        self.message = message
+        self.action = action
+        self.interval = interval
+        self.status: Message | None = None
+        self._heartbeat: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "RecognitionProgress":
+        self._heartbeat = asyncio.create_task(self._send_actions())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+        if self.status is not None:
+            try:
+                await self.status.delete()
+            except Exception as e:
+                logger.warning(f"Could not delete status message: {e}")
+
+    async def stage(self, name: str) -> None:
+        """Show the given stage in the status message."""
+        text = STAGE_TEXTS[name]
+        try:
+            if self.status is None:
+                self.status = await self.message.reply(text)
+            else:
+                await self.status.edit_text(text)
+        except Exception as e:
+            logger.warning(f"Could not update status message to {name}: {e}")
+
+    async def _send_actions(self) -> None:
+        # Telegram shows a chat action for about five seconds
+        while True:
+            try:
+                await self.message.bot.send_chat_action(self.message.chat.id, self.action)
+            except Exception as e:
+                logger.warning(f"Could not send chat action: {e}")
+            await asyncio.sleep(self.interval)
+
+
+class InFlightJobs:
+    """Track (user, file) pairs that are being recognized to reject resubmissions."""
+
+    def __init__(self):
+        self._keys: set = set()
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def claim(self, key) -> bool:
+        """Mark a job as running; returns False if it already is."""
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def release(self, key) -> None:
+        self._keys.discard(key)
+
+
+in_flight_jobs = InFlightJobs()
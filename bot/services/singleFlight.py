@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class FlightCancelled(Exception):
+    """Raised to the followers of a call whose leader was cancelled."""
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers with the same key share its result."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()``, or the already running call for ``key`` if there is one."""
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            logger.info(f"Coalesced {self.name} request {key} ({self.coalesced} so far)")
+            # A cancelled follower must not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        # Followers may not exist, so mark a failure as retrieved to avoid "never retrieved" warnings
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # Followers were not cancelled themselves, they get an ordinary error to report
+            future.set_exception(FlightCancelled(f"{self.name} request {key} was cancelled"))
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
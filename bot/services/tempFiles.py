@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+from bot.core.configure import settings
+from bot.services.backgroundTasks import background_tasks
+from bot.services.tempNames import temp_names
+
+logger = logging.getLogger(__name__)
+
+# Room for the converted clip on top of the downloaded file
+OUTPUT_ALLOWANCE = 1024 * 1024
+
+
+class TempFileManager:
+    """Hand out per-job scratch directories under a total size quota and sweep what crashed jobs leave behind."""
+
+    def __init__(self, root: Path, quota_bytes: int, max_age: float = 600.0, sweep_interval: float = 60.0):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.used = 0
+        self.waits = 0
+        self._active: set[str] = set()
+        self._condition = asyncio.Condition()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    @asynccontextmanager
+    async def workspace(self, size: int = 0) -> AsyncIterator[Path]:
+        """Reserve ``size`` bytes and yield an empty directory that is removed afterwards.
+
+        Callers wait while the reservation would exceed the quota; a job larger than the
+        whole quota still runs, but only when nothing else holds space.
+        """
+        reserved = size + OUTPUT_ALLOWANCE
+        await self._reserve(reserved)
+        name = temp_names.new()
+        path = self.root / name
+        self._active.add(name)
+        try:
+            path.mkdir(parents=True)
+            yield path
+        finally:
+            # Deleting files is not the user's problem, the reservation is released once they are gone
+            background_tasks.spawn(self._remove(path, name, reserved), name=f"remove:{path}")
+
+    async def _reserve(self, size: int) -> None:
+        async with self._condition:
+            if self.used and self.used + size > self.quota_bytes:
+                self.waits += 1
+                logger.info(f"Temp file quota reached ({self.used} bytes in use), waiting for space")
+            await self._condition.wait_for(lambda: not self.used or self.used + size <= self.quota_bytes)
+            self.used += size
+
+    async def _remove(self, path: Path, name: str, reserved: int) -> None:
+        try:
+            await asyncio.to_thread(shutil.rmtree, path, True)
+        finally:
+            self._active.discard(name)
+            async with self._condition:
+                self.used -= reserved
+                self._condition.notify_all()
+
+    def sweep(self, max_age: float | None = None) -> int:
+        """Remove entries not owned by a running job and older than ``max_age`` seconds."""
+        max_age = self.max_age if max_age is None else max_age
+        cutoff = time.time() - max_age
+        removed = 0
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if entry.name in self._active or entry.name.startswith("."):
+                continue
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Could not remove stale temp entry {entry.path}: {e}")
+        return removed
+
+    async def start(self) -> None:
+        """Create the root, remove everything a previous run left there and start the periodic sweeper."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        removed = await asyncio.to_thread(self.sweep, 0)
+        if removed:
+            logger.info(f"Removed {removed} stale temp entries from {self.root}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="temp-file-sweeper")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            removed = await asyncio.to_thread(self.sweep)
+            if removed:
+                logger.warning(f"Swept {removed} orphaned temp entries from {self.root}")
+
+
+# The manager sweeps everything in its root, so it works in a subdirectory of its own, never in the
+# configured directory itself, which may be a shared /tmp or /dev/shm. The bot ID keeps the name
+# stable across restarts, so leftovers of a crashed run are found again.
+temp_files = TempFileManager(
+    (Path(settings.temp_dir) if settings.temp_dir else settings.DOWNLOADS_DIR)
+    / f"music-finder-{settings.TELEGRAM_TOKEN.partition(':')[0]}",
+    settings.temp_quota_mb * 1024 * 1024,
+    settings.temp_max_age,
+    settings.temp_sweep_interval,
+)
@@ -0,0 +1,28 @@
+import itertools
+import os
+import secrets
+
+
+class TempNameGenerator:
+    """Short, collision-free temp file names: a random per-process prefix followed by a counter."""
+
+    def __init__(self):
+        self._pid: int | None = None
+        self._prefix = ""
+        self._counter = itertools.count()
+
+    def new(self, extension: str = "") -> str:
+        """Return a name such as ``3fa9c2d1-1a`` or ``3fa9c2d1-1b.ogg``, unique across processes sharing a directory."""
+        pid = os.getpid()
+        if pid != self._pid:
+            # A forked worker must not continue the parent's sequence
+            self._pid = pid
+            self._prefix = secrets.token_hex(4)
+            self._counter = itertools.count()
+        name = f"{self._prefix}-{next(self._counter):x}"
+        if extension:
+            return f"{name}.{extension.rsplit('.', 1)[-1]}"
+        return name
+
+
+temp_names = TempNameGenerator()
@@ -6,10 +6,18 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
 from bot.core.configure import settings
+from bot.core.lifecycle import Lifecycle
+from bot.core.tracing import configure_tracing
 from bot.handlers.recognizerHandler import router as recognize_song_router
 from bot.handlers.startHandler import router as start_router
 from bot.handlers.historyHandler import router as history_router
 from bot.handlers.helpHandler import router as help_router
+from bot.handlers.searchHandler import router as search_router
+from bot.handlers.topHandler import router as top_router
+from bot.handlers.statsHandler import router as stats_router
+from bot.middlewares.inflight import InFlightMiddleware
+from bot.middlewares.throttling import RateLimit, RedisRateLimitBackend, ThrottlingMiddleware
+from bot.middlewares.tracing import TracingMiddleware
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,17 +27,47 @@ logger = logging.getLogger(__name__)
 # Load your Telegram bot token from a secure location
 
 
-async def main():
-    # Initialize the bot and dispatcher
-    bot = Bot(token=settings.TELEGRAM_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN))
+def create_throttling_middleware() -> ThrottlingMiddleware:
+    return ThrottlingMiddleware(
+        recognition_limit=RateLimit(settings.rate_limit_recognition_burst, settings.rate_limit_recognition_per_minute),
+        command_limit=RateLimit(settings.rate_limit_command_burst, settings.rate_limit_command_per_minute),
+        chat_factor=settings.rate_limit_chat_factor,
+        backend=RedisRateLimitBackend(settings.redis_url) if settings.redis_url else None,
+    )
+
+
+def create_dispatcher(throttling: bool = True) -> Dispatcher:
+    """Build the dispatcher with all middlewares and routers attached."""
     dp = Dispatcher()
+    in_flight = InFlightMiddleware()
+    dp.update.outer_middleware(in_flight)
+    dp.update.outer_middleware(TracingMiddleware())
+    if throttling:
+        throttling_middleware = create_throttling_middleware()
+        # Inner middlewares run after the filters, updates no handler takes cost no tokens
+        dp.message.middleware(throttling_middleware)
+        dp.callback_query.middleware(throttling_middleware)
+    lifecycle = Lifecycle(in_flight, settings.shutdown_timeout)
+    dp.startup.register(lifecycle.startup)
+    dp.shutdown.register(lifecycle.shutdown)
 
     # Register handlers
     dp.include_router(recognize_song_router)
     dp.include_router(start_router)
     dp.include_router(help_router)
     dp.include_router(history_router)
-    # Start polling for updates
+    dp.include_router(search_router)
+    dp.include_router(top_router)
+    dp.include_router(stats_router)
+    return dp
+
+
+async def main():
+    # Initialize the bot and dispatcher
+    bot = Bot(token=settings.TELEGRAM_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN))
+    configure_tracing(settings)
+    dp = create_dispatcher()
+    # Start polling for updates, SIGTERM/SIGINT stop polling and run the shutdown hooks before exiting
     await dp.start_polling(bot)
 
 
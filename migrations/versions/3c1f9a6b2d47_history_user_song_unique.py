@@ -0,0 +1,31 @@
+"""history user song unique
+
+Revision ID: 3c1f9a6b2d47
+Revises: 79d73d2e3a4f
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1f9a6b2d47"
+down_revision: Union[str, None] = "79d73d2e3a4f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the earliest record of every (user, song) pair before enforcing uniqueness
+    op.execute(
+        "DELETE FROM history a USING history b "
+        "WHERE a.user_id = b.user_id AND a.song_id = b.song_id AND a.id > b.id"
+    )
+    op.create_unique_constraint("uq_history_user_song", "history", ["user_id", "song_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_history_user_song", "history", type_="unique")
@@ -0,0 +1,84 @@
+"""songs jsonb and release date
+
+Revision ID: 8e2b5c71d9a3
+Revises: 3c1f9a6b2d47
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e2b5c71d9a3"
+down_revision: Union[str, None] = "3c1f9a6b2d47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Values parse_song stored when ACRCloud had no names
+PLACEHOLDERS = {"artists": "('', 'Unknown Artist')", "genres": "('', 'Unknown Genre')"}
+# Dates parse_release_date rejects, like 2023-02-30 or 0000-00-00, would stop the cast below; CASE
+# evaluates its branches in order, so make_date only sees a valid year and month
+RELEASE_DATE_VALID = (
+    "CASE"
+    " WHEN release_date !~ '^\\d{4}(-\\d{2}(-\\d{2})?)?$' THEN false"
+    " WHEN substr(release_date, 1, 4)::int = 0 THEN false"
+    " WHEN length(release_date) = 4 THEN true"
+    " WHEN substr(release_date, 6, 2)::int NOT BETWEEN 1 AND 12 THEN false"
+    " WHEN length(release_date) = 7 THEN true"
+    " ELSE substr(release_date, 9, 2)::int BETWEEN 1 AND extract(day FROM make_date("
+    "substr(release_date, 1, 4)::int, substr(release_date, 6, 2)::int, 1) + interval '1 month - 1 day')"
+    " END"
+)
+RELEASE_DATE_USING = (
+    "CASE"
+    " WHEN release_date ~ '^\\d{4}-\\d{2}-\\d{2}$' THEN release_date::date"
+    " WHEN release_date ~ '^\\d{4}-\\d{2}$' THEN (release_date || '-01')::date"
+    " WHEN release_date ~ '^\\d{4}$' THEN (release_date || '-01-01')::date"
+    " END"
+)
+
+
+def upgrade() -> None:
+    for column, placeholders in PLACEHOLDERS.items():
+        op.alter_column("songs", column, type_=postgresql.JSONB(), postgresql_using=f"{column}::jsonb")
+        # Rows hold either the ", " joined names parse_song used to store or ACRCloud's [{"name": ...}] list
+        op.execute(
+            f"UPDATE songs SET {column} = CASE "
+            f"WHEN {column} #>> '{{}}' IN {placeholders} THEN '[]'::jsonb "
+            f"ELSE to_jsonb(string_to_array({column} #>> '{{}}', ', ')) END "
+            f"WHERE jsonb_typeof({column}) = 'string'"
+        )
+        op.execute(
+            f"UPDATE songs SET {column} = jsonb_path_query_array({column}, '$[*].name') "
+            f"WHERE jsonb_typeof({column}) = 'array' AND jsonb_path_exists({column}, '$[*] ? (@.type() == \"object\")')"
+        )
+        op.create_index(
+            f"ix_songs_{column}",
+            "songs",
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "jsonb_path_ops"},
+        )
+    op.alter_column("songs", "links", type_=postgresql.JSONB(), postgresql_using="links::jsonb")
+    op.execute(f"UPDATE songs SET release_date = NULL WHERE release_date IS NOT NULL AND NOT ({RELEASE_DATE_VALID})")
+    op.alter_column("songs", "release_date", type_=sa.Date(), postgresql_using=RELEASE_DATE_USING)
+    op.create_index("ix_songs_release_date", "songs", ["release_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_songs_release_date", table_name="songs")
+    op.alter_column("songs", "release_date", type_=sa.String(), postgresql_using="release_date::text")
+    op.alter_column("songs", "links", type_=sa.JSON(), postgresql_using="links::json")
+    for column in PLACEHOLDERS:
+        op.drop_index(f"ix_songs_{column}", table_name="songs")
+        op.execute(
+            f"UPDATE songs SET {column} = to_jsonb(array_to_string("
+            f"ARRAY(SELECT jsonb_array_elements_text({column})), ', ')) "
+            f"WHERE jsonb_typeof({column}) = 'array'"
+        )
+        op.alter_column("songs", column, type_=sa.JSON(), postgresql_using=f"{column}::json")
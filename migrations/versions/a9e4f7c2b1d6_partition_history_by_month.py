@@ -0,0 +1,94 @@
+"""partition history by month
+
+Revision ID: a9e4f7c2b1d6
+Revises: f2c8a4d6e913
+Create Date: 2026-10-19 22:00:00.000000
+
+Rebuilds ``history`` as a table range partitioned by month on ``recognized_at``, with one partition
+per month from the oldest record up to three months ahead and a default partition for anything else.
+Every unique key of a partitioned table must contain the partition key, so the primary key becomes
+``(id, recognized_at)`` and ``uq_history_user_song`` is replaced by a plain index: the writers keep a
+user's song once. The records are copied in the migration's transaction; on a large table run it in a
+maintenance window.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a9e4f7c2b1d6"
+down_revision: Union[str, None] = "f2c8a4d6e913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE history RENAME TO history_unpartitioned")
+    op.execute("ALTER TABLE history_unpartitioned RENAME CONSTRAINT history_pkey TO history_unpartitioned_pkey")
+    op.execute("ALTER TABLE history_unpartitioned DROP CONSTRAINT uq_history_user_song")
+    op.execute(
+        "CREATE TABLE history ("
+        "id INTEGER NOT NULL DEFAULT nextval('history_id_seq'), "
+        "user_id BIGINT NOT NULL, "
+        "song_id VARCHAR NOT NULL, "
+        "recognized_at TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "CONSTRAINT history_pkey PRIMARY KEY (id, recognized_at), "
+        "CONSTRAINT history_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (telegram_id), "
+        "CONSTRAINT history_song_id_fkey FOREIGN KEY (song_id) REFERENCES songs (acrid)"
+        ") PARTITION BY RANGE (recognized_at)"
+    )
+    op.execute("ALTER SEQUENCE history_id_seq OWNED BY history.id")
+    op.create_index("ix_history_user_song", "history", ["user_id", "song_id"])
+    op.execute("""
+        DO $$
+        DECLARE
+            partition_start date := date_trunc(
+                'month', coalesce((SELECT min(recognized_at) FROM history_unpartitioned), now() AT TIME ZONE 'utc')
+            );
+            last_start date := date_trunc('month', now() AT TIME ZONE 'utc') + interval '3 months';
+        BEGIN
+            WHILE partition_start <= last_start LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF history FOR VALUES FROM (%L) TO (%L)',
+                    to_char(partition_start, '"history_y"YYYY"m"MM'),
+                    partition_start,
+                    (partition_start + interval '1 month')::date
+                );
+                partition_start := partition_start + interval '1 month';
+            END LOOP;
+        END $$
+        """)
+    op.execute("CREATE TABLE history_default PARTITION OF history DEFAULT")
+    op.execute(
+        "INSERT INTO history (id, user_id, song_id, recognized_at) "
+        "SELECT id, user_id, song_id, recognized_at FROM history_unpartitioned"
+    )
+    op.execute("DROP TABLE history_unpartitioned")
+
+
+def downgrade() -> None:
+    # Archived partitions are gone; partitions detached but not yet dropped are left alone
+    op.drop_index("ix_history_user_song", table_name="history")
+    op.execute("ALTER TABLE history RENAME TO history_partitioned")
+    op.execute("ALTER TABLE history_partitioned RENAME CONSTRAINT history_pkey TO history_partitioned_pkey")
+    op.execute(
+        "CREATE TABLE history ("
+        "id INTEGER NOT NULL DEFAULT nextval('history_id_seq'), "
+        "user_id BIGINT NOT NULL, "
+        "song_id VARCHAR NOT NULL, "
+        "recognized_at TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "CONSTRAINT history_pkey PRIMARY KEY (id), "
+        "CONSTRAINT history_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (telegram_id), "
+        "CONSTRAINT history_song_id_fkey FOREIGN KEY (song_id) REFERENCES songs (acrid), "
+        "CONSTRAINT uq_history_user_song UNIQUE (user_id, song_id)"
+        ")"
+    )
+    op.execute("ALTER SEQUENCE history_id_seq OWNED BY history.id")
+    # Keep the earliest record of every (user, song) pair, as uq_history_user_song did
+    op.execute(
+        "INSERT INTO history (id, user_id, song_id, recognized_at) "
+        "SELECT DISTINCT ON (user_id, song_id) id, user_id, song_id, recognized_at FROM history_partitioned "
+        "ORDER BY user_id, song_id, recognized_at, id"
+    )
+    op.execute("DROP TABLE history_partitioned")
@@ -0,0 +1,31 @@
+"""songs search trigram index
+
+Revision ID: b4d1e8f26c05
+Revises: 8e2b5c71d9a3
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b4d1e8f26c05"
+down_revision: Union[str, None] = "8e2b5c71d9a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Must stay identical to models.song.song_search_text for the planner to use it
+    op.execute(
+        "CREATE INDEX ix_songs_search_trgm ON songs "
+        "USING gin ((title || ' ' || coalesce(CAST(artists AS TEXT), '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_songs_search_trgm", table_name="songs")
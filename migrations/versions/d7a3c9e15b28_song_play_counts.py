@@ -0,0 +1,40 @@
+"""song play counts
+
+Revision ID: d7a3c9e15b28
+Revises: b4d1e8f26c05
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a3c9e15b28"
+down_revision: Union[str, None] = "b4d1e8f26c05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "song_play_counts",
+        sa.Column("bucket_start", sa.TIMESTAMP(), nullable=False),
+        sa.Column("song_id", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["song_id"], ["songs.acrid"]),
+        sa.PrimaryKeyConstraint("bucket_start", "song_id"),
+    )
+    # Seed the last week from the history, so /top is not empty after deploying
+    op.execute(
+        "INSERT INTO song_play_counts (bucket_start, song_id, count) "
+        "SELECT date_trunc('hour', recognized_at), song_id, count(*) FROM history "
+        "WHERE recognized_at >= (now() AT TIME ZONE 'utc') - interval '7 days' "
+        "GROUP BY 1, 2"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("song_play_counts")
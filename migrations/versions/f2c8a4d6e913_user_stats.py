@@ -0,0 +1,35 @@
+"""user stats
+
+Revision ID: f2c8a4d6e913
+Revises: d7a3c9e15b28
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c8a4d6e913"
+down_revision: Union[str, None] = "d7a3c9e15b28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled from the history by ``python -m bot.cli.backfill_user_stats``
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.telegram_id"]),
+        sa.PrimaryKeyConstraint("user_id", "kind", "name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats")
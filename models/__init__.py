@@ -1,6 +1,8 @@
 from .user import UserModel
 from .history import HistoryModel
 from .song import SongModel
+from .play_count import SongPlayCountModel
+from .user_stat import UserStatModel
 from bot.core.configure import Base
 
-__all__ = ["UserModel", "HistoryModel", "SongModel", "Base"]
+__all__ = ["UserModel", "HistoryModel", "SongModel", "SongPlayCountModel", "UserStatModel", "Base"]
@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, BigInteger, String
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, BigInteger, String, Index
 
 from bot.core.configure import Base
 
 
 class HistoryModel(Base):
+    """A song recognised by a user.
+
+    On PostgreSQL the table is range partitioned by month on ``recognized_at`` (see the migration), with
+    ``(id, recognized_at)`` as primary key: every unique key of a partitioned table has to contain the
+    partition key, so a user's song is kept once by the writers rather than by a unique constraint.
+    """
+
     __tablename__ = "history"
+    __table_args__ = (Index("ix_history_user_song", "user_id", "song_id"),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(BigInteger, ForeignKey("users.telegram_id"), nullable=False)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, TIMESTAMP
+
+from bot.core.configure import Base
+
+
+class SongPlayCountModel(Base):
+    """Recognitions of a song per hour, maintained together with the history inserts."""
+
+    __tablename__ = "song_play_counts"
+
+    bucket_start = Column(TIMESTAMP, primary_key=True)
+    song_id = Column(String, ForeignKey("songs.acrid"), primary_key=True)
+    count = Column(Integer, nullable=False)
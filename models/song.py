@@ -1,17 +1,40 @@
-from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy import Column, Date, Index, Integer, String, JSON, Text, cast, func, literal_column
+from sqlalchemy.dialects.postgresql import JSONB
 
 from bot.core.configure import Base
 
+# JSONB on PostgreSQL, so artists and genres can be searched through GIN indexes
+JSONColumn = JSON().with_variant(JSONB(), "postgresql")
+
 
 class SongModel(Base):
     __tablename__ = "songs"
+    __table_args__ = (
+        Index("ix_songs_artists", "artists", postgresql_using="gin", postgresql_ops={"artists": "jsonb_path_ops"}),
+        Index("ix_songs_genres", "genres", postgresql_using="gin", postgresql_ops={"genres": "jsonb_path_ops"}),
+        Index("ix_songs_release_date", "release_date"),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
-    artists = Column(JSON, nullable=True)
+    # Lists of names, e.g. ["Artist 1", "Artist 2"]
+    artists = Column(JSONColumn, nullable=True)
     album = Column(String, nullable=True)
-    release_date = Column(String, nullable=True)
-    genres = Column(JSON, nullable=True)
+    release_date = Column(Date, nullable=True)
+    genres = Column(JSONColumn, nullable=True)
+    # Milliseconds
     duration = Column(Integer, nullable=True)
-    links = Column(JSON, nullable=True)
+    links = Column(JSONColumn, nullable=True)
     acrid = Column(String, unique=True, nullable=False)
+
+
+# Title and artist names as one string; constants are literals so PostgreSQL matches the index expression
+song_search_text = (
+    SongModel.title + literal_column("' '") + func.coalesce(cast(SongModel.artists, Text), literal_column("''"))
+)
+Index(
+    "ix_songs_search_trgm",
+    song_search_text.label("search_text"),
+    postgresql_using="gin",
+    postgresql_ops={"search_text": "gin_trgm_ops"},
+)
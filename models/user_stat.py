@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer, String
+
+from bot.core.configure import Base
+
+
+class UserStatModel(Base):
+    """Per user recognition counters, maintained together with the history inserts.
+
+    ``kind`` is one of ``total``, ``artist``, ``genre`` or ``month`` and ``name`` the artist, the genre
+    or the ``YYYY-MM`` month counted (empty for the total). All counters of a user share the primary
+    key prefix, so ``/stats`` reads them with a single index range scan.
+    """
+
+    __tablename__ = "user_stats"
+
+    user_id = Column(BigInteger, ForeignKey("users.telegram_id"), primary_key=True)
+    kind = Column(String, primary_key=True)
+    name = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
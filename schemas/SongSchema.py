@@ -1,3 +1,4 @@
+from datetime import date
 from typing import Optional, Dict, Any
 from pydantic import BaseModel
 
@@ -6,7 +7,7 @@ class SongSchema(BaseModel):
     title: str
     artist: Optional[str] = None
     album: Optional[str] = None
-    release_date: Optional[str] = None
+    release_date: Optional[date] = None
     genre: Optional[str] = None
     duration: Optional[int] = None
     links: Optional[Dict[str, Any]] = None
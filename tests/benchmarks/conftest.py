@@ -0,0 +1,54 @@
+import pytest
+
+
+def make_acr_song(artists: int, genres: int, extra_metadata: int) -> dict:
+    """Build an ACRCloud music item shaped like a real API response."""
+    song = {
+        "title": "Benchmark Song (Remastered 2011) - Extended Mix",
+        "artists": [{"name": f"Artist {i}", "langs": [{"code": "en", "name": f"Artist {i}"}]} for i in range(artists)],
+        "album": {"name": "Benchmark Album", "langs": [{"code": "en", "name": "Benchmark Album"}]},
+        "release_date": "2011-06-01",
+        "duration_ms": 215000,
+        "genres": [{"name": f"Genre {i}"} for i in range(genres)],
+        "acrid": "6049f11da7095e8bb8266871d4a70873",
+        "label": "Benchmark Records",
+        "score": 100,
+        "play_offset_ms": 81000,
+        "external_ids": {"isrc": "GBAAA1100001", "upc": "000000000001"},
+        "external_metadata": {
+            "spotify": {"track": {"id": "7ouMYWpwJ422jRcDASZB7P", "name": "Benchmark Song"}},
+            "deezer": {"track": {"id": "3135556", "name": "Benchmark Song"}},
+            "youtube": {"vid": "dQw4w9WgXcQ"},
+        },
+    }
+    for i in range(extra_metadata):
+        song["external_metadata"][f"provider_{i}"] = {"track": {"id": str(i), "name": "Benchmark Song"}}
+    return song
+
+
+ACR_PAYLOAD_SIZES = {
+    "small": (1, 1, 0),
+    "medium": (3, 2, 5),
+    "large": (25, 10, 50),
+}
+
+
+@pytest.fixture(params=list(ACR_PAYLOAD_SIZES))
+def acr_song(request):
+    """ACRCloud music items of increasing size."""
+    return make_acr_song(*ACR_PAYLOAD_SIZES[request.param])
+
+
+@pytest.fixture
+def within_budget(benchmark):
+    """Benchmark a call and fail when its mean time exceeds the budget in microseconds."""
+
+    def run(budget_us: float, func, *args):
+        result = benchmark(func, *args)
+        # No stats are collected when benchmarking is disabled
+        if benchmark.stats is not None:
+            mean_us = benchmark.stats.stats.mean * 1e6
+            assert mean_us <= budget_us, f"mean {mean_us:.1f}us is over the {budget_us}us budget"
+        return result
+
+    return run
@@ -0,0 +1,92 @@
+import pytest
+
+from bot.services.tempNames import TempNameGenerator
+from models.song import SongModel
+from utils.slice_response import paginate_response
+from utils.song_parser import parse_song
+from utils.telegram_formatter import format_song_for_telegram
+
+pytestmark = pytest.mark.benchmark
+
+# Mean time budgets in microseconds, several times the current means so only real regressions fail
+PARSE_BUDGET_US = 100
+FORMAT_BUDGET_US = 150
+CACHED_FORMAT_BUDGET_US = 10
+PAGINATE_BUDGET_US = 250
+TEMP_NAME_BUDGET_US = 10
+
+
+class TestParsingBenchmarks:
+    """Benchmarks for ACRCloud payload parsing."""
+
+    def test_parse_song(self, within_budget, acr_song):
+        """Benchmark parse_song on payloads of varying size."""
+        result = within_budget(PARSE_BUDGET_US, parse_song, acr_song)
+
+        assert result["acrid"] == acr_song["acrid"]
+
+
+class TestFormattingBenchmarks:
+    """Benchmarks for rendering song cards."""
+
+    def test_format_parsed_song(self, within_budget, acr_song):
+        """Benchmark rendering the dict produced by parse_song, bypassing the card cache."""
+        song_info = parse_song(acr_song)
+        song_info.pop("acrid")
+
+        result = within_budget(FORMAT_BUDGET_US, format_song_for_telegram, song_info)
+
+        assert "Benchmark Song" in result
+
+    def test_format_cached_song(self, within_budget, acr_song):
+        """Benchmark formatting a song whose card is already cached."""
+        song_info = parse_song(acr_song)
+        format_song_for_telegram(song_info)
+
+        result = within_budget(CACHED_FORMAT_BUDGET_US, format_song_for_telegram, song_info)
+
+        assert "Benchmark Song" in result
+
+    def test_format_song_model(self, within_budget, acr_song):
+        """Benchmark rendering a SongModel row as loaded for history, bypassing the card cache."""
+        song_info = parse_song(acr_song)
+        song = SongModel(
+            title=song_info["title"],
+            artists=song_info["artists"],
+            album=song_info["album"],
+            release_date=song_info["release_date"],
+            genres=song_info["genres"],
+            duration=song_info["duration_ms"],
+            links=song_info["links"],
+            acrid=None,
+        )
+
+        result = within_budget(FORMAT_BUDGET_US, format_song_for_telegram, song)
+
+        assert "Benchmark Song" in result
+
+
+class TestPaginationBenchmarks:
+    """Benchmarks for history pagination."""
+
+    @pytest.mark.parametrize("history_size", [5, 100, 1000])
+    def test_paginate_response(self, within_budget, acr_song, history_size):
+        """Benchmark paginating rendered history of varying length."""
+        card = format_song_for_telegram(parse_song(acr_song))
+        items = [card] * history_size
+
+        response, kb = within_budget(PAGINATE_BUDGET_US, paginate_response, items, 1)
+
+        assert response.startswith("📜")
+
+
+class TestTempNameBenchmarks:
+    """Benchmarks for temp file naming, run once per recognition job."""
+
+    def test_temp_name(self, within_budget):
+        """Benchmark generating a temp file name with an extension."""
+        generator = TempNameGenerator()
+
+        result = within_budget(TEMP_NAME_BUDGET_US, generator.new, "audio")
+
+        assert result.endswith(".audio")
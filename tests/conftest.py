@@ -11,18 +11,18 @@ os.environ.setdefault("ACRCLOUD_ACCESS_KEY", "test_access_key")
 os.environ.setdefault("ACRCLOUD_SECRET_KEY", "test_secret_key")
 
 import asyncio
+import datetime
 import sys
 from pathlib import Path
 
 import pytest
-
+import pytest_asyncio
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 
-
 @pytest.fixture(scope="session")
 def event_loop():
     """Create an event loop for the test session."""
@@ -31,6 +31,34 @@ def event_loop():
     loop.close()
 
 
+@pytest_asyncio.fixture
+async def db_sessionmaker():
+    """In-memory SQLite database wired into every repository module."""
+    from unittest.mock import patch
+
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from bot.core.database import get_sessionmaker
+    from models import Base
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    sessionmaker = get_sessionmaker(engine)
+
+    patches = [
+        patch.object(module, "sessionmaker", sessionmaker)
+        for name, module in list(sys.modules.items())
+        if name.startswith("bot.repositories.") and hasattr(module, "sessionmaker")
+    ]
+    for p in patches:
+        p.start()
+    yield sessionmaker
+    for p in patches:
+        p.stop()
+    await engine.dispose()
+
+
 @pytest.fixture
 def mock_bot():
     """Mock bot instance for testing."""
@@ -89,11 +117,11 @@ def sample_song_info():
     """Sample parsed song information."""
     return {
         "title": "Test Song",
-        "artists": "Test Artist",
+        "artists": ["Test Artist"],
         "album": "Test Album",
-        "release_date": "2024-01-01",
+        "release_date": datetime.date(2024, 1, 1),
         "duration_ms": 180000,
-        "genres": "Pop",
+        "genres": ["Pop"],
         "acrid": "test_acrid_123",
         "links": {
             "spotify": "https://open.spotify.com/track/spotify_id_123",
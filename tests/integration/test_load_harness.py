@@ -0,0 +1,19 @@
+import pytest
+
+from benchmarks.load_dispatcher import run_load_test
+
+
+class TestLoadHarness:
+    """Smoke test for the dispatcher load-testing harness."""
+
+    @pytest.mark.asyncio
+    async def test_run_load_test_reports_metrics(self):
+        """Test that a short run produces throughput, latency and query metrics."""
+        report = await run_load_test(updates=40, concurrency=4, users=5, acr_latency=0, catalogue_size=10)
+
+        assert report["updates"] == 40
+        assert report["latency"]["count"] == 40
+        assert report["updates_per_s"] > 0
+        assert "recognize_song" in report["handlers"]
+        assert report["db_queries_per_update"]["max"] > 0
+        assert report["bot_api_calls"]["SendMessage"] > 0
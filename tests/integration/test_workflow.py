@@ -15,7 +15,7 @@ class TestMusicRecognitionWorkflow:
         song_info = parse_song(acr_song)
         # Verify parsing
         assert song_info["title"] == "Test Song"
-        assert song_info["artists"] == "Test Artist"
+        assert song_info["artists"] == ["Test Artist"]
         assert song_info["acrid"] == "test_acrid_123"
         # Step 2: Convert to format expected by telegram_formatter
         # telegram_formatter expects 'artist', 'genre' instead of 'artists', 'genres'
@@ -62,7 +62,7 @@ class TestMusicRecognitionWorkflow:
         incomplete_song = {"title": "Incomplete"}
         parsed = parse_song(incomplete_song)
         assert parsed["title"] == "Incomplete"
-        assert parsed["artists"] == "Unknown Artist"
+        assert parsed["artists"] == []
         assert parsed["album"] in [None, "Unknown Album"]
         assert parsed["links"] == {}
 
@@ -82,8 +82,8 @@ class TestMusicRecognitionWorkflow:
         parsed = parse_song(acr_data)
         # Verify parsed data
         assert parsed["title"] == "Integration Test"
-        assert parsed["artists"] == "Test Artist 1, Test Artist 2"
-        assert parsed["genres"] == "Rock, Pop"
+        assert parsed["artists"] == ["Test Artist 1", "Test Artist 2"]
+        assert parsed["genres"] == ["Rock", "Pop"]
         assert "spotify" in parsed["links"]
         # Convert to format expected by telegram_formatter
         formatted_data = {
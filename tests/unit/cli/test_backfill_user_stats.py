@@ -0,0 +1,34 @@
+import datetime
+
+import pytest
+from sqlalchemy import delete
+
+from bot.cli.backfill_user_stats import backfill_user_stats
+from bot.repositories.history_repo import bulk_create_history
+from bot.repositories.song_repo import bulk_create_songs, song_row
+from bot.repositories.stats_repo import get_user_stats
+from bot.repositories.user_repo import create_user
+from models import UserStatModel
+
+
+class TestBackfillUserStats:
+    """Test rebuilding the user statistics from the history."""
+
+    @pytest.mark.asyncio
+    async def test_backfill_every_user_in_batches(self, db_sessionmaker):
+        """Test that every user's counters are rebuilt, a few users per transaction."""
+        await bulk_create_songs([song_row({"title": "A", "acrid": "a", "artists": ["X"]})])
+        now = datetime.datetime(2025, 1, 8, 12)
+        for user_id in range(1, 6):
+            await create_user(user_id, f"user{user_id}")
+        await bulk_create_history([{"user_id": user, "song_id": "a", "recognized_at": now} for user in range(1, 5)])
+        expected = await get_user_stats(1)
+        async with db_sessionmaker() as session:
+            async with session.begin():
+                await session.execute(delete(UserStatModel))
+
+        assert await backfill_user_stats(batch_size=2) == (5, 4)
+
+        for user_id in range(1, 5):
+            assert await get_user_stats(user_id) == expected
+        assert await get_user_stats(5) == {}
@@ -0,0 +1,78 @@
+import gzip
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from bot.cli.import_catalogue import ImportReport, import_catalogue, iter_songs
+from models import SongModel
+
+
+def music_item(acrid, title="Song"):
+    return {"acrid": acrid, "title": title, "artists": [{"name": "Artist"}], "duration_ms": 1000}
+
+
+class TestIterSongs:
+    """Test parsing dump lines."""
+
+    def test_items_and_responses(self):
+        """Test that bare items and every song of a recognition response are read."""
+        lines = [
+            json.dumps(music_item("a")),
+            json.dumps({"status": {"code": 0}, "metadata": {"music": [music_item("b")], "humming": [music_item("c")]}}),
+        ]
+
+        rows = list(iter_songs(lines, ImportReport()))
+
+        assert [row["acrid"] for row in rows] == ["a", "b", "c"]
+        assert rows[0]["artists"] == ["Artist"]
+        assert rows[0]["duration"] == 1000
+        assert "duration_ms" not in rows[0]
+
+    def test_unusable_lines_are_skipped(self):
+        """Test that broken JSON and songs without an acrid are counted and skipped."""
+        report = ImportReport()
+        lines = ["{broken", "", "[1, 2]", json.dumps({"title": "No acrid"}), json.dumps({"metadata": None})]
+
+        assert list(iter_songs(lines, report)) == []
+        assert report.lines == 5
+        assert report.skipped == 3
+
+
+class TestImportCatalogue:
+    """Test importing dumps into the songs table."""
+
+    @pytest.mark.asyncio
+    async def test_import_skips_known_songs(self, db_sessionmaker, tmp_path):
+        """Test that songs are imported in batches and existing acrids are left alone."""
+        dump = tmp_path / "dump.jsonl"
+        dump.write_text("\n".join(json.dumps(music_item(f"acrid_{i}")) for i in range(7)))
+        compressed = tmp_path / "again.jsonl.gz"
+        with gzip.open(compressed, "wt") as file:
+            file.write(json.dumps(music_item("acrid_0", "Renamed")) + "\n" + json.dumps(music_item("acrid_new")))
+
+        first = await import_catalogue([dump], batch_size=3)
+        second = await import_catalogue([compressed], batch_size=3)
+
+        assert (first.songs, first.inserted) == (7, 7)
+        assert (second.songs, second.inserted) == (2, 1)
+        async with db_sessionmaker() as session:
+            assert await session.scalar(select(func.count()).select_from(SongModel)) == 8
+            song = await session.scalar(select(SongModel).where(SongModel.acrid == "acrid_0"))
+        assert song.title == "Song"
+        assert song.duration == 1000
+
+    @pytest.mark.asyncio
+    async def test_update_overwrites_known_songs(self, db_sessionmaker, tmp_path):
+        """Test that --update refreshes the metadata of stored songs."""
+        dump = tmp_path / "dump.jsonl"
+        dump.write_text(json.dumps(music_item("acrid_0")))
+        await import_catalogue([dump])
+        dump.write_text(json.dumps(music_item("acrid_0", "Renamed")))
+
+        report = await import_catalogue([dump], update=True)
+
+        assert report.inserted == 1
+        async with db_sessionmaker() as session:
+            song = await session.scalar(select(SongModel).where(SongModel.acrid == "acrid_0"))
+        assert song.title == "Renamed"
@@ -0,0 +1,126 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from bot.core.lifecycle import Lifecycle
+
+
+class TestLifecycle:
+    """Test startup and shutdown hooks."""
+
+    @pytest.mark.asyncio
+    async def test_startup_starts_temp_files_and_buffer(self):
+        """Test that startup sweeps temp files before starting the history buffer and the leaderboard."""
+        with patch("bot.core.lifecycle.temp_files") as mock_temp_files, patch(
+            "bot.core.lifecycle.history_buffer"
+        ) as mock_buffer, patch("bot.core.lifecycle.leaderboard") as mock_leaderboard, patch(
+            "bot.core.lifecycle.history_partitions"
+        ) as mock_partitions:
+            mock_temp_files.start = AsyncMock()
+            mock_buffer.start = AsyncMock()
+            mock_leaderboard.start = AsyncMock()
+            mock_partitions.start = AsyncMock()
+
+            await Lifecycle(MagicMock()).startup()
+
+        mock_temp_files.start.assert_called_once()
+        mock_buffer.start.assert_called_once()
+        mock_leaderboard.start.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_history_partitions_only_on_postgresql(self):
+        """Test that monthly history partitions are only maintained on PostgreSQL."""
+        for dialect in ("sqlite", "postgresql"):
+            with patch("bot.core.lifecycle.temp_files") as mock_temp_files, patch(
+                "bot.core.lifecycle.history_buffer"
+            ) as mock_buffer, patch("bot.core.lifecycle.leaderboard") as mock_leaderboard, patch(
+                "bot.core.lifecycle.history_partitions"
+            ) as mock_partitions, patch(
+                "bot.core.lifecycle.supports_partitions", return_value=dialect == "postgresql"
+            ):
+                for mock in (mock_temp_files, mock_buffer, mock_leaderboard, mock_partitions):
+                    mock.start = AsyncMock()
+
+                await Lifecycle(MagicMock()).startup()
+
+            assert mock_partitions.start.called is (dialect == "postgresql")
+
+    @pytest.mark.asyncio
+    async def test_local_recognizer_follows_setting(self):
+        """Test that the fingerprint index is loaded and saved only when local recognition is enabled."""
+        for enabled in (False, True):
+            with patch("bot.core.lifecycle.settings") as mock_settings, patch(
+                "bot.core.lifecycle.local_recognizer"
+            ) as mock_local, patch("bot.core.lifecycle.temp_files") as mock_temp_files, patch(
+                "bot.core.lifecycle.history_buffer"
+            ) as mock_buffer, patch(
+                "bot.core.lifecycle.background_tasks"
+            ) as mock_tasks, patch(
+                "bot.core.lifecycle.ConvertMusic"
+            ) as mock_convert, patch(
+                "bot.core.lifecycle.engine"
+            ) as mock_engine, patch(
+                "bot.core.lifecycle.leaderboard"
+            ) as mock_leaderboard, patch(
+                "bot.core.lifecycle.history_partitions"
+            ) as mock_partitions:
+                mock_settings.converter_backend = "ffmpeg"
+                mock_settings.local_recognition_enabled = enabled
+                for mock in (mock_local, mock_temp_files, mock_buffer, mock_leaderboard, mock_partitions):
+                    mock.start = AsyncMock()
+                    mock.stop = AsyncMock()
+                mock_tasks.drain = AsyncMock()
+                mock_convert.kill_running = AsyncMock(return_value=0)
+                mock_engine.dispose = AsyncMock()
+                in_flight = MagicMock(interrupted=0, dropped=0)
+                in_flight.drain = AsyncMock()
+
+                lifecycle = Lifecycle(in_flight)
+                await lifecycle.startup()
+                await lifecycle.shutdown()
+
+            assert mock_local.start.called is enabled
+            assert mock_local.stop.called is enabled
+
+    @pytest.mark.asyncio
+    async def test_shutdown_order(self):
+        """Test that shutdown drains handlers before killing ffmpeg, flushing writes and closing the engine."""
+        calls = []
+
+        def record(name):
+            return AsyncMock(side_effect=lambda *args, **kwargs: calls.append(name))
+
+        in_flight = MagicMock(interrupted=0, dropped=0)
+        in_flight.drain = record("drain_updates")
+        with patch("bot.core.lifecycle.ConvertMusic") as mock_convert, patch(
+            "bot.core.lifecycle.background_tasks"
+        ) as mock_tasks, patch("bot.core.lifecycle.temp_files") as mock_temp_files, patch(
+            "bot.core.lifecycle.history_buffer"
+        ) as mock_buffer, patch(
+            "bot.core.lifecycle.engine"
+        ) as mock_engine, patch(
+            "bot.core.lifecycle.leaderboard"
+        ) as mock_leaderboard, patch(
+            "bot.core.lifecycle.history_partitions"
+        ) as mock_partitions:
+            mock_leaderboard.stop = record("stop_leaderboard")
+            mock_partitions.stop = record("stop_partitions")
+            mock_convert.kill_running = record("kill_ffmpeg")
+            mock_tasks.drain = record("drain_background")
+            mock_temp_files.stop = record("stop_sweeper")
+            mock_buffer.stop = record("flush_history")
+            mock_engine.dispose = record("dispose_engine")
+
+            await Lifecycle(in_flight, shutdown_timeout=5).shutdown()
+
+        assert calls == [
+            "drain_updates",
+            "stop_leaderboard",
+            "stop_partitions",
+            "kill_ffmpeg",
+            "drain_background",
+            "stop_sweeper",
+            "flush_history",
+            "dispose_engine",
+        ]
+        in_flight.drain.assert_called_once_with(5)
@@ -0,0 +1,107 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from bot.core.tracing import InMemorySpanExporter, OTLPSpanExporter, SpanExporter, Tracer, instrument_engine, tracer
+
+
+@pytest.fixture
+def exporter():
+    """Pytest fixture installing an in-memory exporter on the global tracer."""
+    exporter = InMemorySpanExporter()
+    tracer.set_exporter(exporter)
+    yield exporter
+    tracer.set_exporter(None)
+
+
+class TestTracer:
+    """Test the tracing layer."""
+
+    def test_disabled_tracer_yields_noop_span(self):
+        """Test that spans are not recorded without an exporter."""
+        disabled = Tracer()
+        with disabled.span("noop") as span:
+            span.set_attribute("key", "value")
+        assert not disabled.enabled
+
+    def test_exporter_must_implement_export(self):
+        """Test that an exporter without export cannot be created."""
+
+        class Incomplete(SpanExporter):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_nested_spans_share_trace(self, exporter):
+        """Test that child spans are linked to their parent."""
+        with tracer.span("root") as root:
+            with tracer.span("child", size=3) as child:
+                pass
+
+        spans = exporter.get_finished_spans()
+        assert [span.name for span in spans] == ["child", "root"]
+        assert child.trace_id == root.trace_id
+        assert child.parent_id == root.span_id
+        assert root.parent_id is None
+        assert child.attributes == {"size": 3}
+
+    @pytest.mark.asyncio
+    async def test_traced_decorator_records_errors(self, exporter):
+        """Test that a failing traced coroutine records its exception."""
+
+        @tracer.traced("failing")
+        async def failing():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await failing()
+
+        (span,) = exporter.get_finished_spans()
+        assert span.name == "failing"
+        assert span.error == "ValueError: boom"
+        assert span.end_ns >= span.start_ns
+
+    def test_duration_ignores_wall_clock_jumps(self, exporter):
+        """Test that a wall clock step backwards does not produce a negative duration."""
+        with patch("bot.core.tracing.time.time_ns", return_value=10_000_000_000):
+            with patch("bot.core.tracing.time.perf_counter_ns", return_value=1_000_000):
+                span = tracer.start_span("jump")
+        with patch("bot.core.tracing.time.time_ns", return_value=0):
+            with patch("bot.core.tracing.time.perf_counter_ns", return_value=4_000_000):
+                tracer.end_span(span)
+
+        assert span.duration_ms == 3
+        assert span.end_ns == 10_003_000_000
+
+    @pytest.mark.asyncio
+    async def test_sql_spans(self, exporter):
+        """Test that SQL statements become child spans."""
+        engine = create_async_engine("sqlite+aiosqlite://")
+        instrument_engine(engine)
+
+        with tracer.span("root") as root:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        await engine.dispose()
+
+        sql_spans = [span for span in exporter.get_finished_spans() if span.name == "sql"]
+        assert len(sql_spans) == 1
+        assert sql_spans[0].parent_id == root.span_id
+        assert sql_spans[0].attributes["db.statement"] == "SELECT 1"
+
+    def test_otlp_encoding(self, exporter):
+        """Test the OTLP/JSON payload layout."""
+        with tracer.span("root", count=2, ok=True):
+            pass
+        otlp = OTLPSpanExporter.__new__(OTLPSpanExporter)
+        otlp.service_name = "test"
+
+        payload = otlp.encode(exporter.get_finished_spans())
+
+        span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert span["name"] == "root"
+        assert {"key": "count", "value": {"intValue": "2"}} in span["attributes"]
+        assert {"key": "ok", "value": {"boolValue": True}} in span["attributes"]
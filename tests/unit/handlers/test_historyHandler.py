@@ -0,0 +1,98 @@
+import datetime
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.handlers.historyHandler import export_history, render_history, render_history_page, with_export_buttons
+from bot.services.progressReporter import in_flight_jobs
+from utils.card_cache import card_cache
+
+
+def make_record(song_id):
+    record = MagicMock()
+    record.song_id = song_id
+    record.recognized_at = datetime.datetime(2025, 1, 1, 12, 0, 0)
+    return record
+
+
+class TestHistoryHandler:
+    """Test history handler."""
+
+    @pytest.mark.asyncio
+    async def test_render_history_uses_cached_cards(self):
+        """Test that cached cards skip the song lookup."""
+        card_cache.set("cached_song", "🎵 *Title*: Cached\n")
+        song = {"title": "Fresh", "acrid": "fresh_song"}
+
+        with patch("bot.handlers.historyHandler.find_song_by_acrid", AsyncMock(return_value=song)) as mock_find:
+            items = await render_history([make_record("cached_song"), make_record("fresh_song")])
+
+        mock_find.assert_called_once_with("fresh_song")
+        assert items[0].startswith("🎵 *Title*: Cached")
+        assert "Fresh" in items[1]
+        assert "🕒 Recognized at: 2025-01-01 12:00:00" in items[1]
+        assert card_cache.get("fresh_song") is not None
+
+    @pytest.mark.asyncio
+    async def test_render_history_page_renders_only_that_page(self):
+        """Test that a page tap loads songs for the five records shown, not the whole history."""
+        card_cache.clear()
+        history = [make_record(f"song_{i}") for i in range(12)]
+
+        with patch(
+            "bot.handlers.historyHandler.find_song_by_acrid",
+            AsyncMock(side_effect=lambda acrid: {"title": acrid, "acrid": acrid}),
+        ) as mock_find:
+            response, kb = await render_history_page(history, page=1)
+
+        assert [call.args[0] for call in mock_find.call_args_list] == [f"song_{i}" for i in range(5, 10)]
+        assert "song\\_5" in response and "song\\_10" not in response
+        assert [button.callback_data for button in kb.inline_keyboard[0]] == ["history:0", "history:2"]
+
+
+class TestExportHistory:
+    """Test the history export buttons."""
+
+    def make_call(self, data):
+        call = AsyncMock()
+        call.data = data
+        call.from_user.id = 123456
+        return call
+
+    @pytest.mark.asyncio
+    async def test_export_sends_document(self):
+        """Test that the export is uploaded as a document."""
+        document = MagicMock(rows=3, size=100)
+        exporter = MagicMock()
+        exporter.export.return_value.__aenter__ = AsyncMock(return_value=document)
+        exporter.export.return_value.__aexit__ = AsyncMock(return_value=None)
+        call = self.make_call("export:csv")
+
+        with patch("bot.handlers.historyHandler.history_exporter", exporter):
+            await export_history(call)
+
+        exporter.export.assert_called_once_with(123456, "csv")
+        call.message.answer_document.assert_called_once()
+        assert call.message.answer_document.call_args[0][0] is document
+        assert (123456, "export") not in in_flight_jobs
+
+    @pytest.mark.asyncio
+    async def test_export_already_running(self):
+        """Test that a second tap while an export is prepared is rejected."""
+        call = self.make_call("export:json")
+        in_flight_jobs.claim((123456, "export"))
+        try:
+            with patch("bot.handlers.historyHandler.history_exporter") as exporter:
+                await export_history(call)
+        finally:
+            in_flight_jobs.release((123456, "export"))
+
+        exporter.export.assert_not_called()
+        assert "already being prepared" in call.answer.call_args[0][0]
+
+    def test_history_keyboard_has_export_buttons(self):
+        """Test that the history view offers both export formats."""
+        kb = with_export_buttons(InlineKeyboardMarkup(inline_keyboard=[]))
+
+        assert [button.callback_data for button in kb.inline_keyboard[-1]] == ["export:csv", "export:json"]
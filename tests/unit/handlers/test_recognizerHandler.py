@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import patch, AsyncMock, MagicMock
 
 import pytest
@@ -5,6 +6,9 @@ from aiogram.enums import ContentType
 from aiogram.types import Message
 
 from bot.handlers.recognizerHandler import recognize_song_button, recognize_song
+from bot.services.backgroundTasks import background_tasks
+from bot.services.progressReporter import in_flight_jobs
+from bot.services.tempFiles import TempFileManager
 
 
 class TestRecognizerHandler:
@@ -43,7 +47,7 @@ class TestRecognizerHandler:
         assert "at least 10 seconds" in call_args[0][0]
 
     @pytest.mark.asyncio
-    async def test_recognize_song_success(self):
+    async def test_recognize_song_success(self, tmp_path):
         """Test successful song recognition."""
         message = AsyncMock(spec=Message)
         message.from_user = MagicMock()
@@ -56,34 +60,144 @@ class TestRecognizerHandler:
         # Create mock audio file
         audio = MagicMock()
         audio.duration = 30
+        audio.file_size = 1024
         audio.file_id = "audio_file_123"
         message.audio = audio
 
-        with patch("bot.handlers.recognizerHandler.create_user") as mock_create_user, patch(
-            "bot.handlers.recognizerHandler.generate_random_filename", return_value="random123"
-        ), patch("bot.handlers.recognizerHandler.convert") as mock_convert, patch(
-            "bot.handlers.recognizerHandler.handle_recognized_song"
-        ) as mock_handle, patch(
-            "bot.handlers.recognizerHandler.create_history"
-        ) as mock_create_history, patch(
-            "os.remove"
-        ) as mock_remove:
-            mock_convert.save_and_convert_to_mp3 = AsyncMock(return_value="/path/to/file.mp3")
-            mock_handle.return_value = ("🎵 Song found!", "song_123")
+        song_info = {"title": "Song", "acrid": "song_123"}
+
+        with patch("bot.handlers.recognizerHandler.persist_recognition") as mock_persist, patch(
+            "bot.handlers.recognizerHandler.convert"
+        ) as mock_convert, patch("bot.handlers.recognizerHandler.handle_recognized_song") as mock_handle, patch(
+            "bot.handlers.recognizerHandler.temp_files", TempFileManager(tmp_path, quota_bytes=10**9)
+        ), patch(
+            "bot.handlers.recognizerHandler.file_digest", return_value="digest"
+        ):
+            mock_convert.save_and_convert = AsyncMock(return_value="/path/to/file.mp3")
+            mock_handle.return_value = ("🎵 Song found!", song_info)
 
             await recognize_song(message)
+            await background_tasks.drain()
 
-            mock_create_user.assert_called_once_with(123456, "test_user")
-            mock_convert.save_and_convert_to_mp3.assert_called_once()
-            mock_handle.assert_called_once_with("/path/to/file.mp3")
-            mock_create_history.assert_called_once_with(123456, "song_123")
-            mock_remove.assert_called_once_with("/path/to/file.mp3")
+            mock_convert.save_and_convert.assert_called_once()
+            mock_handle.assert_called_once_with("/path/to/file.mp3", 30)
+            mock_persist.assert_called_once_with(123456, "test_user", song_info)
+            # The job workspace handed to the converter is gone once the job is over
+            workspace = mock_convert.save_and_convert.call_args[0][4]
+            assert workspace.parent == tmp_path
+            assert not workspace.exists()
 
             message.answer.assert_called_once()
             assert "🎵 Song found!" in message.answer.call_args[0][0]
 
     @pytest.mark.asyncio
-    async def test_recognize_song_with_exception(self):
+    async def test_recognize_song_not_recognized(self, tmp_path):
+        """Test that a failed recognition is reported and nothing is persisted."""
+        message = AsyncMock(spec=Message)
+        message.from_user = MagicMock()
+        message.from_user.id = 123456
+        message.from_user.username = "test_user"
+        message.content_type = ContentType.AUDIO
+        message.answer = AsyncMock()
+        message.bot = AsyncMock()
+
+        audio = MagicMock()
+        audio.duration = 30
+        audio.file_size = 1024
+        audio.file_id = "audio_file_123"
+        message.audio = audio
+
+        with patch("bot.handlers.recognizerHandler.persist_recognition") as mock_persist, patch(
+            "bot.handlers.recognizerHandler.convert"
+        ) as mock_convert, patch(
+            "bot.handlers.recognizerHandler.handle_recognized_song", return_value="❌ No matching song found."
+        ), patch(
+            "bot.handlers.recognizerHandler.temp_files", TempFileManager(tmp_path, quota_bytes=10**9)
+        ), patch(
+            "bot.handlers.recognizerHandler.file_digest", return_value="digest"
+        ):
+            mock_convert.save_and_convert = AsyncMock(return_value="/path/to/file.mp3")
+
+            await recognize_song(message)
+            await background_tasks.drain()
+
+            mock_persist.assert_not_called()
+            assert list(tmp_path.iterdir()) == []
+            assert message.answer.call_args[0][0] == "❌ No matching song found."
+
+    @pytest.mark.asyncio
+    async def test_recognize_song_duplicate_in_flight(self):
+        """Test that resending a file still being processed is rejected without downloading it."""
+        message = AsyncMock(spec=Message)
+        message.from_user = MagicMock()
+        message.from_user.id = 123456
+        message.from_user.username = "test_user"
+        message.content_type = ContentType.AUDIO
+        message.answer = AsyncMock()
+
+        audio = MagicMock()
+        audio.duration = 30
+        audio.file_size = 1024
+        audio.file_unique_id = "unique_123"
+        message.audio = audio
+
+        in_flight_jobs.claim((123456, "unique_123"))
+        try:
+            with patch("bot.handlers.recognizerHandler.convert") as mock_convert:
+                await recognize_song(message)
+        finally:
+            in_flight_jobs.release((123456, "unique_123"))
+
+        mock_convert.save_and_convert.assert_not_called()
+        assert "already being recognized" in message.answer.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_recognize_song_coalesces_identical_media(self, tmp_path):
+        """Test that the same clip sent by several users is processed once."""
+
+        def make_message(user_id):
+            message = AsyncMock(spec=Message)
+            message.from_user = MagicMock()
+            message.from_user.id = user_id
+            message.from_user.username = f"user{user_id}"
+            message.content_type = ContentType.AUDIO
+            message.answer = AsyncMock()
+            message.bot = AsyncMock()
+            audio = MagicMock()
+            audio.duration = 30
+            audio.file_size = 1024
+            audio.file_id = f"file_for_{user_id}"
+            audio.file_unique_id = "shared_clip"
+            message.audio = audio
+            return message
+
+        async def slow_convert(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return "/path/to/shared.mp3"
+
+        messages = [make_message(user_id) for user_id in (1, 2, 3)]
+        with patch("bot.handlers.recognizerHandler.persist_recognition") as mock_persist, patch(
+            "bot.handlers.recognizerHandler.convert"
+        ) as mock_convert, patch(
+            "bot.handlers.recognizerHandler.handle_recognized_song", return_value=("🎵 Shared!", {"acrid": "shared"})
+        ) as mock_handle, patch(
+            "bot.handlers.recognizerHandler.temp_files", TempFileManager(tmp_path, quota_bytes=10**9)
+        ), patch(
+            "bot.handlers.recognizerHandler.file_digest", return_value="digest"
+        ):
+            mock_convert.save_and_convert = AsyncMock(side_effect=slow_convert)
+
+            await asyncio.gather(*(recognize_song(message) for message in messages))
+            await background_tasks.drain()
+
+        mock_convert.save_and_convert.assert_called_once()
+        mock_handle.assert_called_once()
+        assert mock_persist.call_count == 3
+        for message in messages:
+            assert message.answer.call_args[0][0] == "🎵 Shared!"
+
+    @pytest.mark.asyncio
+    async def test_recognize_song_with_exception(self, tmp_path):
         """Test recognition with exception."""
         message = AsyncMock(spec=Message)
         message.from_user = MagicMock()
@@ -94,17 +208,24 @@ class TestRecognizerHandler:
 
         audio = MagicMock()
         audio.duration = 30
+        audio.file_size = 1024
         audio.file_id = "audio_file_123"
         message.audio = audio
 
-        with patch("bot.handlers.recognizerHandler.create_user", side_effect=Exception("DB Error")):
+        with patch("bot.handlers.recognizerHandler.convert") as mock_convert, patch(
+            "bot.handlers.recognizerHandler.temp_files", TempFileManager(tmp_path, quota_bytes=10**9)
+        ):
+            mock_convert.save_and_convert = AsyncMock(side_effect=Exception("Download failed"))
             await recognize_song(message)
+            await background_tasks.drain()
 
             message.answer.assert_called_once()
             assert "❌ An error occurred:" in message.answer.call_args[0][0]
+            # A failed job leaves nothing behind
+            assert list(tmp_path.iterdir()) == []
 
     @pytest.mark.asyncio
-    async def test_recognize_song_voice(self):
+    async def test_recognize_song_voice(self, tmp_path):
         """Test recognition with voice message."""
         message = AsyncMock(spec=Message)
         message.from_user = MagicMock()
@@ -116,22 +237,22 @@ class TestRecognizerHandler:
 
         voice = MagicMock()
         voice.duration = 15
+        voice.file_size = 1024
         voice.file_id = "voice_file_123"
         message.voice = voice
 
-        with patch("bot.handlers.recognizerHandler.create_user"), patch(
-            "bot.handlers.recognizerHandler.generate_random_filename", return_value="random456"
-        ), patch("bot.handlers.recognizerHandler.convert") as mock_convert, patch(
-            "bot.handlers.recognizerHandler.handle_recognized_song"
-        ) as mock_handle, patch(
-            "bot.handlers.recognizerHandler.create_history"
+        with patch("bot.handlers.recognizerHandler.persist_recognition"), patch(
+            "bot.handlers.recognizerHandler.convert"
+        ) as mock_convert, patch("bot.handlers.recognizerHandler.handle_recognized_song") as mock_handle, patch(
+            "bot.handlers.recognizerHandler.temp_files", TempFileManager(tmp_path, quota_bytes=10**9)
         ), patch(
-            "os.remove"
+            "bot.handlers.recognizerHandler.file_digest", return_value="digest"
         ):
-            mock_convert.save_and_convert_to_mp3 = AsyncMock(return_value="/path/to/voice.mp3")
-            mock_handle.return_value = ("🎵 Voice recognized!", "voice_song_123")
+            mock_convert.save_and_convert = AsyncMock(return_value="/path/to/voice.mp3")
+            mock_handle.return_value = ("🎵 Voice recognized!", {"acrid": "voice_song_123"})
 
             await recognize_song(message)
+            await background_tasks.drain()
 
             message.answer.assert_called_once()
             assert "🎵 Voice recognized!" in message.answer.call_args[0][0]
@@ -157,3 +278,40 @@ class TestRecognizerHandler:
         # Should fail because duration is 0
         message.answer.assert_called_once()
         assert "at least 10 seconds" in message.answer.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_follower_of_cancelled_leader_gets_a_reply(self, tmp_path):
+        """Test that a user coalesced on a job cancelled under another user still gets an answer."""
+
+        def make_message(user_id):
+            message = AsyncMock(spec=Message)
+            message.from_user = MagicMock()
+            message.from_user.id = user_id
+            message.from_user.username = f"user{user_id}"
+            message.content_type = ContentType.AUDIO
+            message.answer = AsyncMock()
+            message.bot = AsyncMock()
+            audio = MagicMock()
+            audio.duration = 30
+            audio.file_size = 1024
+            audio.file_id = f"file_for_{user_id}"
+            audio.file_unique_id = "cancelled_clip"
+            message.audio = audio
+            return message
+
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        leader_message, follower_message = make_message(1), make_message(2)
+        with patch("bot.handlers.recognizerHandler.convert") as mock_convert, patch(
+            "bot.handlers.recognizerHandler.temp_files", TempFileManager(tmp_path, quota_bytes=10**9)
+        ):
+            mock_convert.save_and_convert = AsyncMock(side_effect=hang)
+            leader = asyncio.create_task(recognize_song(leader_message))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(recognize_song(follower_message))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            await asyncio.gather(leader, follower, return_exceptions=True)
+
+        assert "❌ An error occurred:" in follower_message.answer.call_args[0][0]
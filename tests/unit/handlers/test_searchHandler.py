@@ -0,0 +1,91 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.filters import CommandObject
+
+from bot.handlers.searchHandler import search_handler, search_page_handler
+from models import HistoryModel, SongModel
+
+
+def make_state(data=None):
+    state = AsyncMock()
+    state.get_data = AsyncMock(return_value=data or {})
+    return state
+
+
+def make_rows(count):
+    rows = []
+    for i in range(count):
+        song = SongModel(title=f"Song {i}", artists=["Queen"], acrid=f"search_{i}")
+        record = HistoryModel(user_id=1, song_id=song.acrid, recognized_at=datetime.datetime(2025, 1, 1, 12, 0, i))
+        rows.append((record, song))
+    return rows
+
+
+class TestSearchHandler:
+    """Test the /search command and its pages."""
+
+    @pytest.mark.asyncio
+    async def test_search_without_text_shows_usage(self, mock_message):
+        """Test that /search alone explains how to use it."""
+        state = make_state()
+
+        await search_handler(mock_message, CommandObject(command="search"), state)
+
+        assert "/search" in mock_message.answer.call_args[0][0]
+        state.update_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_search_first_page(self, mock_message):
+        """Test that results are rendered with the total and a Next button."""
+        state = make_state()
+        with patch(
+            "bot.handlers.searchHandler.search_history", AsyncMock(return_value=(make_rows(5), 12))
+        ) as mock_search:
+            await search_handler(mock_message, CommandObject(command="search", args=" queen "), state)
+
+        mock_search.assert_called_once_with(mock_message.from_user.id, "queen", limit=5, offset=0)
+        state.update_data.assert_called_once_with(search_query="queen")
+        response = mock_message.answer.call_args[0][0]
+        assert "12 results for* queen" in response
+        assert "Song 4" in response
+        keyboard = mock_message.answer.call_args[1]["reply_markup"]
+        assert [button.callback_data for button in keyboard.inline_keyboard[0]] == ["search:1"]
+
+    @pytest.mark.asyncio
+    async def test_search_without_results(self, mock_message):
+        """Test that an empty search says so."""
+        with patch("bot.handlers.searchHandler.search_history", AsyncMock(return_value=([], 0))):
+            await search_handler(mock_message, CommandObject(command="search", args="nothing"), make_state())
+
+        assert "Nothing in your history matches nothing" in mock_message.answer.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_next_page_uses_stored_query(self):
+        """Test that page callbacks search again with the query kept in the FSM state."""
+        call = AsyncMock()
+        call.data = "search:2"
+        call.from_user = MagicMock(id=1)
+        call.message = AsyncMock()
+        with patch(
+            "bot.handlers.searchHandler.search_history", AsyncMock(return_value=(make_rows(2), 12))
+        ) as mock_search:
+            await search_page_handler(call, make_state({"search_query": "queen"}))
+
+        mock_search.assert_called_once_with(1, "queen", limit=5, offset=10)
+        keyboard = call.message.edit_text.call_args[1]["reply_markup"]
+        assert [button.callback_data for button in keyboard.inline_keyboard[0]] == ["search:1"]
+
+    @pytest.mark.asyncio
+    async def test_expired_search(self):
+        """Test that a page callback without a stored query asks to search again."""
+        call = AsyncMock()
+        call.data = "search:1"
+        call.from_user = MagicMock(id=1)
+
+        with patch("bot.handlers.searchHandler.search_history") as mock_search:
+            await search_page_handler(call, make_state())
+
+        mock_search.assert_not_called()
+        assert "expired" in call.answer.call_args[0][0]
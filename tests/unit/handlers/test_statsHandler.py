@@ -0,0 +1,44 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from bot.handlers.statsHandler import render_stats, stats_handler
+
+
+class TestStatsHandler:
+    """Test the /stats command."""
+
+    def test_render_stats(self):
+        """Test that artists and genres are ranked and only the last twelve months are listed."""
+        stats = {
+            "total": {"": 20},
+            "artist": {f"Artist {i}": i for i in range(1, 8)},
+            "genre": {"Rock": 3, "Pop": 3},
+            "month": {f"2024-{month:02d}": 1 for month in range(1, 13)} | {"2025-01": 9},
+        }
+
+        text = render_stats(stats)
+
+        assert "Songs recognised: 20" in text
+        assert "1. Artist 7 (7)" in text
+        assert "5. Artist 3 (3)" in text
+        assert "Artist 2" not in text
+        assert text.index("Pop (3)") < text.index("Rock (3)")
+        assert "2024-01" not in text
+        assert text.endswith("2024-12: 1\n2025-01: 9")
+
+    def test_render_without_history(self):
+        """Test the message for a user who has not recognised anything."""
+        assert "not recognised any songs" in render_stats({})
+
+    @pytest.mark.asyncio
+    async def test_stats_reads_the_rollups(self, mock_message):
+        """Test that /stats renders the counters of the sender."""
+        mock_message.from_user.id = 42
+        with patch(
+            "bot.handlers.statsHandler.get_user_stats", AsyncMock(return_value={"total": {"": 1}})
+        ) as mock_stats:
+            await stats_handler(mock_message)
+
+        mock_stats.assert_called_once_with(42)
+        assert "Songs recognised: 1" in mock_message.answer.call_args[0][0]
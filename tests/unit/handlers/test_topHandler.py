@@ -0,0 +1,59 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import CommandObject
+
+from bot.handlers.topHandler import top_handler, top_period_handler
+
+
+class TestTopHandler:
+    """Test the /top command."""
+
+    @pytest.mark.asyncio
+    async def test_top_defaults_to_day(self, mock_message):
+        """Test that /top shows today's leaderboard with period buttons."""
+        with patch("bot.handlers.topHandler.leaderboard") as mock_leaderboard:
+            mock_leaderboard.text = AsyncMock(return_value="🔥 *Top songs today*")
+            await top_handler(mock_message, CommandObject(command="top"))
+
+        mock_leaderboard.text.assert_called_once_with("day")
+        assert mock_message.answer.call_args[0][0] == "🔥 *Top songs today*"
+        keyboard = mock_message.answer.call_args[1]["reply_markup"]
+        assert [button.callback_data for button in keyboard.inline_keyboard[0]] == ["top:hour", "top:day", "top:week"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_period(self, mock_message):
+        """Test that an unknown period shows the usage."""
+        with patch("bot.handlers.topHandler.leaderboard") as mock_leaderboard:
+            await top_handler(mock_message, CommandObject(command="top", args="year"))
+
+        mock_leaderboard.text.assert_not_called()
+        assert "Usage: /top [hour|day|week]" in mock_message.answer.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_switch_period(self):
+        """Test that the period buttons edit the message in place."""
+        call = AsyncMock()
+        call.data = "top:week"
+        with patch("bot.handlers.topHandler.leaderboard") as mock_leaderboard:
+            mock_leaderboard.text = AsyncMock(return_value="🔥 *Top songs this week*")
+            await top_period_handler(call)
+
+        mock_leaderboard.text.assert_called_once_with("week")
+        assert call.message.edit_text.call_args[0][0] == "🔥 *Top songs this week*"
+        call.answer.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_tapping_the_shown_period(self):
+        """Test that re-selecting the shown period is answered instead of failing on an unchanged message."""
+        call = AsyncMock()
+        call.data = "top:day"
+        call.message.edit_text.side_effect = TelegramBadRequest(
+            method=MagicMock(), message="Bad Request: message is not modified"
+        )
+        with patch("bot.handlers.topHandler.leaderboard") as mock_leaderboard:
+            mock_leaderboard.text = AsyncMock(return_value="🔥 *Top songs today*")
+            await top_period_handler(call)
+
+        call.answer.assert_called_once_with()
@@ -0,0 +1,63 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from bot.middlewares.inflight import RESTART_TEXT, InFlightMiddleware
+
+
+class TestInFlightMiddleware:
+    """Test in-flight update tracking."""
+
+    @pytest.mark.asyncio
+    async def test_drain_waits_for_running_updates(self):
+        """Test that drain lets running handlers finish and refuses new updates."""
+        middleware = InFlightMiddleware()
+        release = asyncio.Event()
+        finished = []
+
+        async def handler(event, data):
+            await release.wait()
+            finished.append(event)
+
+        task = asyncio.create_task(middleware(handler, "update", {}))
+        await asyncio.sleep(0)
+        assert len(middleware) == 1
+
+        drain = asyncio.create_task(middleware.drain(timeout=5))
+        await asyncio.sleep(0)
+        late_handler = AsyncMock()
+        await middleware(late_handler, "late", {})
+        release.set()
+
+        assert await drain is True
+        await task
+        assert finished == ["update"]
+        late_handler.assert_not_called()
+        assert middleware.dropped == 1
+        assert len(middleware) == 0
+
+    @pytest.mark.asyncio
+    async def test_drain_cancels_after_timeout_and_notifies(self):
+        """Test that handlers still running after the timeout are cancelled and the user is told."""
+        middleware = InFlightMiddleware()
+        bot = MagicMock()
+        bot.send_message = AsyncMock()
+        chat = MagicMock()
+        chat.id = 7
+
+        async def handler(event, data):
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(middleware(handler, "update", {"bot": bot, "event_chat": chat}))
+        await asyncio.sleep(0)
+
+        assert await middleware.drain(timeout=0.01) is False
+        assert task.cancelled()
+        assert middleware.interrupted == 1
+        bot.send_message.assert_called_once_with(7, RESTART_TEXT)
+
+    @pytest.mark.asyncio
+    async def test_drain_without_updates(self):
+        """Test that draining an idle bot returns immediately."""
+        assert await InFlightMiddleware().drain(timeout=0) is True
@@ -0,0 +1,144 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.filters import Command
+from aiogram.types import Audio, CallbackQuery, Chat, Message, Update, User
+
+from bot.middlewares.throttling import MemoryRateLimitBackend, RateLimit, ThrottlingMiddleware
+
+
+def make_message(user_id=1, chat_id=None, media=False, text="/help"):
+    """Build a real aiogram message so content type detection is exercised."""
+    fields = {
+        "message_id": 1,
+        "date": datetime.datetime.now(),
+        "chat": Chat(id=chat_id or user_id, type="private" if chat_id is None else "group"),
+        "from_user": User(id=user_id, is_bot=False, first_name="Test"),
+    }
+    if media:
+        fields["audio"] = Audio(file_id="file", file_unique_id="file", duration=30)
+    else:
+        fields["text"] = text
+    return Message(**fields)
+
+
+def make_data(message):
+    return {"event_from_user": message.from_user, "event_chat": message.chat}
+
+
+@pytest.fixture
+def middleware():
+    """Pytest fixture for a middleware with tight limits."""
+    return ThrottlingMiddleware(
+        recognition_limit=RateLimit(burst=2, per_minute=1),
+        command_limit=RateLimit(burst=4, per_minute=1),
+        chat_factor=1.5,
+    )
+
+
+class TestMemoryRateLimitBackend:
+    """Test the in-memory token buckets."""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_refill(self):
+        """Test that a bucket allows its burst and refills over time."""
+        backend = MemoryRateLimitBackend()
+        limit = RateLimit(burst=2, per_minute=60)
+
+        with patch("bot.middlewares.throttling.time.monotonic", return_value=100.0):
+            assert await backend.acquire("key", limit)
+            assert await backend.acquire("key", limit)
+            assert not await backend.acquire("key", limit)
+        with patch("bot.middlewares.throttling.time.monotonic", return_value=101.0):
+            assert await backend.acquire("key", limit)
+            assert not await backend.acquire("key", limit)
+
+
+class TestThrottlingMiddleware:
+    """Test throttling middleware."""
+
+    @pytest.mark.asyncio
+    async def test_recognition_limit_rejects_without_calling_handler(self, middleware):
+        """Test that media floods are cut off before the handler runs."""
+        handler = AsyncMock()
+        with patch.object(Message, "answer", new=AsyncMock()) as mock_answer:
+            for _ in range(4):
+                message = make_message(media=True)
+                await middleware(handler, message, make_data(message))
+
+        assert handler.call_count == 2
+        assert middleware.rejected == 2
+        # The user is told to slow down only once per notice interval
+        mock_answer.assert_called_once()
+        assert "slow down" in mock_answer.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_commands_have_separate_limit(self, middleware):
+        """Test that exhausting recognition does not block cheap commands."""
+        handler = AsyncMock()
+        with patch.object(Message, "answer", new=AsyncMock()):
+            for _ in range(3):
+                message = make_message(media=True)
+                await middleware(handler, message, make_data(message))
+            message = make_message()
+            await middleware(handler, message, make_data(message))
+
+        assert handler.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_chat_limit_applies_across_users(self, middleware):
+        """Test that a group chat is limited even when each user is under their own limit."""
+        handler = AsyncMock()
+        with patch.object(Message, "answer", new=AsyncMock()):
+            for user_id in range(1, 6):
+                message = make_message(user_id=user_id, chat_id=-100, media=True)
+                await middleware(handler, message, make_data(message))
+
+        assert handler.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_updates_without_user_pass_through(self, middleware):
+        """Test that updates without a sender are not throttled."""
+        handler = AsyncMock(return_value="ok")
+
+        assert await middleware(handler, MagicMock(), {}) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_rejected_callbacks_are_always_answered(self, middleware):
+        """Test that every throttled button press is answered so its spinner stops."""
+        handler = AsyncMock()
+        user = User(id=1, is_bot=False, first_name="Test")
+        with patch.object(CallbackQuery, "answer", new=AsyncMock()) as mock_answer:
+            for _ in range(6):
+                call = CallbackQuery(id="1", from_user=user, chat_instance="1", data="top:week")
+                await middleware(handler, call, {"event_from_user": user})
+
+        assert handler.call_count == 4
+        assert mock_answer.call_count == 2
+        assert "slow down" in mock_answer.call_args_list[0][0][0]
+        assert mock_answer.call_args_list[1][0][0] is None
+
+    @pytest.mark.asyncio
+    async def test_unmatched_updates_cost_no_tokens(self, middleware):
+        """Test that, registered as an inner middleware, only updates reaching a handler are charged."""
+        dispatcher = Dispatcher()
+        dispatcher.message.middleware(middleware)
+        handled = []
+
+        async def help_handler(message):
+            handled.append(message)
+
+        router = Router()
+        router.message.register(help_handler, Command(commands=["help"]))
+        dispatcher.include_router(router)
+        bot = Bot(token="42:TEST")
+
+        await dispatcher.feed_update(bot, Update(update_id=1, message=make_message(text="just chatting")))
+        assert middleware.backend._buckets == {}
+
+        await dispatcher.feed_update(bot, Update(update_id=2, message=make_message()))
+        assert list(middleware.backend._buckets) == ["command:user:1"]
+        assert len(handled) == 1
+        await bot.session.close()
@@ -0,0 +1,36 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Chat, Message, Update
+
+from bot.core.tracing import InMemorySpanExporter, tracer
+from bot.middlewares.tracing import TracingMiddleware
+
+
+class TestTracingMiddleware:
+    """Test tracing middleware."""
+
+    @pytest.mark.asyncio
+    async def test_root_span_per_update(self):
+        """Test that each update is wrapped in a root span."""
+        exporter = InMemorySpanExporter()
+        tracer.set_exporter(exporter)
+        try:
+            message = Message(message_id=1, date=datetime.datetime.now(), chat=Chat(id=7, type="private"), text="hi")
+            update = Update(update_id=42, message=message)
+            user = MagicMock()
+            user.id = 7
+            handler = AsyncMock(return_value="handled")
+
+            result = await TracingMiddleware()(handler, update, {"event_from_user": user})
+        finally:
+            tracer.set_exporter(None)
+
+        assert result == "handled"
+        (span,) = exporter.get_finished_spans()
+        assert span.name == "telegram.update"
+        assert span.parent_id is None
+        assert span.attributes["telegram.update_id"] == 42
+        assert span.attributes["telegram.update_type"] == "message"
+        assert span.attributes["telegram.user_id"] == 7
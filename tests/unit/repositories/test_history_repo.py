@@ -0,0 +1,120 @@
+import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from bot.repositories.history_repo import (
+    bulk_create_history,
+    create_history,
+    detach_history_partition,
+    drop_history_table,
+    search_history,
+    supports_partitions,
+)
+from bot.repositories.song_repo import bulk_create_songs, song_row
+from bot.repositories.stats_repo import get_user_stats
+from models import HistoryModel, SongPlayCountModel
+
+
+@pytest_asyncio.fixture
+async def searchable_history(db_sessionmaker):
+    """Seven songs in the history of user 1, one in the history of user 2."""
+    songs = [
+        ("Bohemian Rhapsody", ["Queen"]),
+        ("Under Pressure", ["Queen", "David Bowie"]),
+        ("Heroes", ["David Bowie"]),
+    ]
+    songs += [(f"Filler {i}", ["Someone"]) for i in range(4)]
+    await bulk_create_songs(
+        [song_row({"title": title, "artists": artists, "acrid": title}) for title, artists in songs]
+    )
+    start = datetime.datetime(2025, 1, 1)
+    await bulk_create_history(
+        [
+            {"user_id": 1, "song_id": title, "recognized_at": start + datetime.timedelta(minutes=i)}
+            for i, (title, _) in enumerate(songs)
+        ]
+        + [{"user_id": 2, "song_id": "Heroes", "recognized_at": start}]
+    )
+
+
+class TestSearchHistory:
+    """Test searching a user's history by title and artist."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("searchable_history")
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ("queen", ["Under Pressure", "Bohemian Rhapsody"]),
+            ("BOWIE", ["Heroes", "Under Pressure"]),
+            ("rhaps", ["Bohemian Rhapsody"]),
+            ("nothing", []),
+        ],
+    )
+    async def test_matches_title_and_artists(self, text, expected):
+        """Test case-insensitive substring matches on titles and artist names, newest first."""
+        rows, total = await search_history(1, text)
+
+        assert [song.title for _, song in rows] == expected
+        assert total == len(expected)
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("searchable_history")
+    async def test_pages_carry_the_total(self):
+        """Test that every page reports the number of matches across all pages."""
+        first, total = await search_history(1, "filler", limit=3)
+        second, second_total = await search_history(1, "filler", limit=3, offset=3)
+
+        assert total == second_total == 4
+        assert [song.title for _, song in first + second] == ["Filler 3", "Filler 2", "Filler 1", "Filler 0"]
+        assert all(record.user_id == 1 for record, _ in first)
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("searchable_history")
+    async def test_only_own_history(self):
+        """Test that other users' history is not searched."""
+        rows, total = await search_history(2, "queen")
+
+        assert (rows, total) == ([], 0)
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("searchable_history")
+    async def test_like_wildcards_are_literal(self):
+        """Test that % and _ in the search text match only themselves."""
+        assert await search_history(1, "%") == ([], 0)
+        assert await search_history(1, "_") == ([], 0)
+
+
+class TestHistoryPartitionDDL:
+    """Test the guard on partition names interpolated into DDL."""
+
+    @pytest.mark.asyncio
+    async def test_rejects_other_tables(self):
+        """Test that only monthly history partitions can be detached or dropped."""
+        with pytest.raises(ValueError):
+            await drop_history_table("users; --")
+        with pytest.raises(ValueError):
+            await detach_history_partition("history_default")
+
+    def test_partitions_follow_the_repository_database(self, db_sessionmaker):
+        """Test that the dialect comes from the session the repository uses, not the configured engine."""
+        assert not supports_partitions()
+
+
+class TestCreateHistory:
+    """Test creating a single history record."""
+
+    @pytest.mark.asyncio
+    async def test_goes_through_the_bulk_path(self, db_sessionmaker):
+        """Test that a single record is deduplicated and counted like a batched one."""
+        await bulk_create_songs([song_row({"title": "A", "acrid": "a"})])
+
+        assert await create_history(1, "a") is True
+        assert await create_history(1, "a") is False
+
+        async with db_sessionmaker() as session:
+            assert await session.scalar(select(func.count()).select_from(HistoryModel)) == 1
+            assert await session.scalar(select(func.sum(SongPlayCountModel.count))) == 2
+        assert (await get_user_stats(1))["total"] == {"": 1}
@@ -0,0 +1,150 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from bot.repositories.song_repo import (
+    SONG_COLUMNS,
+    _copy_songs,
+    bulk_create_songs,
+    create_song,
+    find_songs_by_artist,
+    find_songs_by_genre,
+    song_row,
+)
+from models import SongModel
+from utils.card_cache import card_cache
+
+
+@pytest.fixture
+def copy_session():
+    """Session whose raw connection is a mocked asyncpg connection."""
+    driver = AsyncMock()
+    driver.execute = AsyncMock(side_effect=["CREATE TABLE", "INSERT 0 2"])
+    raw = MagicMock(driver_connection=driver)
+    connection = MagicMock(get_raw_connection=AsyncMock(return_value=raw))
+    session = MagicMock(connection=AsyncMock(return_value=connection))
+    return session, driver
+
+
+class TestCopySongs:
+    """Test the PostgreSQL COPY path of bulk_create_songs."""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_copied_to_staging(self, copy_session, sample_song_info):
+        """Test that rows are copied with JSON columns as text and moved with one INSERT ... SELECT."""
+        session, driver = copy_session
+        rows = [song_row(sample_song_info), song_row({**sample_song_info, "acrid": "other", "links": None})]
+
+        inserted = await _copy_songs(session, rows, update=False)
+
+        assert inserted == 2
+        args, kwargs = driver.copy_records_to_table.call_args
+        assert args == ("songs_import",)
+        assert kwargs["columns"] == SONG_COLUMNS
+        first, second = kwargs["records"]
+        assert first[SONG_COLUMNS.index("links")].startswith('{"spotify"')
+        assert first[SONG_COLUMNS.index("duration")] == 180000
+        assert second[SONG_COLUMNS.index("links")] is None
+        insert = driver.execute.call_args[0][0]
+        assert "SELECT DISTINCT ON (acrid)" in insert
+        assert insert.endswith("ON CONFLICT (acrid) DO NOTHING")
+
+    @pytest.mark.asyncio
+    async def test_update_overwrites_every_column_but_acrid(self, copy_session, sample_song_info):
+        """Test that update mode sets every column from the staged row."""
+        session, driver = copy_session
+
+        await _copy_songs(session, [song_row(sample_song_info)], update=True)
+
+        insert = driver.execute.call_args[0][0]
+        assert "title = EXCLUDED.title" in insert
+        assert "acrid = EXCLUDED.acrid" not in insert
+
+
+class TestSongQueries:
+    """Test searching songs by the names in their JSON columns."""
+
+    @pytest.mark.asyncio
+    async def test_find_by_artist_and_genre(self, db_sessionmaker):
+        """Test that songs are found by any of their artists or genres, newest first."""
+        await bulk_create_songs(
+            [
+                song_row(
+                    {
+                        "title": "Old",
+                        "acrid": "old",
+                        "artists": ["A", "B"],
+                        "genres": ["Pop"],
+                        "release_date": datetime.date(1999, 1, 1),
+                    }
+                ),
+                song_row(
+                    {
+                        "title": "New",
+                        "acrid": "new",
+                        "artists": ["B"],
+                        "genres": ["Rock", "Pop"],
+                        "release_date": datetime.date(2024, 5, 1),
+                    }
+                ),
+                song_row({"title": "Other", "acrid": "other", "artists": ["AB"], "genres": []}),
+            ]
+        )
+
+        assert [song.acrid for song in await find_songs_by_artist("B")] == ["new", "old"]
+        assert [song.acrid for song in await find_songs_by_artist("A")] == ["old"]
+        assert [song.acrid for song in await find_songs_by_genre("Pop")] == ["new", "old"]
+        assert await find_songs_by_genre("Jazz") == []
+        song = (await find_songs_by_artist("A"))[0]
+        assert song.release_date == datetime.date(1999, 1, 1)
+        assert song.genres == ["Pop"]
+
+    @pytest.mark.asyncio
+    async def test_postgresql_uses_jsonb_containment(self):
+        """Test that PostgreSQL queries use @> so the GIN index applies."""
+        from sqlalchemy import select
+        from sqlalchemy.dialects import postgresql
+
+        from bot.repositories.song_repo import _has_name
+        from models import SongModel
+
+        session = MagicMock()
+        session.bind.dialect.name = "postgresql"
+        query = select(SongModel.id).where(_has_name(session, SongModel.genres, "Pop"))
+
+        assert "songs.genres @> " in str(query.compile(dialect=postgresql.dialect()))
+
+
+class TestCreateSong:
+    """Test storing one recognised song."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_get_the_same_song(self, db_sessionmaker, sample_song_info):
+        """Test that users coalesced on one recognition all get the song, which is stored once."""
+        songs = await asyncio.gather(*(create_song(**sample_song_info) for _ in range(3)))
+
+        assert [song.acrid for song in songs] == [sample_song_info["acrid"]] * 3
+        assert len({song.id for song in songs}) == 1
+        async with db_sessionmaker() as session:
+            assert await session.scalar(select(func.count()).select_from(SongModel)) == 1
+
+
+class TestBulkCreateSongs:
+    """Test the multi-row song insert."""
+
+    @pytest.mark.asyncio
+    async def test_update_drops_cached_cards(self, db_sessionmaker):
+        """Test that overwriting songs drops their cached cards, which the ORM listener does not see."""
+        await bulk_create_songs([song_row({"title": "Old", "acrid": "a"}), song_row({"title": "B", "acrid": "b"})])
+        card_cache.set("a", "🎵 *Title*: Old")
+        card_cache.set("c", "🎵 *Title*: C")
+
+        await bulk_create_songs([song_row({"title": "New", "acrid": "a"})], update=True)
+
+        assert card_cache.get("a") is None
+        assert card_cache.get("c") == "🎵 *Title*: C"
+        card_cache.clear()
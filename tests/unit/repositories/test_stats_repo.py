@@ -0,0 +1,111 @@
+import datetime
+
+import pytest
+from sqlalchemy import func, select, update
+
+from bot.repositories.history_repo import bulk_create_history
+from bot.repositories.song_repo import bulk_create_songs, song_row
+from bot.repositories.stats_repo import (
+    ARTIST,
+    GENRE,
+    MONTH,
+    TOTAL,
+    get_user_stats,
+    prune_play_counts,
+    rebuild_user_stats,
+    top_songs,
+)
+from models import SongPlayCountModel, UserStatModel
+
+NOW = datetime.datetime(2025, 1, 8, 12)
+
+
+async def recognise(song_id, users, hours_ago):
+    await bulk_create_history(
+        [
+            {"user_id": user, "song_id": song_id, "recognized_at": NOW - datetime.timedelta(hours=hours_ago)}
+            for user in range(users)
+        ]
+    )
+
+
+class TestTopSongs:
+    """Test the leaderboard query over hourly play counts."""
+
+    @pytest.mark.asyncio
+    async def test_top_songs_since(self, db_sessionmaker):
+        """Test that only buckets in the period count and songs are ranked by plays."""
+        await bulk_create_songs([song_row({"title": acrid.upper(), "acrid": acrid}) for acrid in "abc"])
+        await recognise("a", 2, hours_ago=0)
+        await recognise("b", 3, hours_ago=1)
+        await recognise("c", 5, hours_ago=30)
+
+        recent = await top_songs(NOW - datetime.timedelta(hours=1))
+        week = await top_songs(NOW - datetime.timedelta(days=7), limit=2)
+
+        assert [(song.acrid, plays) for song, plays in recent] == [("b", 3), ("a", 2)]
+        assert [(song.acrid, plays) for song, plays in week] == [("c", 5), ("b", 3)]
+
+    @pytest.mark.asyncio
+    async def test_prune_play_counts(self, db_sessionmaker):
+        """Test that buckets before the cut-off are deleted."""
+        await bulk_create_songs([song_row({"title": "A", "acrid": "a"})])
+        await recognise("a", 1, hours_ago=0)
+        await recognise("a", 1, hours_ago=200)
+
+        assert await prune_play_counts(NOW - datetime.timedelta(days=7)) == 1
+        async with db_sessionmaker() as session:
+            assert await session.scalar(select(func.count()).select_from(SongPlayCountModel)) == 1
+
+
+def song(acrid, artists, genres=()):
+    return song_row({"title": acrid.upper(), "acrid": acrid, "artists": list(artists), "genres": list(genres)})
+
+
+class TestUserStats:
+    """Test the per user rollups maintained by the history inserts."""
+
+    @pytest.mark.asyncio
+    async def test_counted_on_insert(self, db_sessionmaker):
+        """Test that new history records are counted once per artist, genre and month."""
+        await bulk_create_songs([song("a", ["X", "Y", "X"], ["Pop"]), song("b", ["X"], ["Rock"])])
+        await bulk_create_history(
+            [
+                {"user_id": 1, "song_id": "a", "recognized_at": NOW},
+                {"user_id": 1, "song_id": "b", "recognized_at": NOW - datetime.timedelta(days=10)},
+                {"user_id": 2, "song_id": "b", "recognized_at": NOW},
+            ]
+        )
+        # Already in the history, so not counted again
+        assert await bulk_create_history([{"user_id": 1, "song_id": "a", "recognized_at": NOW}]) == 0
+
+        assert await get_user_stats(1) == {
+            TOTAL: {"": 2},
+            ARTIST: {"X": 2, "Y": 1},
+            GENRE: {"Pop": 1, "Rock": 1},
+            MONTH: {"2024-12": 1, "2025-01": 1},
+        }
+        assert (await get_user_stats(2))[TOTAL] == {"": 1}
+        assert await get_user_stats(3) == {}
+
+    @pytest.mark.asyncio
+    async def test_rebuild_matches_incremental(self, db_sessionmaker):
+        """Test that rebuilding from the history gives the counters the inserts maintained."""
+        await bulk_create_songs([song("a", ["X"], ["Pop"]), song("b", ["Y"])])
+        await bulk_create_history(
+            [
+                {"user_id": 1, "song_id": "a", "recognized_at": NOW},
+                {"user_id": 1, "song_id": "b", "recognized_at": NOW},
+                {"user_id": 2, "song_id": "a", "recognized_at": NOW},
+            ]
+        )
+        expected = await get_user_stats(1)
+        async with db_sessionmaker() as session:
+            async with session.begin():
+                await session.execute(update(UserStatModel).values(count=99))
+
+        assert await rebuild_user_stats([1]) == 2
+
+        assert await get_user_stats(1) == expected
+        # Users outside the batch are left alone
+        assert (await get_user_stats(2))[TOTAL] == {"": 99}
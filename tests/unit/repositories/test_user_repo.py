@@ -1,6 +1,8 @@
+import asyncio
 from unittest.mock import patch, AsyncMock, MagicMock
 
 import pytest
+from sqlalchemy import func, select
 
 from bot.repositories.user_repo import get_user_by_telegram_id, update_user_status, create_user
 from models import UserModel
@@ -37,39 +39,40 @@ class TestUserRepository:
 
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
-        "telegram_id,username,expected_active",
+        "telegram_id,username",
         [
-            (123456, "test_user", True),
-            (789012, "another_user", True),
-            (111222, "user3", True),
+            (123456, "test_user"),
+            (789012, "another_user"),
+            (111222, None),
         ],
     )
-    async def test_create_user_new_user(self, mock_sessionmaker, telegram_id, username, expected_active):
+    async def test_create_user_new_user(self, db_sessionmaker, telegram_id, username):
         """Test creating new users with various data using parametrize."""
-        with patch("bot.repositories.user_repo.get_user_by_telegram_id", return_value=None):
-            await create_user(telegram_id, username)
+        await create_user(telegram_id, username)
 
-            mock_session = await mock_sessionmaker.return_value.__aenter__()
-            mock_session.add.assert_called_once()
-            added_user = mock_session.add.call_args[0][0]
-            assert isinstance(added_user, UserModel)
-            assert added_user.telegram_id == telegram_id
-            assert added_user.username == username
-            assert added_user.is_active is expected_active
+        user = await get_user_by_telegram_id(telegram_id)
+        assert user.username == username
+        assert user.is_active is True
 
     @pytest.mark.asyncio
-    @pytest.mark.parametrize("telegram_id", [123456, 789012, 999999])
-    async def test_create_user_existing_user(self, telegram_id):
-        """Test creating users that already exist using parametrize."""
-        existing_user = MagicMock(spec=UserModel)
+    async def test_create_user_existing_user(self, db_sessionmaker):
+        """Test that creating a stored user marks it active again and keeps one row."""
+        await create_user(123456, "test_user")
+        await update_user_status(123456, False)
+
+        await create_user(123456, "test_user")
 
-        with patch("bot.repositories.user_repo.get_user_by_telegram_id", return_value=existing_user), patch(
-            "bot.repositories.user_repo.update_user_status"
-        ) as mock_update:
+        async with db_sessionmaker() as session:
+            users = (await session.execute(select(UserModel))).scalars().all()
+        assert [(user.telegram_id, user.is_active) for user in users] == [(123456, True)]
 
-            await create_user(telegram_id, "test_user")
+    @pytest.mark.asyncio
+    async def test_create_user_concurrently(self, db_sessionmaker):
+        """Test that concurrent creations of one new user do not conflict."""
+        await asyncio.gather(*(create_user(123456, "test_user") for _ in range(3)))
 
-            mock_update.assert_called_once_with(telegram_id, True)
+        async with db_sessionmaker() as session:
+            assert await session.scalar(select(func.count()).select_from(UserModel)) == 1
 
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
@@ -184,49 +187,3 @@ class TestUserRepository:
 
         # Should not raise error, just do nothing
         mock_session.add.assert_not_called()
-
-
-class TestUserRepositoryIntegration:
-    """Integration tests for user repository using pytest."""
-
-    @pytest.mark.asyncio
-    @pytest.mark.parametrize(
-        "scenario",
-        [
-            {"telegram_id": 123, "username": "user1", "exists": False},
-            {"telegram_id": 456, "username": "user2", "exists": True},
-        ],
-    )
-    async def test_create_user_workflow(self, scenario):
-        """Test complete user creation workflow using parametrize."""
-        telegram_id = scenario["telegram_id"]
-        username = scenario["username"]
-        existing_user = MagicMock(spec=UserModel) if scenario["exists"] else None
-
-        with patch("bot.repositories.user_repo.get_user_by_telegram_id", return_value=existing_user), patch(
-            "bot.repositories.user_repo.update_user_status"
-        ) as mock_update:
-
-            # Настройка sessionmaker мока
-            with patch("bot.repositories.user_repo.sessionmaker") as mock_sm:
-                mock_session = AsyncMock()
-                mock_session.add = MagicMock()
-
-                begin_context = AsyncMock()
-                begin_context.__aenter__ = AsyncMock(return_value=None)
-                begin_context.__aexit__ = AsyncMock(return_value=None)
-                mock_session.begin = MagicMock(return_value=begin_context)
-
-                session_context = AsyncMock()
-                session_context.__aenter__ = AsyncMock(return_value=mock_session)
-                session_context.__aexit__ = AsyncMock(return_value=None)
-                mock_sm.return_value = session_context
-
-                await create_user(telegram_id, username)
-
-                if scenario["exists"]:
-                    # Should update existing user
-                    mock_update.assert_called_once_with(telegram_id, True)
-                else:
-                    # Should create new user
-                    mock_session.add.assert_called_once()
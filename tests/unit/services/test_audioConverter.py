@@ -1,8 +1,10 @@
+import asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
 
 import pytest
 
 from bot.services.audioConverter import ConvertMusic
+from bot.services.encodingProfiles import PROFILES
 
 
 class TestConvertMusic:
@@ -17,7 +19,7 @@ class TestConvertMusic:
             mock_process.returncode = 0
             mock_subprocess.return_value = mock_process
 
-            result = await ConvertMusic.convert("input.mp4", "output.mp3")
+            result = await ConvertMusic.convert("input.mp4", "output.mp3", "video", PROFILES["mp3"])
 
             assert result == "output.mp3"
             mock_subprocess.assert_called_once()
@@ -27,6 +29,7 @@ class TestConvertMusic:
             assert "-i" in call_args
             assert "input.mp4" in call_args
             assert "output.mp3" in call_args
+            assert "libmp3lame" in call_args
 
     @pytest.mark.asyncio
     async def test_convert_failure(self):
@@ -48,7 +51,7 @@ class TestConvertMusic:
                 await ConvertMusic.convert("input.mp4", "output.mp3")
 
     @pytest.mark.asyncio
-    async def test_save_and_convert_to_mp3_success(self):
+    async def test_save_and_convert_success(self):
         """Test successful file download and conversion."""
         mock_bot = AsyncMock()
         mock_file = MagicMock()
@@ -63,17 +66,21 @@ class TestConvertMusic:
             from pathlib import Path
 
             mock_settings.DOWNLOADS_DIR = Path("/downloads")
+            mock_settings.ffmpeg_profile = "mp3"
+            mock_settings.ffmpeg_passthrough = False
 
-            result = await ConvertMusic.save_and_convert_to_mp3("file123", "test.mp4", mock_bot)
+            result = await ConvertMusic.save_and_convert("file123", "test.mp4", mock_bot, content_type="video")
 
-            # The result should match what convert returns
+            # The output extension follows the configured profile
             assert result == "/downloads/test.mp4.mp3"
             mock_bot.get_file.assert_called_once_with("file123")
             mock_bot.download_file.assert_called_once()
-            mock_convert.assert_called_once()
+            mock_convert.assert_called_once_with(
+                "/downloads/test.mp4", "/downloads/test.mp4.mp3", "video", PROFILES["mp3"]
+            )
 
     @pytest.mark.asyncio
-    async def test_save_and_convert_to_mp3_download_failure(self):
+    async def test_save_and_convert_download_failure(self):
         """Test file download failure."""
         mock_bot = AsyncMock()
         mock_bot.get_file = AsyncMock(side_effect=Exception("Download failed"))
@@ -85,4 +92,114 @@ class TestConvertMusic:
 
             # Function logs exception and re-raises it
             with pytest.raises(Exception, match="Download failed"):
-                await ConvertMusic.save_and_convert_to_mp3("file123", "test.mp4", mock_bot)
+                await ConvertMusic.save_and_convert("file123", "test.mp4", mock_bot)
+
+
+class TestPassthrough:
+    """Test the fast paths that skip transcoding."""
+
+    @staticmethod
+    def make_bot(payload: bytes):
+        async def download_file(file_path, destination):
+            with open(destination, "wb") as file:
+                file.write(payload)
+
+        bot = AsyncMock()
+        bot.get_file = AsyncMock(return_value=MagicMock(file_path="path/to/file"))
+        bot.download_file = AsyncMock(side_effect=download_file)
+        return bot
+
+    @pytest.mark.asyncio
+    async def test_voice_note_is_passed_directly(self, tmp_path):
+        """Test that an OGG voice note is recognised without running ffmpeg."""
+        bot = self.make_bot(b"OggS" + b"\x00" * 100)
+        with patch("asyncio.create_subprocess_exec") as mock_subprocess:
+            result = await ConvertMusic.save_and_convert(
+                "file123", "clip.voice", bot, directory=tmp_path, content_type="voice", mime_type="audio/ogg"
+            )
+
+        assert result == str(tmp_path / "clip.voice")
+        assert (tmp_path / "clip.voice").exists()
+        mock_subprocess.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_mislabelled_audio_is_transcoded(self, tmp_path):
+        """Test that a file whose content does not match its mime type is transcoded."""
+        bot = self.make_bot(b"RIFF\x00\x00\x00\x00WAVEfmt ")
+        with patch.object(ConvertMusic, "convert", new=AsyncMock()) as mock_convert:
+            result = await ConvertMusic.save_and_convert(
+                "file123", "clip.audio", bot, directory=tmp_path, content_type="audio", mime_type="audio/mpeg"
+            )
+
+        assert result == str(tmp_path / "clip.audio.wav")
+        mock_convert.assert_called_once()
+        assert not (tmp_path / "clip.audio").exists()
+
+    @pytest.mark.asyncio
+    async def test_video_audio_is_stream_copied(self, tmp_path):
+        """Test that the audio of an MP4 video is copied instead of transcoded."""
+        bot = self.make_bot(b"\x00\x00\x00\x20ftypisom")
+        with patch.object(ConvertMusic, "_run", new=AsyncMock()) as mock_run, patch.object(
+            ConvertMusic, "convert", new=AsyncMock()
+        ) as mock_convert:
+            result = await ConvertMusic.save_and_convert(
+                "file123", "clip.video", bot, directory=tmp_path, content_type="video", mime_type="video/mp4"
+            )
+
+        assert result == str(tmp_path / "clip.video.m4a")
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-c:a") + 1] == "copy"
+        mock_convert.assert_not_called()
+        assert not (tmp_path / "clip.video").exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_stream_copy_falls_back_to_transcoding(self, tmp_path):
+        """Test that a video whose audio cannot be copied is transcoded."""
+        bot = self.make_bot(b"\x00\x00\x00\x20ftypisom")
+        with patch.object(ConvertMusic, "_run", new=AsyncMock(side_effect=RuntimeError("copy failed"))), patch.object(
+            ConvertMusic, "convert", new=AsyncMock()
+        ) as mock_convert:
+            result = await ConvertMusic.save_and_convert(
+                "file123", "clip.video_note", bot, directory=tmp_path, content_type="video_note"
+            )
+
+        assert result == str(tmp_path / "clip.video_note.wav")
+        mock_convert.assert_called_once()
+
+
+class TestConvertMusicShutdown:
+    """Test that ffmpeg processes do not outlive the bot."""
+
+    @pytest.mark.asyncio
+    async def test_cancelled_convert_kills_ffmpeg(self):
+        """Test that cancelling a conversion kills its ffmpeg process."""
+        started = asyncio.Event()
+
+        async def communicate():
+            started.set()
+            await asyncio.sleep(10)
+
+        mock_process = MagicMock()
+        mock_process.returncode = None
+        mock_process.communicate = communicate
+        with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=mock_process)):
+            task = asyncio.create_task(ConvertMusic.convert("input.mp4", "output.mp3"))
+            await started.wait()
+            assert mock_process in ConvertMusic._processes
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        mock_process.kill.assert_called_once()
+        assert mock_process not in ConvertMusic._processes
+
+    @pytest.mark.asyncio
+    async def test_kill_running(self):
+        """Test that running processes are killed and finished ones are left alone."""
+        running = MagicMock(returncode=None, wait=AsyncMock(return_value=-9))
+        finished = MagicMock(returncode=0)
+        with patch.object(ConvertMusic, "_processes", {running, finished}):
+            assert await ConvertMusic.kill_running() == 1
+
+        running.kill.assert_called_once()
+        finished.kill.assert_not_called()
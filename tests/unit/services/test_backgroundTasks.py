@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from bot.services.backgroundTasks import BackgroundTasks
+
+
+class TestBackgroundTasks:
+    """Test background task tracking."""
+
+    @pytest.mark.asyncio
+    async def test_drain_waits_for_tasks(self):
+        """Test that drain waits for spawned tasks to finish."""
+        tasks = BackgroundTasks()
+        results = []
+
+        async def work():
+            await asyncio.sleep(0.01)
+            results.append("done")
+
+        tasks.spawn(work(), name="work")
+        assert len(tasks) == 1
+
+        await tasks.drain()
+
+        assert results == ["done"]
+        assert len(tasks) == 0
+
+    @pytest.mark.asyncio
+    async def test_failures_are_counted(self):
+        """Test that a failing task is reported instead of lost."""
+        tasks = BackgroundTasks()
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        tasks.spawn(fail(), name="fail")
+        await tasks.drain()
+
+        assert tasks.failed == 1
+
+    @pytest.mark.asyncio
+    async def test_drain_cancels_after_timeout(self):
+        """Test that tasks still running after the deadline are cancelled."""
+        tasks = BackgroundTasks()
+        task = tasks.spawn(asyncio.sleep(10), name="slow")
+
+        await tasks.drain(timeout=0.01)
+
+        assert task.cancelled()
+        assert len(tasks) == 0
@@ -0,0 +1,121 @@
+import asyncio
+import math
+import struct
+import wave
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bot.services.decoderPool import DecoderPool, decode_clip
+
+
+def write_tone(path, seconds=20, rate=44100, channels=2):
+    with wave.open(str(path), "wb") as output:
+        output.setnchannels(channels)
+        output.setsampwidth(2)
+        output.setframerate(rate)
+        frame = [struct.pack("<h", int(8000 * math.sin(2 * math.pi * 440 * i / rate))) * channels for i in range(rate)]
+        output.writeframes(b"".join(frame) * seconds)
+
+
+class TestDecodeClip:
+    """Test decoding inside a worker."""
+
+    def test_decode_clip_to_pcm_wav(self, tmp_path):
+        """Test that the clip is cut to 15 seconds of 8 kHz mono 16-bit PCM."""
+        pytest.importorskip("av")
+        write_tone(tmp_path / "input.wav")
+
+        decode_clip(str(tmp_path / "input.wav"), str(tmp_path / "clip.wav"))
+
+        with wave.open(str(tmp_path / "clip.wav")) as clip:
+            assert clip.getnchannels() == 1
+            assert clip.getsampwidth() == 2
+            assert clip.getframerate() == 8000
+            assert clip.getnframes() == 15 * 8000
+
+    def test_short_input_is_decoded_whole(self, tmp_path):
+        """Test that inputs shorter than the clip length are decoded completely."""
+        pytest.importorskip("av")
+        write_tone(tmp_path / "input.wav", seconds=3, rate=8000, channels=1)
+
+        decode_clip(str(tmp_path / "input.wav"), str(tmp_path / "clip.wav"))
+
+        with wave.open(str(tmp_path / "clip.wav")) as clip:
+            assert abs(clip.getnframes() - 3 * 8000) < 100
+
+
+class TestDecoderPool:
+    """Test the warm decoder pool."""
+
+    @pytest.mark.asyncio
+    async def test_decode_in_workers(self, tmp_path):
+        """Test that jobs run in the worker processes and workers are recycled."""
+        pytest.importorskip("av")
+        write_tone(tmp_path / "input.wav", seconds=2)
+        pool = DecoderPool(workers=1, max_jobs_per_worker=2)
+        await pool.start()
+        try:
+            for i in range(3):
+                result = await pool.decode(str(tmp_path / "input.wav"), str(tmp_path / f"clip{i}.wav"))
+                assert result == str(tmp_path / f"clip{i}.wav")
+            assert await pool.health_check() is True
+        finally:
+            await pool.stop()
+
+        assert pool.stats() == {"jobs": 3, "failures": 0, "restarts": 0}
+
+    @pytest.mark.asyncio
+    async def test_start_requires_av(self):
+        """Test that the pool refuses to start without PyAV."""
+        with patch.object(DecoderPool, "available", return_value=False):
+            with pytest.raises(RuntimeError, match="av package"):
+                await DecoderPool().start()
+
+    @pytest.mark.asyncio
+    async def test_broken_pool_is_restarted(self):
+        """Test that a crashed worker restarts the pool and fails the job."""
+        pool = DecoderPool(workers=1)
+        pool._executor = MagicMock()
+
+        def broken_submit(fn, *args):
+            future = asyncio.get_running_loop().create_future()
+            future.set_exception(BrokenProcessPool("worker died"))
+            return future
+
+        with patch.object(pool, "_submit", side_effect=broken_submit), patch.object(
+            pool, "_create_executor"
+        ) as mock_create:
+            with pytest.raises(RuntimeError, match="failed"):
+                await pool.decode("input.ogg", "clip.wav")
+
+        assert pool.failures == 1
+        assert pool.restarts == 1
+        mock_create.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_failures_restart_once(self):
+        """Test that jobs failing together on one pool replace it once, without leaking a second pool."""
+        pool = DecoderPool(workers=2)
+        broken = MagicMock()
+        pool._executor = broken
+
+        def broken_submit(fn, *args):
+            future = asyncio.get_running_loop().create_future()
+            future.set_exception(BrokenProcessPool("worker died"))
+            return future
+
+        with patch.object(pool, "_submit", side_effect=broken_submit), patch.object(
+            pool, "_create_executor", side_effect=lambda: MagicMock()
+        ) as mock_create:
+            results = await asyncio.gather(
+                *(pool.decode(f"input{i}.ogg", f"clip{i}.wav") for i in range(3)), return_exceptions=True
+            )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert pool.failures == 3
+        assert pool.restarts == 1
+        mock_create.assert_called_once()
+        broken.shutdown.assert_called_once()
+        assert pool._executor is not broken
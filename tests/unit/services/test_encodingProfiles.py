@@ -0,0 +1,88 @@
+import pytest
+
+from bot.services.encodingProfiles import PROFILES, ffmpeg_args, get_profile, passthrough_mode, sniff_container
+
+
+class TestEncodingProfiles:
+    """Test ffmpeg command lines built from encoding profiles."""
+
+    def test_get_profile_unknown(self):
+        """Test that an unknown profile name is rejected."""
+        with pytest.raises(ValueError, match="Unknown encoding profile"):
+            get_profile("flac")
+
+    def test_wav_profile(self):
+        """Test that the default profile writes 8 kHz mono PCM and skips non-audio streams."""
+        args = ffmpeg_args("in.audio", "out.wav", PROFILES["wav"], "audio", threads=2)
+
+        assert args[0] == "ffmpeg"
+        assert args[args.index("-threads") + 1] == "2"
+        assert args[args.index("-c:a") + 1] == "pcm_s16le"
+        assert args[args.index("-ar") + 1] == "8000"
+        assert args[args.index("-t") + 1] == "15"
+        for flag in ("-vn", "-sn", "-dn", "-nostdin"):
+            assert flag in args
+        assert args[-1] == "out.wav"
+
+    def test_input_hints_come_before_input(self):
+        """Test that demuxer hints for the content type apply to the input."""
+        args = ffmpeg_args("in.voice", "out.wav", PROFILES["wav"], "voice")
+
+        assert args.index("-f") < args.index("-i")
+        assert args[args.index("-f") + 1] == "ogg"
+
+    def test_unknown_content_type_is_probed(self):
+        """Test that inputs of unknown type get no demuxer hints."""
+        args = ffmpeg_args("in.bin", "out.wav", PROFILES["wav"])
+
+        assert "-f" not in args
+        assert "-probesize" not in args
+
+    def test_opus_profile_copies_voice_notes(self):
+        """Test that voice notes are stream-copied by the Opus profile while other inputs are encoded."""
+        voice = ffmpeg_args("in.voice", "out.ogg", PROFILES["opus"], "voice")
+        video = ffmpeg_args("in.video", "out.ogg", PROFILES["opus"], "video")
+
+        assert voice[voice.index("-c:a") + 1] == "copy"
+        assert video[video.index("-c:a") + 1] == "libopus"
+
+
+class TestPassthroughMode:
+    """Test the passthrough decision."""
+
+    @pytest.mark.parametrize(
+        "header, container",
+        [
+            (b"OggS\x00\x02", "ogg"),
+            (b"ID3\x04\x00", "mp3"),
+            (b"\xff\xfb\x90\x00", "mp3"),
+            (b"RIFF\x24\x00\x00\x00WAVE", "wav"),
+            (b"fLaC\x00\x00", "flac"),
+            (b"\x00\x00\x00\x20ftypM4A ", "mp4"),
+            (b"\x1a\x45\xdf\xa3", None),
+            (b"", None),
+        ],
+    )
+    def test_sniff_container(self, header, container):
+        """Test container detection from file headers."""
+        assert sniff_container(header) == container
+
+    def test_direct_when_mime_type_matches(self):
+        """Test that files matching their mime type are passed directly."""
+        assert passthrough_mode("audio", "audio/mpeg", "mp3") == "direct"
+        assert passthrough_mode("audio", "audio/x-m4a", "mp4") == "direct"
+
+    def test_voice_without_mime_type(self):
+        """Test that voice notes are assumed to be OGG when Telegram sends no mime type."""
+        assert passthrough_mode("voice", None, "ogg") == "direct"
+
+    def test_video_audio_is_copied(self):
+        """Test that MP4 videos and video notes get their audio stream-copied."""
+        assert passthrough_mode("video", "video/mp4", "mp4") == "copy"
+        assert passthrough_mode("video_note", None, "mp4") == "copy"
+
+    def test_transcode_otherwise(self):
+        """Test that mismatched or unknown files are transcoded."""
+        assert passthrough_mode("audio", "audio/mpeg", "wav") is None
+        assert passthrough_mode("video", "video/webm", None) is None
+        assert passthrough_mode("audio", "audio/x-ms-wma", None) is None
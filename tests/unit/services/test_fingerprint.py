@@ -0,0 +1,96 @@
+import wave
+
+import numpy as np
+
+from bot.services.fingerprint import SAMPLE_RATE, fingerprint, find_peaks, read_pcm, read_wav, spectrogram
+
+
+def synthetic_song(seed, seconds=15):
+    """A sequence of random quarter-second chords, different for every seed."""
+    rng = np.random.default_rng(seed)
+    notes = []
+    t = np.arange(SAMPLE_RATE // 4) / SAMPLE_RATE
+    for _ in range(seconds * 4):
+        freqs = rng.uniform(200, 3500, size=3)
+        notes.append(sum(np.sin(2 * np.pi * f * t) for f in freqs) / 3)
+    return np.concatenate(notes).astype(np.float32)
+
+
+def write_wav(path, samples, rate=SAMPLE_RATE, channels=1):
+    pcm = (np.clip(samples, -1, 1) * 32000).astype("<i2")
+    if channels > 1:
+        pcm = np.repeat(pcm, channels)
+    with wave.open(str(path), "wb") as output:
+        output.setnchannels(channels)
+        output.setsampwidth(2)
+        output.setframerate(rate)
+        output.writeframes(pcm.tobytes())
+
+
+class TestReadWav:
+    """Test reading clips into samples."""
+
+    def test_read_mono_wav(self, tmp_path):
+        """Test that a mono 8 kHz clip is read unchanged."""
+        samples = synthetic_song(1, seconds=2)
+        write_wav(tmp_path / "clip.wav", samples)
+
+        result = read_wav(str(tmp_path / "clip.wav"))
+
+        assert len(result) == len(samples)
+        assert np.abs(result - samples).max() < 0.05
+
+    def test_read_resamples_and_downmixes(self, tmp_path):
+        """Test that stereo 16 kHz clips are mixed down and resampled to 8 kHz."""
+        write_wav(tmp_path / "clip.wav", np.zeros(16000, dtype=np.float32), rate=16000, channels=2)
+
+        result = read_wav(str(tmp_path / "clip.wav"))
+
+        assert len(result) == SAMPLE_RATE
+
+    def test_not_a_wav(self, tmp_path):
+        """Test that other formats are left to the decoder."""
+        (tmp_path / "clip.mp3").write_bytes(b"ID3" + bytes(100))
+
+        assert read_wav(str(tmp_path / "clip.mp3")) is None
+
+    def test_read_pcm(self):
+        """Test that raw 16-bit PCM is scaled to [-1, 1)."""
+        result = read_pcm(np.array([0, 16384, -32768], dtype="<i2").tobytes())
+
+        assert result.tolist() == [0.0, 0.5, -1.0]
+
+
+class TestFingerprint:
+    """Test peak extraction and hashing."""
+
+    def test_short_input_has_no_hashes(self):
+        """Test that clips shorter than one window produce no fingerprint."""
+        hashes, offsets = fingerprint(np.zeros(100, dtype=np.float32))
+
+        assert len(hashes) == len(offsets) == 0
+
+    def test_peaks_are_ordered_by_frame(self):
+        """Test that peaks come out in time order."""
+        frames, _ = find_peaks(spectrogram(synthetic_song(2, seconds=3)))
+
+        assert len(frames)
+        assert np.all(np.diff(frames) >= 0)
+
+    def test_quieter_clip_shares_hashes(self):
+        """Test that a quieter copy of a clip keeps most of its hashes."""
+        samples = synthetic_song(3, seconds=5)
+
+        loud, _ = fingerprint(samples)
+        quiet, _ = fingerprint(samples * 0.3)
+
+        assert len(np.intersect1d(loud, quiet)) > 0.5 * len(np.unique(loud))
+
+    def test_shifted_clip_shares_hashes(self):
+        """Test that a clip cut later from the same song shares most of its hashes."""
+        samples = synthetic_song(4)
+
+        whole, _ = fingerprint(samples)
+        part, _ = fingerprint(samples[3 * SAMPLE_RATE :])
+
+        assert len(np.intersect1d(part, whole)) > 0.5 * len(np.unique(part))
@@ -0,0 +1,189 @@
+import asyncio
+import datetime
+from unittest.mock import patch, AsyncMock
+
+import pytest
+from sqlalchemy import select
+
+from bot.repositories.history_repo import bulk_create_history
+from bot.services.historyBuffer import HistoryWriteBuffer
+from models import HistoryModel, SongModel, SongPlayCountModel, UserModel
+
+
+class TestBulkCreateHistory:
+    """Test the multi-row history insert."""
+
+    @pytest.mark.asyncio
+    async def test_skips_existing_pairs(self, db_sessionmaker):
+        """Test that duplicate (user, song) pairs are ignored."""
+        now = datetime.datetime.utcnow()
+        rows = [
+            {"user_id": 1, "song_id": "a", "recognized_at": now},
+            {"user_id": 1, "song_id": "b", "recognized_at": now},
+        ]
+
+        assert await bulk_create_history(rows) == 2
+        assert await bulk_create_history(rows + [{"user_id": 2, "song_id": "a", "recognized_at": now}]) == 1
+        assert await bulk_create_history([]) == 0
+
+        async with db_sessionmaker() as session:
+            result = await session.execute(select(HistoryModel))
+            assert len(result.scalars().all()) == 3
+
+    @pytest.mark.asyncio
+    async def test_skips_pairs_across_months_and_within_batch(self, db_sessionmaker):
+        """Test that a pair is kept once whatever month, and so partition, it is recognised in again."""
+        january = datetime.datetime(2025, 1, 31, 23, 59)
+        rows = [
+            {"user_id": 1, "song_id": "a", "recognized_at": january},
+            {"user_id": 1, "song_id": "a", "recognized_at": january + datetime.timedelta(minutes=2)},
+        ]
+
+        assert await bulk_create_history(rows) == 1
+        assert await bulk_create_history([{**rows[0], "recognized_at": datetime.datetime(2025, 3, 1)}]) == 0
+
+        async with db_sessionmaker() as session:
+            result = await session.execute(select(HistoryModel.recognized_at))
+            assert result.scalars().all() == [january]
+
+    @pytest.mark.asyncio
+    async def test_counts_plays_per_hour(self, db_sessionmaker):
+        """Test that every inserted row, new or repeated, is counted in its hourly bucket."""
+        hour = datetime.datetime(2025, 1, 1, 12)
+        await bulk_create_history(
+            [
+                {"user_id": 1, "song_id": "a", "recognized_at": hour.replace(minute=5)},
+                {"user_id": 2, "song_id": "a", "recognized_at": hour.replace(minute=55)},
+            ]
+        )
+        await bulk_create_history(
+            [
+                {"user_id": 1, "song_id": "a", "recognized_at": hour.replace(minute=59)},
+                {"user_id": 1, "song_id": "b", "recognized_at": hour + datetime.timedelta(hours=1)},
+            ]
+        )
+
+        async with db_sessionmaker() as session:
+            result = await session.execute(select(SongPlayCountModel).order_by(SongPlayCountModel.bucket_start))
+            counts = [(row.bucket_start, row.song_id, row.count) for row in result.scalars()]
+        assert counts == [(hour, "a", 3), (hour + datetime.timedelta(hours=1), "b", 1)]
+
+
+class TestHistoryWriteBuffer:
+    """Test the write-behind history buffer."""
+
+    @pytest.mark.asyncio
+    async def test_flush_deduplicates_batch(self):
+        """Test that one flush writes each pair once."""
+        buffer = HistoryWriteBuffer(batch_size=10)
+        buffer.add(1, "a")
+        buffer.add(1, "a")
+        buffer.add(2, "a")
+
+        with patch("bot.services.historyBuffer.bulk_create_history", AsyncMock(return_value=2)) as mock_bulk:
+            assert await buffer.flush()
+
+        rows = mock_bulk.call_args[0][0]
+        assert [(row["user_id"], row["song_id"]) for row in rows] == [(1, "a"), (2, "a")]
+        assert len(buffer) == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_requeues_when_database_is_down(self):
+        """Test that records are kept when nothing can be written."""
+        buffer = HistoryWriteBuffer()
+        buffer.add(1, "a")
+
+        with patch("bot.services.historyBuffer.bulk_create_history", AsyncMock(side_effect=ConnectionError("down"))):
+            assert not await buffer.flush()
+
+        assert len(buffer) == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_reports_records_it_cannot_write(self, caplog):
+        """Test that records still queued when the database is down at shutdown are logged as dropped."""
+        buffer = HistoryWriteBuffer()
+        buffer.add(1, "a")
+        buffer.add(2, "a")
+
+        with patch("bot.services.historyBuffer.bulk_create_history", AsyncMock(side_effect=ConnectionError("down"))):
+            await buffer.stop()
+
+        assert len(buffer) == 0
+        assert "dropping 2 records" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_flush_drops_bad_rows(self):
+        """Test that a failing record does not block the rest of the batch."""
+        buffer = HistoryWriteBuffer()
+        buffer.add(1, "good")
+        buffer.add(1, "bad")
+
+        async def fake_bulk(rows):
+            if len(rows) > 1 or rows[0]["song_id"] == "bad":
+                raise ValueError("constraint")
+            return 1
+
+        with patch("bot.services.historyBuffer.bulk_create_history", side_effect=fake_bulk) as mock_bulk:
+            assert await buffer.flush()
+
+        assert mock_bulk.call_count == 3
+        assert len(buffer) == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_drops_lone_bad_row(self):
+        """Test that a record failing on its own is dropped rather than requeued forever."""
+        buffer = HistoryWriteBuffer()
+        buffer.add(1, "bad")
+
+        with patch("bot.services.historyBuffer.bulk_create_history", AsyncMock(side_effect=ValueError("constraint"))):
+            assert await buffer.flush()
+
+        assert len(buffer) == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_keeps_rest_when_database_goes_down(self):
+        """Test that records not yet retried are kept when the database drops mid-retry."""
+        buffer = HistoryWriteBuffer()
+        for song_id in ("bad", "a", "b"):
+            buffer.add(1, song_id)
+
+        side_effect = [ValueError("constraint"), ValueError("constraint"), ConnectionError("down")]
+        with patch("bot.services.historyBuffer.bulk_create_history", AsyncMock(side_effect=side_effect)):
+            assert not await buffer.flush()
+
+        assert [row["song_id"] for row in buffer._pending] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_wakeup_writes_whole_backlog(self):
+        """Test that one wakeup keeps flushing until less than a batch is queued."""
+        buffer = HistoryWriteBuffer(batch_size=2, flush_interval=60)
+        with patch("bot.services.historyBuffer.bulk_create_history", AsyncMock(return_value=2)) as mock_bulk:
+            await buffer.start()
+            for i in range(7):
+                buffer.add(1, f"song_{i}")
+            for _ in range(10):
+                await asyncio.sleep(0)
+            assert mock_bulk.call_count == 3
+            assert len(buffer) == 1
+            await buffer.stop()
+
+        assert len(buffer) == 0
+
+    @pytest.mark.asyncio
+    async def test_background_flush_and_drain(self, db_sessionmaker):
+        """Test size-triggered flushing and draining on stop."""
+        async with db_sessionmaker() as session:
+            async with session.begin():
+                session.add(UserModel(telegram_id=1, created_at=datetime.datetime.utcnow()))
+                session.add_all([SongModel(title=f"Song {i}", acrid=f"song_{i}") for i in range(5)])
+
+        buffer = HistoryWriteBuffer(batch_size=2, flush_interval=60)
+        await buffer.start()
+        for i in range(5):
+            buffer.add(1, f"song_{i}")
+        await buffer.stop()
+
+        assert len(buffer) == 0
+        async with db_sessionmaker() as session:
+            result = await session.execute(select(HistoryModel))
+            assert len(result.scalars().all()) == 5
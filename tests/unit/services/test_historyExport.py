@@ -0,0 +1,105 @@
+import csv
+import datetime
+import io
+import json
+
+import pytest
+
+from bot.repositories.history_repo import bulk_create_history
+from bot.repositories.song_repo import bulk_create_songs, song_row
+from bot.services.historyExport import CSV_COLUMNS, HistoryExporter
+
+NOW = datetime.datetime(2025, 1, 8, 12)
+
+
+async def make_history(user_id: int, count: int) -> None:
+    await bulk_create_songs(
+        [
+            song_row(
+                {
+                    "title": f"Song {i}",
+                    "acrid": f"acrid_{i}",
+                    "artists": ["Artist", "Guest"],
+                    "genres": ["Pop"],
+                    "release_date": datetime.date(2020, 5, 1),
+                    "duration_ms": 1000,
+                    "links": {"spotify": f"https://open.spotify.com/track/{i}"},
+                }
+            )
+            for i in range(count)
+        ]
+    )
+    await bulk_create_history(
+        [
+            {"user_id": user_id, "song_id": f"acrid_{i}", "recognized_at": NOW + datetime.timedelta(minutes=i)}
+            for i in range(count)
+        ]
+    )
+
+
+async def read_export(exporter, user_id, export_format) -> tuple[str, object]:
+    async with exporter.export(user_id, export_format) as document:
+        content = b"".join([chunk async for chunk in document.read(None)]).decode("utf-8")
+    return content, document
+
+
+class TestHistoryExporter:
+    """Test streaming the history into CSV and JSON lines documents."""
+
+    @pytest.mark.asyncio
+    async def test_csv_export(self, db_sessionmaker):
+        """Test that every record is written in order, batch by batch, below a header."""
+        await make_history(1, 5)
+        await make_history(2, 1)
+
+        content, document = await read_export(HistoryExporter(batch_size=2), 1, "csv")
+
+        rows = list(csv.reader(io.StringIO(content)))
+        assert rows[0] == CSV_COLUMNS
+        assert [row[1] for row in rows[1:]] == [f"Song {i}" for i in range(5)]
+        assert rows[1] == [
+            "2025-01-08T12:00:00",
+            "Song 0",
+            "Artist; Guest",
+            "",
+            "2020-05-01",
+            "Pop",
+            "1000",
+            "acrid_0",
+            "https://open.spotify.com/track/0",
+            "",
+            "",
+        ]
+        assert document.rows == 5
+        assert document.size == len(content.encode("utf-8"))
+        assert document.filename.endswith(".csv")
+
+    @pytest.mark.asyncio
+    async def test_json_lines_export(self, db_sessionmaker):
+        """Test that JSON lines keep the lists and links."""
+        await make_history(1, 3)
+
+        content, document = await read_export(HistoryExporter(batch_size=2), 1, "json")
+
+        records = [json.loads(line) for line in content.splitlines()]
+        assert len(records) == 3
+        assert records[2]["artists"] == ["Artist", "Guest"]
+        assert records[2]["links"] == {"spotify": "https://open.spotify.com/track/2"}
+        assert document.filename.endswith(".jsonl")
+
+    @pytest.mark.asyncio
+    async def test_large_export_spills_to_disk(self, db_sessionmaker):
+        """Test that an export larger than the spool size is moved out of memory."""
+        await make_history(1, 20)
+        exporter = HistoryExporter(batch_size=5, spool_bytes=512)
+
+        async with exporter.export(1, "json") as document:
+            assert document.file._rolled
+            assert document.size > 512
+
+    @pytest.mark.asyncio
+    async def test_unknown_format(self):
+        """Test that only CSV and JSON exports are offered."""
+        with pytest.raises(ValueError):
+            async with HistoryExporter().export(1, "xml"):
+                pass
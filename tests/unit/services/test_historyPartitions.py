@@ -0,0 +1,93 @@
+import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from bot.services.historyPartitions import HistoryPartitions, add_months, partition_month, partition_name
+
+
+class TestMonths:
+    """Test the month arithmetic behind the partition names."""
+
+    def test_add_months_crosses_years(self):
+        """Test that months wrap around the year in both directions."""
+        assert add_months(datetime.date(2025, 11, 1), 3) == datetime.date(2026, 2, 1)
+        assert add_months(datetime.date(2025, 1, 1), -13) == datetime.date(2023, 12, 1)
+
+    def test_partition_names(self):
+        """Test that partition names round-trip and other tables are not taken for partitions."""
+        assert partition_name(datetime.date(2025, 3, 1)) == "history_y2025m03"
+        assert partition_month("history_y2025m03") == datetime.date(2025, 3, 1)
+        assert partition_month("history_default") is None
+
+
+class TestHistoryPartitions:
+    """Test creating partitions ahead and archiving expired ones."""
+
+    @pytest.mark.asyncio
+    async def test_ensure_ahead_creates_missing_months(self, tmp_path):
+        """Test that the current and the next months get a partition unless they have one."""
+        with patch(
+            "bot.services.historyPartitions.history_partition_tables",
+            AsyncMock(return_value={"history_y2025m12": True}),
+        ), patch("bot.services.historyPartitions.create_history_partition", AsyncMock()) as mock_create:
+            created = await HistoryPartitions(tmp_path, months_ahead=2).ensure_ahead(datetime.date(2025, 12, 15))
+
+        assert created == ["history_y2026m01", "history_y2026m02"]
+        mock_create.assert_any_call("history_y2026m01", datetime.date(2026, 1, 1), datetime.date(2026, 2, 1))
+
+    @pytest.mark.asyncio
+    async def test_archive_expired(self, tmp_path):
+        """Test that partitions past retention are detached, archived and dropped, oldest first."""
+        calls = []
+        tables = {
+            "history_y2024m11": False,  # left detached by an interrupted run
+            "history_y2024m12": True,
+            "history_y2025m01": True,
+            "history_y2025m02": True,
+        }
+
+        def record(step):
+            return AsyncMock(side_effect=lambda name, *args: calls.append((step, name)) or 0)
+
+        with patch("bot.services.historyPartitions.history_partition_tables", AsyncMock(return_value=tables)), patch(
+            "bot.services.historyPartitions.detach_history_partition", record("detach")
+        ), patch("bot.services.historyPartitions.archive_history_table", record("archive")), patch(
+            "bot.services.historyPartitions.drop_history_table", record("drop")
+        ):
+            partitions = HistoryPartitions(tmp_path / "archive", retention_months=1)
+            expired = await partitions.archive_expired(datetime.date(2025, 2, 10))
+
+        assert expired == ["history_y2024m11", "history_y2024m12"]
+        assert calls == [
+            ("archive", "history_y2024m11"),
+            ("drop", "history_y2024m11"),
+            ("detach", "history_y2024m12"),
+            ("archive", "history_y2024m12"),
+            ("drop", "history_y2024m12"),
+        ]
+        assert (tmp_path / "archive").is_dir()
+
+    @pytest.mark.asyncio
+    async def test_no_retention_keeps_everything(self, tmp_path):
+        """Test that a retention of 0 months never archives anything."""
+        with patch(
+            "bot.services.historyPartitions.history_partition_tables",
+            AsyncMock(return_value={"history_y2000m01": True}),
+        ), patch("bot.services.historyPartitions.detach_history_partition", AsyncMock()) as mock_detach:
+            assert await HistoryPartitions(tmp_path).archive_expired(datetime.date(2025, 2, 10)) == []
+
+        mock_detach.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_dry_run_changes_nothing(self, tmp_path):
+        """Test that a dry run only lists the expired partitions."""
+        with patch(
+            "bot.services.historyPartitions.history_partition_tables",
+            AsyncMock(return_value={"history_y2024m01": True, "history_y2025m02": True}),
+        ), patch("bot.services.historyPartitions.detach_history_partition", AsyncMock()) as mock_detach:
+            partitions = HistoryPartitions(tmp_path / "archive", retention_months=6)
+            assert await partitions.archive_expired(datetime.date(2025, 2, 10), dry_run=True) == ["history_y2024m01"]
+
+        mock_detach.assert_not_called()
+        assert not (tmp_path / "archive").exists()
@@ -0,0 +1,65 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from bot.services.leaderboard import Leaderboard
+from models import SongModel
+
+
+def song(title, artists):
+    return SongModel(title=title, artists=artists, acrid=title)
+
+
+class TestLeaderboard:
+    """Test the cached leaderboard."""
+
+    def test_render(self):
+        """Test that songs are numbered with their artists and play counts, Markdown escaped."""
+        text = Leaderboard.render("today", [(song("Song_1", ["A", "B"]), 7), (song("Song 2", []), 3)])
+
+        assert text.splitlines() == ["🔥 *Top songs today*", "", "1. Song\\_1 — A, B (7)", "2. Song 2 — Unknown (3)"]
+
+    def test_render_empty(self):
+        """Test the text shown before anything was recognised."""
+        assert "Nothing has been recognised yet" in Leaderboard.render("this week", [])
+
+    @pytest.mark.asyncio
+    async def test_text_is_served_from_the_cache(self):
+        """Test that the database is queried on refresh only, not on every request."""
+        leaderboard = Leaderboard()
+        with patch("bot.services.leaderboard.top_songs", AsyncMock(return_value=[(song("Hit", ["A"]), 9)])) as mock_top:
+            first = await leaderboard.text("day")
+            second = await leaderboard.text("week")
+
+        assert "1. Hit — A (9)" in first
+        assert "this week" in second
+        # One query per period, all made by the first, refreshing call
+        assert mock_top.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_periods_end_with_the_current_hour(self):
+        """Test that each period covers whole hourly buckets up to and including the current one."""
+        leaderboard = Leaderboard()
+        with patch("bot.services.leaderboard.top_songs", AsyncMock(return_value=[])) as mock_top:
+            await leaderboard.refresh()
+
+        hour, day, week = (call.args[0] for call in mock_top.call_args_list)
+        current = leaderboard.refreshed_at.replace(minute=0, second=0, microsecond=0)
+        assert hour == current
+        assert (current - day).total_seconds() == 23 * 3600
+        assert (current - week).total_seconds() == (7 * 24 - 1) * 3600
+
+    @pytest.mark.asyncio
+    async def test_background_refresh_prunes_and_survives_errors(self):
+        """Test that the refresh loop prunes old buckets and keeps running after a failure."""
+        leaderboard = Leaderboard(refresh_interval=0.01)
+        with patch(
+            "bot.services.leaderboard.top_songs", AsyncMock(side_effect=[ConnectionError("down")] + [[]] * 100)
+        ), patch("bot.services.leaderboard.prune_play_counts", AsyncMock(return_value=0)) as mock_prune:
+            await leaderboard.start()
+            await asyncio.sleep(0.05)
+            await leaderboard.stop()
+
+        assert leaderboard.refreshed_at is not None
+        assert mock_prune.called
@@ -0,0 +1,220 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from bot.services.fingerprint import SAMPLE_RATE, fingerprint
+from bot.services.localRecognizer import FingerprintIndex, LocalRecognizer
+from tests.unit.services.test_fingerprint import synthetic_song, write_wav
+
+
+def learned_recognizer(directory=None, songs=5):
+    recognizer = LocalRecognizer(FingerprintIndex(directory))
+    for seed in range(songs):
+        recognizer.learn(f"acrid_{seed}", fingerprint(synthetic_song(seed)))
+    return recognizer
+
+
+class TestFingerprintIndex:
+    """Test the postings index."""
+
+    def test_lookup_returns_every_posting(self):
+        """Test that every posting of a query hash is returned with the query offset."""
+        index = FingerprintIndex()
+        index.add("a", np.array([5, 7, 5], dtype=np.uint32), np.array([1, 2, 3], dtype=np.uint32))
+        index.add("b", np.array([5], dtype=np.uint32), np.array([9], dtype=np.uint32))
+
+        songs, indexed, queried, _ = index.lookup(
+            np.array([5, 8], dtype=np.uint32), np.array([40, 41], dtype=np.uint32)
+        )
+
+        assert sorted(zip(songs.tolist(), indexed.tolist(), queried.tolist())) == [(0, 1, 40), (0, 3, 40), (1, 9, 40)]
+
+    def test_learning_a_song_again_reuses_its_id(self):
+        """Test that more fingerprints of a known song are added under the same song id."""
+        index = FingerprintIndex()
+        index.add("a", np.array([1], dtype=np.uint32), np.array([0], dtype=np.uint32))
+        index.add("a", np.array([2], dtype=np.uint32), np.array([0], dtype=np.uint32))
+
+        assert index.acrids == ["a"]
+        assert len(index) == 2
+
+    def test_adding_leaves_earlier_clips_alone(self):
+        """Test that a learned clip is sorted on its own instead of re-sorting every pending posting."""
+        index = FingerprintIndex()
+        index.add("a", np.array([9, 1], dtype=np.uint32), np.array([0, 1], dtype=np.uint32))
+        first = index._pending[0]
+        index.add("b", np.array([4, 2], dtype=np.uint32), np.array([0, 1], dtype=np.uint32))
+
+        assert index._pending[0] is first
+        assert [postings["hash"].tolist() for postings in index._pending] == [[1, 9], [2, 4]]
+
+    def test_save_and_load(self, tmp_path):
+        """Test that saved postings are found again by a freshly loaded index."""
+        index = FingerprintIndex(tmp_path)
+        index.add("a", np.array([3, 1], dtype=np.uint32), np.array([0, 1], dtype=np.uint32))
+        index.save()
+        index.add("b", np.array([3], dtype=np.uint32), np.array([2], dtype=np.uint32))
+        index.save()
+
+        loaded = FingerprintIndex(tmp_path)
+        loaded.load()
+
+        assert not index.dirty
+        assert loaded.acrids == ["a", "b"]
+        assert loaded.segments == ["segment-000000.npy", "segment-000001.npy"]
+        assert all(isinstance(segment, np.memmap) for segment in loaded._segments.values())
+        songs, _, _, _ = loaded.lookup(np.array([3], dtype=np.uint32), np.array([0], dtype=np.uint32))
+        assert sorted(songs.tolist()) == [0, 1]
+        assert not list(tmp_path.glob(".*.tmp"))
+
+    def test_compaction_merges_segments(self, tmp_path):
+        """Test that saving with max_segments segments merges them into one sorted segment."""
+        index = FingerprintIndex(tmp_path, max_segments=3)
+        for song in range(5):
+            index.add(f"song_{song}", np.array([9 - song, song], dtype=np.uint32), np.array([0, 1], dtype=np.uint32))
+            index.save()
+
+        assert len(index.segments) == 2
+        assert sorted(path.name for path in tmp_path.glob("segment-*.npy")) == index.segments
+        merged = index._segments[index.segments[0]]
+        assert len(merged) == 8
+        assert np.all(np.diff(merged["hash"].astype(np.int64)) >= 0)
+        songs, _, _, acrids = index.lookup(np.array([9, 0], dtype=np.uint32), np.array([0, 0], dtype=np.uint32))
+        assert sorted(acrids[song] for song in songs) == ["song_0", "song_0"]
+
+    def test_compact(self, tmp_path):
+        """Test that compact leaves a single segment with every posting."""
+        index = FingerprintIndex(tmp_path)
+        for song in range(3):
+            index.add(f"song_{song}", np.array([song], dtype=np.uint32), np.array([0], dtype=np.uint32))
+            index.save()
+
+        index.compact()
+
+        assert len(index.segments) == 1
+        assert len(index) == 3
+        assert len(list(tmp_path.glob("segment-*.npy"))) == 1
+
+    def test_indexes_sharing_a_directory(self, tmp_path):
+        """Test that two processes learning different songs agree on song ids after reloading."""
+        first, second = FingerprintIndex(tmp_path), FingerprintIndex(tmp_path)
+        first.add("a", np.array([1], dtype=np.uint32), np.array([0], dtype=np.uint32))
+        second.add("b", np.array([2], dtype=np.uint32), np.array([0], dtype=np.uint32))
+        second.add("c", np.array([3], dtype=np.uint32), np.array([0], dtype=np.uint32))
+        first.save()
+        second.save()
+        first.load()
+
+        assert first.acrids == second.acrids == ["a", "b", "c"]
+        for index in (first, second):
+            songs, _, _, acrids = index.lookup(np.array([1, 2, 3], dtype=np.uint32), np.zeros(3, dtype=np.uint32))
+            assert [acrids[song] for song in songs] == ["a", "b", "c"]
+
+    def test_unsaved_songs_survive_a_reload(self, tmp_path):
+        """Test that postings learned but not saved keep pointing at their song after a reload."""
+        writer, reader = FingerprintIndex(tmp_path), FingerprintIndex(tmp_path)
+        reader.add("local", np.array([7], dtype=np.uint32), np.array([0], dtype=np.uint32))
+        writer.add("saved", np.array([5], dtype=np.uint32), np.array([0], dtype=np.uint32))
+        writer.save()
+
+        reader.load()
+
+        assert reader.acrids == ["saved", "local"]
+        songs, _, _, acrids = reader.lookup(np.array([5, 7], dtype=np.uint32), np.zeros(2, dtype=np.uint32))
+        assert [acrids[song] for song in songs] == ["saved", "local"]
+
+    def test_lookup_ids_stay_valid_across_a_reload(self, tmp_path):
+        """Test that song ids from a lookup resolve against the acrids it returned, not a renumbered list."""
+        writer, reader = FingerprintIndex(tmp_path), FingerprintIndex(tmp_path)
+        reader.add("local", np.array([7], dtype=np.uint32), np.array([0], dtype=np.uint32))
+        songs, _, _, acrids = reader.lookup(np.array([7], dtype=np.uint32), np.zeros(1, dtype=np.uint32))
+        writer.add("saved", np.array([5], dtype=np.uint32), np.array([0], dtype=np.uint32))
+        writer.save()
+
+        reader.load()
+
+        assert reader.acrids[songs[0]] == "saved"
+        assert acrids[songs[0]] == "local"
+
+    def test_save_without_directory_keeps_postings_pending(self):
+        """Test that an index without a directory only lives in memory."""
+        index = FingerprintIndex()
+        index.add("a", np.array([1], dtype=np.uint32), np.array([0], dtype=np.uint32))
+
+        index.save()
+
+        assert index.dirty
+
+
+class TestLocalRecognizer:
+    """Test matching clips against learned fingerprints."""
+
+    def test_matches_noisy_excerpt(self):
+        """Test that a noisy excerpt of a learned song is recognised."""
+        recognizer = learned_recognizer()
+        clip = synthetic_song(3)[4 * SAMPLE_RATE :]
+        clip = clip + np.random.default_rng(0).normal(0, 0.1, len(clip)).astype(np.float32)
+
+        assert recognizer.match(*fingerprint(clip)) == "acrid_3"
+
+    def test_unknown_song_does_not_match(self):
+        """Test that songs that were never learned are not matched."""
+        recognizer = learned_recognizer()
+
+        assert recognizer.match(*fingerprint(synthetic_song(99))) is None
+
+    def test_empty_index(self):
+        """Test that nothing matches before anything was learned."""
+        recognizer = LocalRecognizer(FingerprintIndex())
+
+        assert recognizer.match(*fingerprint(synthetic_song(1))) is None
+
+    @pytest.mark.asyncio
+    async def test_identify_wav_clip(self, tmp_path):
+        """Test identifying a WAV clip and counting the hit."""
+        recognizer = learned_recognizer()
+        write_wav(tmp_path / "clip.wav", synthetic_song(2)[2 * SAMPLE_RATE :])
+
+        acrid, prints = await recognizer.identify(str(tmp_path / "clip.wav"))
+
+        assert acrid == "acrid_2"
+        assert len(prints[0]) == len(prints[1]) > 0
+        assert recognizer.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_identify_undecodable_clip(self, tmp_path):
+        """Test that clips that cannot be read are a miss without a fingerprint."""
+        recognizer = learned_recognizer()
+        (tmp_path / "clip.mp3").write_bytes(b"ID3" + bytes(100))
+
+        with patch("bot.services.localRecognizer.DecoderPool.available", return_value=False):
+            acrid, prints = await recognizer.identify(str(tmp_path / "clip.mp3"))
+
+        assert acrid is None
+        assert prints is None
+        assert recognizer.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_decode_errors_are_a_miss(self, tmp_path):
+        """Test that a failing decoder does not fail the recognition."""
+        recognizer = learned_recognizer()
+
+        with patch.object(LocalRecognizer, "load_samples", side_effect=RuntimeError("broken")):
+            acrid, prints = await recognizer.identify(str(tmp_path / "clip.mp3"))
+
+        assert (acrid, prints) == (None, None)
+
+    @pytest.mark.asyncio
+    async def test_start_and_stop_persist_index(self, tmp_path):
+        """Test that learned fingerprints are saved on stop and loaded on start."""
+        recognizer = learned_recognizer(tmp_path, songs=2)
+        await recognizer.start()
+        await recognizer.stop()
+
+        restarted = LocalRecognizer(FingerprintIndex(tmp_path))
+        await restarted.start()
+        await restarted.stop()
+
+        assert restarted.index.acrids == ["acrid_0", "acrid_1"]
+        assert restarted.match(*fingerprint(synthetic_song(1))) == "acrid_1"
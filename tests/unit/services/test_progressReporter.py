@@ -0,0 +1,75 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.enums import ChatAction
+
+from bot.services.progressReporter import InFlightJobs, RecognitionProgress
+
+
+@pytest.fixture
+def progress_message():
+    """Pytest fixture for a message whose bot records chat actions."""
+    message = MagicMock()
+    message.chat.id = 42
+    message.bot.send_chat_action = AsyncMock()
+    status = MagicMock()
+    status.edit_text = AsyncMock()
+    status.delete = AsyncMock()
+    message.reply = AsyncMock(return_value=status)
+    return message
+
+
+class TestRecognitionProgress:
+    """Test the recognition progress reporter."""
+
+    @pytest.mark.asyncio
+    async def test_stages_edit_single_status_message(self, progress_message):
+        """Test that the first stage sends the status message and later ones edit it."""
+        async with RecognitionProgress(progress_message) as progress:
+            await progress.stage("downloading")
+            await progress.stage("converting")
+            await progress.stage("recognizing")
+
+        progress_message.reply.assert_called_once_with("⬇️ Downloading your file...")
+        status = progress_message.reply.return_value
+        assert status.edit_text.call_count == 2
+        status.delete.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_repeats_chat_action(self, progress_message):
+        """Test that the chat action is re-sent until the job finishes."""
+        async with RecognitionProgress(progress_message, ChatAction.RECORD_VOICE, interval=0.01):
+            await asyncio.sleep(0.035)
+        calls = progress_message.bot.send_chat_action.call_count
+        await asyncio.sleep(0.03)
+
+        assert calls >= 3
+        assert progress_message.bot.send_chat_action.call_count == calls
+        progress_message.bot.send_chat_action.assert_called_with(42, ChatAction.RECORD_VOICE)
+
+    @pytest.mark.asyncio
+    async def test_failures_do_not_interrupt(self, progress_message):
+        """Test that Telegram errors while reporting progress are swallowed."""
+        progress_message.reply = AsyncMock(side_effect=Exception("Bad Request"))
+        progress_message.bot.send_chat_action = AsyncMock(side_effect=Exception("Forbidden"))
+
+        async with RecognitionProgress(progress_message) as progress:
+            await progress.stage("downloading")
+
+        assert progress.status is None
+
+
+class TestInFlightJobs:
+    """Test resubmission tracking."""
+
+    def test_claim_and_release(self):
+        """Test that a key can only be claimed once until released."""
+        jobs = InFlightJobs()
+
+        assert jobs.claim((1, "file"))
+        assert not jobs.claim((1, "file"))
+        assert jobs.claim((2, "file"))
+        jobs.release((1, "file"))
+        assert (1, "file") not in jobs
+        assert jobs.claim((1, "file"))
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from bot.services.singleFlight import FlightCancelled, SingleFlight
+
+
+class TestSingleFlight:
+    """Test in-flight request coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self):
+        """Test that concurrent callers with one key run the function once."""
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+        assert results == ["result"] * 5
+        assert calls == 1
+        assert flight.stats() == {"leaders": 1, "coalesced": 4, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """Test that distinct keys are not coalesced."""
+        flight = SingleFlight("test")
+
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b")))
+
+        assert results == ["a", "b"]
+        assert flight.coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller(self):
+        """Test that a failure is raised to the leader and all followers."""
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_are_not_cached(self):
+        """Test that a finished call does not answer later requests."""
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("key", work) == 1
+        assert await flight.do("key", work) == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_fails_followers(self):
+        """Test that followers of a cancelled leader get an ordinary exception, not a cancellation."""
+        flight = SingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(10)
+
+        leader = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        with pytest.raises(FlightCancelled):
+            await follower
+        assert leader.cancelled()
+        assert len(flight) == 0
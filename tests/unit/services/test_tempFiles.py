@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from bot.services.backgroundTasks import background_tasks
+from bot.services.tempFiles import OUTPUT_ALLOWANCE, TempFileManager
+
+
+class TestTempFileManager:
+    """Test the temp file manager."""
+
+    @pytest.mark.asyncio
+    async def test_workspace_is_removed_after_use(self, tmp_path):
+        """Test that the workspace and its files are removed and the reservation released."""
+        manager = TempFileManager(tmp_path, quota_bytes=10 * OUTPUT_ALLOWANCE)
+
+        async with manager.workspace(100) as workspace:
+            (workspace / "input.ogg").write_bytes(b"data")
+            assert workspace.parent == tmp_path
+            assert manager.used == 100 + OUTPUT_ALLOWANCE
+            assert len(manager) == 1
+        await background_tasks.drain()
+
+        assert not workspace.exists()
+        assert manager.used == 0
+        assert len(manager) == 0
+
+    @pytest.mark.asyncio
+    async def test_workspace_is_removed_on_error(self, tmp_path):
+        """Test that a failing job does not leak its files."""
+        manager = TempFileManager(tmp_path, quota_bytes=10 * OUTPUT_ALLOWANCE)
+
+        with pytest.raises(RuntimeError):
+            async with manager.workspace() as workspace:
+                (workspace / "output.mp3").write_bytes(b"partial")
+                raise RuntimeError("ffmpeg failed")
+        await background_tasks.drain()
+
+        assert list(tmp_path.iterdir()) == []
+        assert manager.used == 0
+
+    @pytest.mark.asyncio
+    async def test_quota_applies_backpressure(self, tmp_path):
+        """Test that a job waits while the quota is used up and runs once space is released."""
+        manager = TempFileManager(tmp_path, quota_bytes=OUTPUT_ALLOWANCE + 1000)
+        release = asyncio.Event()
+        order = []
+
+        async def job(name, size):
+            async with manager.workspace(size):
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(job("first", 1000))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(job("second", 1000))
+        await asyncio.sleep(0.01)
+
+        assert order == ["first"]
+        assert manager.waits == 1
+
+        release.set()
+        await asyncio.gather(first, second)
+        await background_tasks.drain()
+
+        assert order == ["first", "second"]
+        assert manager.used == 0
+
+    @pytest.mark.asyncio
+    async def test_oversized_job_runs_alone(self, tmp_path):
+        """Test that a job larger than the quota is not blocked forever."""
+        manager = TempFileManager(tmp_path, quota_bytes=10)
+
+        async with manager.workspace(10**6) as workspace:
+            assert workspace.exists()
+        await background_tasks.drain()
+
+    @pytest.mark.asyncio
+    async def test_sweep_skips_active_and_fresh_entries(self, tmp_path):
+        """Test that the sweeper removes old orphans only."""
+        manager = TempFileManager(tmp_path, quota_bytes=10**9, max_age=60)
+        past = time.time() - 3600
+        orphan_dir = tmp_path / "orphan"
+        orphan_dir.mkdir()
+        (orphan_dir / "input.ogg").write_bytes(b"data")
+        orphan_file = tmp_path / "old.mp3"
+        orphan_file.write_bytes(b"data")
+        fresh_file = tmp_path / "fresh.mp3"
+        fresh_file.write_bytes(b"data")
+        for path in (orphan_dir, orphan_file):
+            os.utime(path, (past, past))
+
+        async with manager.workspace() as workspace:
+            os.utime(workspace, (past, past))
+            assert manager.sweep() == 2
+            assert workspace.exists()
+        await background_tasks.drain()
+
+        assert not orphan_dir.exists()
+        assert not orphan_file.exists()
+        assert fresh_file.exists()
+
+    @pytest.mark.asyncio
+    async def test_start_sweeps_everything(self, tmp_path):
+        """Test that startup removes whatever a previous run left behind."""
+        root = tmp_path / "temp"
+        root.mkdir()
+        (root / "leftover.mp3").write_bytes(b"data")
+        manager = TempFileManager(root, quota_bytes=10**9, sweep_interval=3600)
+
+        await manager.start()
+        await manager.stop()
+
+        assert list(root.iterdir()) == []
+
+    def test_global_manager_owns_a_subdirectory(self):
+        """Test that the bot sweeps its own subdirectory, not the configured one shared with others."""
+        from bot.core.configure import settings
+        from bot.services.tempFiles import temp_files
+
+        configured = Path(settings.temp_dir) if settings.temp_dir else settings.DOWNLOADS_DIR
+        assert temp_files.root.parent == configured
+        assert temp_files.root.name == f"music-finder-{settings.TELEGRAM_TOKEN.partition(':')[0]}"
@@ -0,0 +1,37 @@
+from unittest.mock import patch
+
+from bot.services.tempNames import TempNameGenerator
+
+
+class TestTempNameGenerator:
+    """Test temp file naming."""
+
+    def test_names_are_unique(self):
+        """Test that generated names do not repeat."""
+        generator = TempNameGenerator()
+        names = [generator.new() for _ in range(10_000)]
+        assert len(names) == len(set(names))
+
+    def test_names_are_short_and_safe(self):
+        """Test that names stay short and contain only filename-safe characters."""
+        generator = TempNameGenerator()
+        for _ in range(1000):
+            name = generator.new()
+        assert len(name) <= 16
+        assert name.replace("-", "").isalnum()
+
+    def test_extension(self):
+        """Test that only the last part of a dotted extension is kept."""
+        generator = TempNameGenerator()
+        assert generator.new("ogg").endswith(".ogg")
+        assert generator.new("tar.gz").endswith(".gz")
+        assert "." not in generator.new()
+
+    def test_new_prefix_after_fork(self):
+        """Test that a process with a different pid gets its own prefix."""
+        generator = TempNameGenerator()
+        with patch("bot.services.tempNames.os.getpid", return_value=1):
+            parent = generator.new()
+        with patch("bot.services.tempNames.os.getpid", return_value=2):
+            child = generator.new()
+        assert parent.split("-")[0] != child.split("-")[0]
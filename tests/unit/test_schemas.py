@@ -1,3 +1,5 @@
+import datetime
+
 import pytest
 from schemas.SongSchema import SongSchema
 
@@ -20,7 +22,7 @@ class TestSongSchema:
         assert song.title == "Test Song"
         assert song.artist == "Test Artist"
         assert song.album == "Test Album"
-        assert song.release_date == "2024-01-01"
+        assert song.release_date == datetime.date(2024, 1, 1)
         assert song.genre == "Pop"
         assert song.duration == 180000
         assert song.links == {"spotify": "https://spotify.com/track/123"}
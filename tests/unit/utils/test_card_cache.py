@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from bot.core.database import get_sessionmaker
+from models import Base, SongModel
+from utils.card_cache import TEMPLATE_VERSION, CardCache, card_cache
+from utils.telegram_formatter import format_song_for_telegram
+
+
+class TestCardCache:
+    """Test the rendered song card cache."""
+
+    def test_get_and_set(self):
+        """Test storing and reading cards, ignoring songs without an acrid."""
+        cache = CardCache()
+        cache.set("acrid_1", "card 1")
+        cache.set(None, "no acrid")
+
+        assert cache.get("acrid_1") == "card 1"
+        assert cache.get("acrid_2") is None
+        assert cache.get(None) is None
+        assert len(cache) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evicts_least_recently_used(self):
+        """Test that the cache stays within its bound."""
+        cache = CardCache(maxsize=2)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        cache.get("a")
+        cache.set("c", "C")
+
+        assert cache.get("a") == "A"
+        assert cache.get("b") is None
+        assert cache.get("c") == "C"
+
+    def test_invalidate(self):
+        """Test dropping a single song's card."""
+        cache = CardCache()
+        cache.set("a", "A")
+        cache.invalidate("a")
+
+        assert cache.get("a") is None
+        cache.invalidate("missing")
+        cache.invalidate(None)
+
+    def test_ignores_cards_from_older_template(self):
+        """Test that a card rendered with another template version is a miss."""
+        cache = CardCache()
+        cache.set("a", "A")
+        with patch("utils.card_cache.TEMPLATE_VERSION", TEMPLATE_VERSION + 1):
+            assert cache.get("a") is None
+            cache.set("a", "A2")
+            assert cache.get("a") == "A2"
+
+        assert len(cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_song_update_invalidates_card(self):
+        """Test that updating a SongModel row drops its cached card."""
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        sessionmaker = get_sessionmaker(engine)
+
+        async with sessionmaker() as session:
+            async with session.begin():
+                song = SongModel(title="Old Title", acrid="update_acrid")
+                session.add(song)
+        assert "Old Title" in format_song_for_telegram(song)
+
+        async with sessionmaker() as session:
+            async with session.begin():
+                song = await session.get(SongModel, song.id)
+                song.title = "New Title"
+        await engine.dispose()
+
+        assert card_cache.get("update_acrid") is None
+        assert "New Title" in format_song_for_telegram(song)
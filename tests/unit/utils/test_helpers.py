@@ -4,7 +4,7 @@ All tests use pytest features: parametrize, fixtures, marks.
 """
 
 import pytest
-from utils.helpers import safe_artists, safe_genres
+from utils.helpers import file_digest, safe_artists, safe_genres
 
 
 @pytest.fixture
@@ -174,6 +174,23 @@ class TestSafeGenres:
         assert result == expected
 
 
+class TestFileDigest:
+    """Test file_digest function using pytest."""
+
+    def test_same_content_same_digest(self, tmp_path):
+        """Test that identical files hash the same and different files do not."""
+        first = tmp_path / "first.mp3"
+        second = tmp_path / "second.mp3"
+        other = tmp_path / "other.mp3"
+        first.write_bytes(b"audio" * 100_000)
+        second.write_bytes(b"audio" * 100_000)
+        other.write_bytes(b"other")
+
+        assert file_digest(str(first)) == file_digest(str(second))
+        assert file_digest(str(first)) != file_digest(str(other))
+        assert len(file_digest(str(other))) == 64
+
+
 class TestHelpersIntegration:
     """Integration tests for helpers functions using pytest."""
 
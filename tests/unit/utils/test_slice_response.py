@@ -0,0 +1,33 @@
+from utils.slice_response import paginate_response
+
+
+def callbacks(kb):
+    return [button.callback_data for row in kb.inline_keyboard for button in row]
+
+
+class TestPaginateResponse:
+    """Test paginating rendered items."""
+
+    def test_slices_the_whole_list(self):
+        """Test that the requested page is cut from the full list."""
+        items = [f"item {i}" for i in range(12)]
+
+        response, kb = paginate_response(items, page=1)
+
+        assert "item 5" in response and "item 9" in response
+        assert "item 4" not in response and "item 10" not in response
+        assert callbacks(kb) == ["history:0", "history:2"]
+
+    def test_prefetched_page_with_total(self):
+        """Test that a page fetched from the database is rendered as is, with buttons from the total."""
+        response, kb = paginate_response(["a", "b"], page=2, prefix="search", title="🔎 Results", total=12)
+
+        assert response.startswith("🔎 Results\n\n")
+        assert "a" in response and "b" in response
+        assert callbacks(kb) == ["search:1"]
+
+    def test_single_page_has_no_buttons(self):
+        """Test that there are no buttons when everything fits on one page."""
+        _, kb = paginate_response(["a"], prefix="search", total=1)
+
+        assert callbacks(kb) == []
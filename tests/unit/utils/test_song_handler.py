@@ -1,8 +1,13 @@
+import asyncio
 from unittest.mock import patch, AsyncMock, MagicMock
 
 import pytest
+from sqlalchemy import select
 
-from utils.song_handler import handle_recognized_song
+from bot.services.historyBuffer import HistoryWriteBuffer
+from models import HistoryModel
+from models.song import SongModel
+from utils.song_handler import handle_recognized_song, persist_recognition
 
 
 class TestSongHandler:
@@ -122,15 +127,11 @@ class TestSongHandler:
             mock_audio.recognize_audio_async = AsyncMock(return_value=sample_acr_response)
             mock_audio_class.return_value = mock_audio
 
-            mock_song = MagicMock()
-            mock_song.acrid = "test_acrid_123"
-            mock_create_song.return_value = mock_song
-
-            response, song_id = await handle_recognized_song("audio.mp3")
+            response, song_info = await handle_recognized_song("audio.mp3")
 
             assert "🎵 *Title*: Test Song" in response
-            assert song_id == "test_acrid_123"
-            mock_create_song.assert_called_once()
+            assert song_info["acrid"] == "test_acrid_123"
+            mock_create_song.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_handle_recognized_song_with_humming(self):
@@ -152,11 +153,139 @@ class TestSongHandler:
             )
             mock_audio_class.return_value = mock_audio
 
-            mock_song = MagicMock()
-            mock_song.acrid = "humming_123"
-            mock_create_song.return_value = mock_song
-
-            response, song_id = await handle_recognized_song("audio.mp3")
+            response, song_info = await handle_recognized_song("audio.mp3")
 
             assert "🎵 *Title*:" in response
-            assert song_id == "humming_123"
+            assert song_info["acrid"] == "humming_123"
+
+
+class TestLocalRecognition:
+    """Test the local fingerprint tier in front of ACRCloud."""
+
+    @pytest.mark.asyncio
+    async def test_local_hit_skips_acrcloud(self):
+        """Test that a clip matched locally is answered from the database."""
+        song = SongModel(
+            title="Local Song",
+            artists=["Local Artist"],
+            album="Album",
+            release_date="2020-01-01",
+            genres=["Pop"],
+            duration=180000,
+            links={},
+            acrid="local_acrid",
+        )
+        with patch("utils.song_handler.settings") as mock_settings, patch(
+            "utils.song_handler.local_recognizer"
+        ) as mock_local, patch("utils.song_handler.find_song_by_acrid", AsyncMock(return_value=song)), patch(
+            "utils.song_handler.AudioRecognition"
+        ) as mock_audio_class:
+            mock_settings.local_recognition_enabled = True
+            mock_local.identify = AsyncMock(return_value=("local_acrid", ("hashes", "offsets")))
+            mock_audio = mock_audio_class.return_value
+            mock_audio.recognize_audio_async = AsyncMock()
+
+            response, song_info = await handle_recognized_song("clip.wav", 15)
+
+        assert "🎵 *Title*: Local Song" in response
+        assert song_info["acrid"] == "local_acrid"
+        assert song_info["duration_ms"] == 180000
+        mock_audio.recognize_audio_async.assert_not_called()
+        mock_local.learn.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_local_miss_learns_acrcloud_result(self, sample_acr_response):
+        """Test that the fingerprint of a clip ACRCloud recognised is learned."""
+        with patch("utils.song_handler.settings") as mock_settings, patch(
+            "utils.song_handler.local_recognizer"
+        ) as mock_local, patch("utils.song_handler.AudioRecognition") as mock_audio_class:
+            mock_settings.local_recognition_enabled = True
+            mock_local.identify = AsyncMock(return_value=(None, ("hashes", "offsets")))
+            mock_audio_class.return_value.recognize_audio_async = AsyncMock(return_value=sample_acr_response)
+
+            response, song_info = await handle_recognized_song("clip.wav", 15)
+
+        mock_local.learn.assert_called_once_with("test_acrid_123", ("hashes", "offsets"))
+
+    @pytest.mark.asyncio
+    async def test_local_match_without_stored_song_asks_acrcloud(self, sample_acr_response):
+        """Test that a local match whose song is missing from the database falls back to ACRCloud."""
+        with patch("utils.song_handler.settings") as mock_settings, patch(
+            "utils.song_handler.local_recognizer"
+        ) as mock_local, patch("utils.song_handler.find_song_by_acrid", AsyncMock(return_value=None)), patch(
+            "utils.song_handler.AudioRecognition"
+        ) as mock_audio_class:
+            mock_settings.local_recognition_enabled = True
+            mock_local.identify = AsyncMock(return_value=("gone", ("hashes", "offsets")))
+            mock_audio_class.return_value.recognize_audio_async = AsyncMock(return_value=sample_acr_response)
+
+            response, song_info = await handle_recognized_song("clip.wav", 15)
+
+        assert song_info["acrid"] == "test_acrid_123"
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, sample_acr_response):
+        """Test that the local tier is not consulted unless enabled."""
+        with patch("utils.song_handler.local_recognizer") as mock_local, patch(
+            "utils.song_handler.AudioRecognition"
+        ) as mock_audio_class:
+            mock_audio_class.return_value.recognize_audio_async = AsyncMock(return_value=sample_acr_response)
+
+            await handle_recognized_song("clip.wav", 15)
+
+        mock_local.identify.assert_not_called()
+        mock_local.learn.assert_not_called()
+
+
+class TestPersistRecognition:
+    """Test background persistence of a recognition."""
+
+    @pytest.mark.asyncio
+    async def test_persist_recognition(self, sample_song_info):
+        """Test that user, song and history are stored in order."""
+        mock_song = MagicMock()
+        mock_song.acrid = "test_acrid_123"
+
+        with patch("utils.song_handler.create_user") as mock_create_user, patch(
+            "utils.song_handler.create_song", return_value=mock_song
+        ) as mock_create_song, patch("utils.song_handler.history_buffer") as mock_buffer:
+            await persist_recognition(123, "user", sample_song_info)
+
+        mock_create_user.assert_called_once_with(123, "user")
+        mock_create_song.assert_called_once_with(**sample_song_info)
+        mock_buffer.add.assert_called_once_with(123, "test_acrid_123")
+
+    @pytest.mark.asyncio
+    async def test_concurrent_recognitions_of_new_user(self, db_sessionmaker, sample_song_info):
+        """Test that two recognitions persisted at once for a new user both reach history."""
+        buffer = HistoryWriteBuffer()
+        other_song = {**sample_song_info, "acrid": "other_acrid", "title": "Other Song"}
+
+        with patch("utils.song_handler.history_buffer", buffer):
+            await asyncio.gather(
+                persist_recognition(123, "user", sample_song_info), persist_recognition(123, "user", other_song)
+            )
+        await buffer.flush()
+
+        async with db_sessionmaker() as session:
+            result = await session.execute(select(HistoryModel.song_id).order_by(HistoryModel.song_id))
+            assert result.scalars().all() == ["other_acrid", "test_acrid_123"]
+
+    @pytest.mark.asyncio
+    async def test_persist_concurrency_is_limited(self, sample_song_info):
+        """Test that only persist_concurrency recognitions write to the database at once."""
+        running, peak = 0, 0
+
+        async def fake_create_user(*args):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+
+        with patch("utils.song_handler.persist_slots", asyncio.Semaphore(1)), patch(
+            "utils.song_handler.create_user", side_effect=fake_create_user
+        ), patch("utils.song_handler.create_song", AsyncMock(return_value=None)):
+            await asyncio.gather(*(persist_recognition(user_id, "user", sample_song_info) for user_id in range(3)))
+
+        assert peak == 1
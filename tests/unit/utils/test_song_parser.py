@@ -1,3 +1,5 @@
+import datetime
+
 import pytest
 
 from utils.song_parser import parse_song
@@ -37,11 +39,11 @@ class TestParseSong:
         result = parse_song(acr_song)
 
         assert result["title"] == "Test Song"
-        assert result["artists"] == "Test Artist"
+        assert result["artists"] == ["Test Artist"]
         assert result["album"] == "Test Album"
-        assert result["release_date"] == "2024-01-01"
+        assert result["release_date"] == datetime.date(2024, 1, 1)
         assert result["duration_ms"] == 180000
-        assert result["genres"] == "Pop"
+        assert result["genres"] == ["Pop"]
         assert result["acrid"] == "test_acrid_123"
         assert "spotify" in result["links"]
         assert "youtube" in result["links"]
@@ -52,18 +54,18 @@ class TestParseSong:
         result = parse_song(complete_acr_song)
 
         assert result["title"] == "Complete Song"
-        assert result["artists"] == "Artist 1, Artist 2"
+        assert result["artists"] == ["Artist 1", "Artist 2"]
         assert result["album"] == "Album Name"
-        assert result["genres"] == "Pop, Rock"
+        assert result["genres"] == ["Pop", "Rock"]
 
     @pytest.mark.parametrize(
         "acr_data,field,expected",
         [
             ({}, "title", "Unknown Title"),
-            ({"title": "Test"}, "artists", "Unknown Artist"),
-            ({"title": "Test"}, "release_date", "Unknown Date"),
-            ({"title": "Test"}, "genres", "Unknown Genre"),
-            ({"title": "Test", "artists": []}, "artists", ""),
+            ({"title": "Test"}, "artists", []),
+            ({"title": "Test"}, "release_date", None),
+            ({"title": "Test"}, "genres", []),
+            ({"title": "Test", "artists": []}, "artists", []),
         ],
     )
     def test_parse_song_missing_fields(self, acr_data, field, expected):
@@ -93,12 +95,14 @@ class TestParseSong:
     @pytest.mark.parametrize(
         "artists_input,expected",
         [
-            ([{"name": "Artist 1"}], "Artist 1"),
-            ([{"name": "A1"}, {"name": "A2"}], "A1, A2"),
-            ([{"name": "A"}, {"name": "B"}, {"name": "C"}], "A, B, C"),
-            ([], ""),
-            ("String Artist", "String Artist"),
-            (None, "Unknown Artist"),
+            ([{"name": "Artist 1"}], ["Artist 1"]),
+            ([{"name": "A1"}, {"name": "A2"}], ["A1", "A2"]),
+            ([{"name": "A"}, {"name": "B"}, {"name": "C"}], ["A", "B", "C"]),
+            ([{"name": "A"}, {"id": 1}, "B"], ["A", "B"]),
+            ([], []),
+            ("String Artist", ["String Artist"]),
+            ("A1, A2", ["A1", "A2"]),
+            (None, []),
         ],
     )
     def test_parse_song_artists_formats(self, minimal_acr_song, artists_input, expected):
@@ -162,11 +166,11 @@ class TestParseSong:
     @pytest.mark.parametrize(
         "genres_input,expected",
         [
-            ([{"name": "Pop"}], "Pop"),
-            ([{"name": "Rock"}, {"name": "Jazz"}], "Rock, Jazz"),
-            ([], ""),
-            ("String Genre", "String Genre"),
-            (None, "Unknown Genre"),
+            ([{"name": "Pop"}], ["Pop"]),
+            ([{"name": "Rock"}, {"name": "Jazz"}], ["Rock", "Jazz"]),
+            ([], []),
+            ("String Genre", ["String Genre"]),
+            (None, []),
         ],
     )
     def test_parse_song_genres_formats(self, minimal_acr_song, genres_input, expected):
@@ -197,23 +201,23 @@ class TestParseSong:
         assert result["links"] == {}
 
     @pytest.mark.parametrize(
-        "release_date",
+        "release_date,expected",
         [
-            "2024-01-01",
-            "2025-12-31",
-            "2023-06-15",
-            None,
+            ("2024-01-01", datetime.date(2024, 1, 1)),
+            ("2025-12-31", datetime.date(2025, 12, 31)),
+            ("2023-06", datetime.date(2023, 6, 1)),
+            ("1999", datetime.date(1999, 1, 1)),
+            ("2023-02-30", None),
+            ("unknown", None),
+            (None, None),
         ],
     )
-    def test_parse_song_release_dates(self, minimal_acr_song, release_date):
-        """Test parsing with various release dates using parametrize."""
+    def test_parse_song_release_dates(self, minimal_acr_song, release_date, expected):
+        """Test parsing release dates into dates using parametrize."""
         if release_date:
             minimal_acr_song["release_date"] = release_date
-            result = parse_song(minimal_acr_song)
-            assert result["release_date"] == release_date
-        else:
-            result = parse_song(minimal_acr_song)
-            assert result["release_date"] == "Unknown Date"
+        result = parse_song(minimal_acr_song)
+        assert result["release_date"] == expected
 
 
 class TestParseSongIntegration:
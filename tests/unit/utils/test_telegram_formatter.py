@@ -1,5 +1,6 @@
 import pytest
 from utils.telegram_formatter import format_song_for_telegram
+from models.song import SongModel
 from schemas.SongSchema import SongSchema
 
 
@@ -209,6 +210,40 @@ class TestFormatSongForTelegram:
 
         assert platform_url in result
 
+    def test_format_song_parsed_keys(self, sample_song_info):
+        """Test that parse_song's artists/genres keys are rendered."""
+        result = format_song_for_telegram(sample_song_info)
+
+        assert "🎤 *Artists*: Test Artist" in result
+        assert "🎼 *Genre*: Pop" in result
+
+    def test_format_song_model(self):
+        """Test formatting a SongModel with raw ACRCloud artist objects."""
+        song = SongModel(
+            title="Model Song",
+            artists=[{"name": "Artist 1"}, {"name": "Artist 2"}],
+            genres="Rock",
+            acrid="model_acrid",
+        )
+        result = format_song_for_telegram(song)
+
+        assert "🎤 *Artists*: Artist 1, Artist 2" in result
+        assert "🎼 *Genre*: Rock" in result
+
+    def test_format_song_escapes_markdown(self):
+        """Test that Markdown control characters in values are escaped."""
+        result = format_song_for_telegram({"title": "my_song *live* [demo]", "artist": "DJ `Tick`"})
+
+        assert "my\\_song \\*live\\* \\[demo]" in result
+        assert "DJ \\`Tick\\`" in result
+
+    def test_format_song_cached_by_acrid(self):
+        """Test that cards with an acrid are rendered once."""
+        first = format_song_for_telegram({"title": "Cached", "acrid": "cached_acrid"})
+        second = format_song_for_telegram({"title": "Changed", "acrid": "cached_acrid"})
+
+        assert second is first
+
 
 # Интеграционные тесты
 class TestFormatSongIntegration:
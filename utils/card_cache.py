@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from models.song import SongModel
+
+# Bump when the card layout in telegram_formatter changes so stale cards are never served
+TEMPLATE_VERSION = 1
+
+
+class CardCache:
+    """Bounded LRU cache of rendered song cards keyed by acrid.
+
+    Each card is stored with the template version it was rendered with, a card from
+    an older layout counts as a miss, so one song has at most one entry.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cards: OrderedDict[str, tuple[int, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def get(self, acrid: str | None) -> str | None:
+        if not acrid:
+            return None
+        entry = self._cards.get(acrid)
+        if entry is None or entry[0] != TEMPLATE_VERSION:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._cards.move_to_end(acrid)
+        return entry[1]
+
+    def set(self, acrid: str | None, card: str) -> None:
+        if not acrid:
+            return
+        self._cards[acrid] = (TEMPLATE_VERSION, card)
+        self._cards.move_to_end(acrid)
+        while len(self._cards) > self.maxsize:
+            self._cards.popitem(last=False)
+
+    def invalidate(self, acrid: str | None) -> None:
+        # Runs inside the ORM flush event, so it must not scan the cache
+        self._cards.pop(acrid, None)
+
+    def clear(self) -> None:
+        self._cards.clear()
+
+
+card_cache = CardCache()
+
+
+@event.listens_for(SongModel, "after_update")
+@event.listens_for(SongModel, "after_delete")
+def _invalidate_song_card(mapper, connection, target: SongModel) -> None:
+    card_cache.invalidate(target.acrid)
@@ -1,6 +1,21 @@
+import datetime
+import hashlib
+import re
+
+RELEASE_DATE = re.compile(r"^(\d{4})(?:-(\d{2}))?(?:-(\d{2}))?$")
+
+
+def _name(item, default: str) -> str | None:
+    if isinstance(item, dict):
+        return item.get("name", default)
+    if isinstance(item, str):
+        return item
+    return None
+
+
 def safe_artists(artists_data) -> str:
     if isinstance(artists_data, list):
-        return ", ".join([a.get("name", "Unknown Artist") for a in artists_data if isinstance(a, dict)])
+        return ", ".join(name for name in (_name(a, "Unknown Artist") for a in artists_data) if name is not None)
     elif isinstance(artists_data, str):
         return artists_data
     return "Unknown Artist"
@@ -8,7 +23,42 @@ def safe_artists(artists_data) -> str:
 
 def safe_genres(genres_data) -> str:
     if isinstance(genres_data, list):
-        return ", ".join([g.get("name", "Unknown Genre") for g in genres_data if isinstance(g, dict)])
+        return ", ".join(name for name in (_name(g, "Unknown Genre") for g in genres_data) if name is not None)
     elif isinstance(genres_data, str):
         return genres_data
     return "Unknown Genre"
+
+
+def name_list(data) -> list[str]:
+    """Names of an ACRCloud list of ``{"name": ...}`` objects, as stored in the artists/genres columns.
+
+    Lists of plain names and the ", " joined strings older rows hold are accepted as well.
+    """
+    if isinstance(data, list):
+        return [name for name in (_name(item, None) for item in data) if name]
+    if isinstance(data, str):
+        return [name for name in data.split(", ") if name]
+    return []
+
+
+def parse_release_date(value) -> datetime.date | None:
+    """Parse ACRCloud's ``YYYY-MM-DD`` release date; a bare year or month means its first day."""
+    if isinstance(value, datetime.date):
+        return value
+    match = RELEASE_DATE.match(value) if isinstance(value, str) else None
+    if match is None:
+        return None
+    year, month, day = match.groups()
+    try:
+        return datetime.date(int(year), int(month or 1), int(day or 1))
+    except ValueError:
+        return None
+
+
+def file_digest(path: str, chunk_size: int = 1 << 16) -> str:
+    """Return the SHA-256 hex digest of a file's contents; equal only for byte-identical files."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -1,20 +1,36 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 
-def paginate_response(items: list, page: int = 0, page_size: int = 5):
+def paginate_response(
+    items: list,
+    page: int = 0,
+    page_size: int = 5,
+    prefix: str = "history",
+    title: str = "📜 *Your recognition history:*",
+    total: int | None = None,
+):
+    """Render one page of items with Prev/Next buttons whose callback data is ``{prefix}:{page}``.
+
+    ``items`` is the whole list, unless ``total`` is given: then it already is the requested page,
+    fetched from the database, and ``total`` is the number of items across all pages.
+    """
     start = page * page_size
     end = start + page_size
-    page_items = items[start:end]
+    if total is None:
+        total = len(items)
+        page_items = items[start:end]
+    else:
+        page_items = items
 
-    response = "📜 *Your recognition history:*\n\n"
+    response = f"{title}\n\n"
     for i, entry in enumerate(page_items, start=start + 1):
         response += entry + "\n\n"
 
     buttons = []
     if page > 0:
-        buttons.append(InlineKeyboardButton(text="⬅️ Prev", callback_data=f"history:{page-1}"))
-    if end < len(items):
-        buttons.append(InlineKeyboardButton(text="➡️ Next", callback_data=f"history:{page+1}"))
+        buttons.append(InlineKeyboardButton(text="⬅️ Prev", callback_data=f"{prefix}:{page-1}"))
+    if end < total:
+        buttons.append(InlineKeyboardButton(text="➡️ Next", callback_data=f"{prefix}:{page+1}"))
 
     kb = InlineKeyboardMarkup(row_width=2, inline_keyboard=[])
     if buttons:
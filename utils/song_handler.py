@@ -1,19 +1,34 @@
+import asyncio
 import logging
 from bot.services.audioRecognition import AudioRecognition
 from utils.song_parser import parse_song
 from utils.telegram_formatter import format_song_for_telegram
-from bot.repositories.song_repo import create_song
+from bot.core.configure import settings
+from bot.repositories.song_repo import create_song, find_song_by_acrid
+from bot.repositories.user_repo import create_user
+from bot.services.historyBuffer import history_buffer
+from bot.services.localRecognizer import local_recognizer
 
 logger = logging.getLogger(__name__)
 
 
-async def handle_recognized_song(file_path: str):
+async def handle_recognized_song(file_path: str, duration: float | None = None):
     audio_service = AudioRecognition()
 
-    duration = audio_service.calculate_song_length(file_path)
+    # Telegram reports the duration, measuring it would decode files that were not transcoded
+    if duration is None:
+        duration = audio_service.calculate_song_length(file_path)
     if duration < 10:
         return "❌ Sorry, the song could not be recognized. Please send longer audio."
 
+    prints = None
+    if settings.local_recognition_enabled:
+        # Songs recognised before are matched against the local fingerprint index without an ACRCloud call
+        acrid, prints = await local_recognizer.identify(file_path)
+        song = await find_song_by_acrid(acrid) if acrid else None
+        if song is not None:
+            return format_song_for_telegram(song), song_info_from_model(song)
+
     try:
         data = await audio_service.recognize_audio_async(file_path)
     except Exception as e:
@@ -29,8 +44,35 @@ async def handle_recognized_song(file_path: str):
         return "❌ No matching song found."
 
     song_info = parse_song(songs[0])
+    if prints is not None and song_info["acrid"]:
+        # Adding postings sorts the clip's hashes, keep that off the event loop
+        await asyncio.to_thread(local_recognizer.learn, song_info["acrid"], prints)
+
+    return format_song_for_telegram(song_info), song_info
+
+
+def song_info_from_model(song) -> dict:
+    """Build the parsed song dict of a stored song, as ``parse_song`` returns it."""
+    return {
+        "title": song.title,
+        "artists": song.artists,
+        "album": song.album,
+        "release_date": song.release_date,
+        "duration_ms": song.duration,
+        "genres": song.genres,
+        "acrid": song.acrid,
+        "links": song.links or {},
+    }
+
+
+# Background persistence must not crowd out the database work of handlers a user is waiting on
+persist_slots = asyncio.Semaphore(settings.persist_concurrency)
 
-    song = await create_song(**song_info)
-    song_id = song.acrid if song else None
 
-    return format_song_for_telegram(song_info), song_id
+async def persist_recognition(user_id: int, username: str | None, song_info: dict) -> None:
+    """Store the user, the song and the history record of a recognition."""
+    async with persist_slots:
+        await create_user(user_id, username)
+        song = await create_song(**song_info)
+    if song is not None:
+        history_buffer.add(user_id, song.acrid)
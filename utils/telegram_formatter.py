@@ -1,28 +1,88 @@
+import re
+
 from schemas.SongSchema import SongSchema
 from models.song import SongModel
+from utils.card_cache import card_cache
+from utils.helpers import safe_artists, safe_genres
+
+SONG_TEMPLATE = (
+    "🎵 *Title*: {title}\n"
+    "🎤 *Artists*: {artists}\n"
+    "💿 *Album*: {album}\n"
+    "📅 *Release Date*: {release_date}\n"
+    "🎼 *Genre*: {genres}\n"
+)
+LINK_TEMPLATES = (
+    ("deezer", "🎧 [Deezer]({})\n"),
+    ("spotify", "🎶 [Spotify]({})\n"),
+    ("youtube", "📺 [YouTube]({})\n"),
+)
+MARKDOWN_SPECIAL = re.compile(r"([_*`\[])")
+
+
+def escape_markdown(value) -> str:
+    """Escape characters that have a meaning in Telegram's legacy Markdown."""
+    if not value:
+        return "Unknown"
+    value = str(value)
+    if MARKDOWN_SPECIAL.search(value) is None:
+        return value
+    return MARKDOWN_SPECIAL.sub(r"\\\1", value)
+
+
+def _text(value, joiner) -> str | None:
+    # JSON columns may still hold the raw ACRCloud list of {"name": ...} objects
+    if isinstance(value, list):
+        return joiner(value)
+    return value
+
+
+def render_song(
+    title=None, artists=None, album=None, release_date=None, genres=None, links: dict | None = None
+) -> str:
+    """Render a song card from already extracted field values."""
+    message = SONG_TEMPLATE.format(
+        title=escape_markdown(title),
+        artists=escape_markdown(_text(artists, safe_artists)),
+        album=escape_markdown(album),
+        release_date=escape_markdown(release_date),
+        genres=escape_markdown(_text(genres, safe_genres)),
+    )
+    if links:
+        message += "\n🔗 *Links*:\n"
+        for platform, template in LINK_TEMPLATES:
+            if platform in links:
+                message += template.format(links[platform])
+    return message
 
 
 def format_song_for_telegram(song: SongSchema | SongModel | dict) -> str:
+    """Render a song card for a parsed dict, a SongModel row or a SongSchema.
+
+    Parsed dicts and SongModel use the ``artists``/``genres`` keys while SongSchema
+    uses ``artist``/``genre``; both spellings are accepted. Cards of songs with an
+    ``acrid`` are kept in the shared card cache, so repeated songs are rendered once.
+    """
     if isinstance(song, dict):
-        song = SongSchema(**song)
-    elif isinstance(song, SongModel):
-        song = SongSchema.from_orm(song)
-
-    message = (
-        f"🎵 *Title*: {song.title or 'Unknown'}\n"
-        f"🎤 *Artists*: {song.artist or 'Unknown'}\n"
-        f"💿 *Album*: {song.album or 'Unknown'}\n"
-        f"📅 *Release Date*: {song.release_date or 'Unknown'}\n"
-        f"🎼 *Genre*: {song.genre or 'Unknown'}\n"
-    )
+        get = song.get
+    else:
 
-    if song.links:
-        message += "\n🔗 *Links*:\n"
-        if "deezer" in song.links:
-            message += f"🎧 [Deezer]({song.links['deezer']})\n"
-        if "spotify" in song.links:
-            message += f"🎶 [Spotify]({song.links['spotify']})\n"
-        if "youtube" in song.links:
-            message += f"📺 [YouTube]({song.links['youtube']})\n"
+        def get(name):
+            return getattr(song, name, None)
+
+    acrid = get("acrid")
+    cached = card_cache.get(acrid)
+    if cached is not None:
+        return cached
+
+    message = render_song(
+        title=get("title"),
+        artists=get("artists") or get("artist"),
+        album=get("album"),
+        release_date=get("release_date"),
+        genres=get("genres") or get("genre"),
+        links=get("links"),
+    )
 
+    card_cache.set(acrid, message)
     return message